@@ -0,0 +1,43 @@
+"""
+Benchmark AITuner inference: Keras predict vs the fast inference engine, single row and batched.
+
+Usage: python benchmarks/bench_ai_tuner_inference.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+
+
+def _time(fn, repeats):
+    fn()  # Warm up (graph tracing, allocations).
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> None:
+    tuner = AITuner(input_dim=5, model_type='default')
+    row = [0.5, 0.7, 0.2, 0.3, 0.9]
+    batch = np.random.default_rng(0).uniform(-1, 1, size=(4096, 5)).astype(np.float32)
+
+    cases = [
+        ("keras predict, 1 row", lambda: tuner.model.predict(np.array([row]), verbose=0), 1, 50),
+        ("engine, 1 row", lambda: tuner.predict_adjustment(row), 1, 20000),
+        ("keras predict, 4096 rows", lambda: tuner.model.predict(batch, verbose=0), len(batch), 20),
+        ("engine, 4096 rows", lambda: tuner.predict_adjustments(batch), len(batch), 500),
+    ]
+    print(f"{'case':<28}{'latency/call':>16}{'rows/s':>16}")
+    for name, fn, rows, repeats in cases:
+        latency = _time(fn, repeats)
+        print(f"{name:<28}{latency * 1e6:>13.1f} us{rows / latency:>16,.0f}")
+
+
+if __name__ == '__main__':
+    main()
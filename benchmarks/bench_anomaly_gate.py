@@ -0,0 +1,70 @@
+"""
+Throughput (rows/s) of the autoencoder AnomalyGate scoring telemetry in batches of different
+sizes, with the NumPy engine and with Keras predict, for both running thresholds, plus the
+detection and false-positive rates on rows with an injected fault.
+
+Usage: python benchmarks/bench_anomaly_gate.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.anomaly_gate import AnomalyGate, EwmaThreshold, QuantileThreshold
+from src.instrumentation import Instrumentation
+
+ROWS = 100000
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+KERAS_ROWS = 2000  # Keras predict costs tens of ms per call; its runs are timed on a prefix.
+
+
+def _telemetry(rng, n):
+    throttle = rng.uniform(0, 1, size=n)
+    return np.column_stack([
+        rng.normal(0, 0.2, size=n), throttle, 1 - throttle + rng.normal(0, 0.02, size=n),
+        0.8 * throttle + rng.normal(0, 0.05, size=n), 1.0 + rng.normal(0, 0.02, size=n),
+    ]).astype(np.float32)
+
+
+def _gate(autoencoder, threshold, rows, numpy_engine):
+    gate = AnomalyGate(autoencoder, threshold=threshold, instrumentation=Instrumentation())
+    gate.offset, gate.scale = rows.mean(axis=0), rows.std(axis=0)
+    if not numpy_engine:
+        gate.engine = None
+    gate.threshold.update(gate.score(rows[:1000]))
+    return gate
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    train = _telemetry(rng, 20000)
+    autoencoder = AITuner(input_dim=5, model_type='autoencoder').autoencoder
+    AnomalyGate(autoencoder, instrumentation=Instrumentation()).fit(train, epochs=10)
+
+    telemetry = _telemetry(rng, ROWS)
+    faulty = rng.random(ROWS) < 0.01
+    telemetry[faulty, 4] += rng.choice([-1, 1], size=faulty.sum()) * rng.uniform(0.3, 1.0, size=faulty.sum())
+
+    print(f"{'engine':<8}{'threshold':<11}{'batch':>7}{'rows/s':>14}{'detected':>10}{'false pos':>11}")
+    for numpy_engine in (True, False):
+        for name, threshold_class in (('ewma', EwmaThreshold), ('quantile', QuantileThreshold)):
+            for batch_size in BATCH_SIZES:
+                n = ROWS if numpy_engine else min(ROWS, max(KERAS_ROWS, batch_size))
+                gate = _gate(autoencoder, threshold_class(), train, numpy_engine)
+                normal = np.empty(n, dtype=bool)
+                start = time.perf_counter()
+                for i in range(0, n, batch_size):
+                    normal[i:i + batch_size] = gate.check(telemetry[i:i + batch_size])
+                elapsed = time.perf_counter() - start
+                detected = np.mean(~normal[faulty[:n]])
+                false_positive = np.mean(~normal[~faulty[:n]])
+                print(f"{'numpy' if numpy_engine else 'keras':<8}{name:<11}{batch_size:>7}{n / elapsed:>14,.0f}"
+                      f"{detected:>10.1%}{false_positive:>11.2%}")
+
+
+if __name__ == '__main__':
+    main()
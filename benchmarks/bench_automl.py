@@ -0,0 +1,48 @@
+"""
+Wall-clock time of a fixed AutoML search (random search, same trials) as the number of
+parallel trial workers grows from 1 to the number of cores.
+
+Usage: python benchmarks/bench_automl.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.automl import AutoMLSearch
+
+TRIALS = 8
+EPOCHS = 10
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, size=(4096, 5)).astype(np.float32)
+    y = np.tanh(x[:, 0] - 0.5 * x[:, 4] + 0.1 * rng.standard_normal(len(x)))
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cores // 2, cores} - {0})
+    print(f"{TRIALS} trials x up to {EPOCHS} epochs, {cores} cores")
+    print(f"{'workers':>8}{'wall time':>12}{'speedup':>10}{'best val_loss':>15}")
+    baseline = None
+    for workers in worker_counts:
+        directory = tempfile.mkdtemp()
+        try:
+            search = AutoMLSearch(input_dim=5, directory=directory, max_trials=TRIALS, epochs=EPOCHS,
+                                  patience=3, workers=workers, algorithm='random', seed=7)
+            start = time.perf_counter()
+            search.run(x, y)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            best = search.tuner.oracle.get_best_trials(1)[0].score
+            print(f"{workers:>8}{elapsed:>10.1f} s{baseline / elapsed:>9.2f}x{best:>15.4f}")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
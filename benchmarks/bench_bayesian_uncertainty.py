@@ -0,0 +1,50 @@
+"""
+Cost of K Monte-Carlo samples of the 'bayesian' AITuner for one control-loop sensor row and
+for a batch of 64 rows: K separate stochastic Keras calls (`model.predict` and `model(x)`)
+against `predict_uncertainty`, which draws all K weight sets and evaluates them in one batched
+NumPy call.
+
+Usage: python benchmarks/bench_bayesian_uncertainty.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+
+SAMPLES = [1, 4, 16, 64, 256]
+KERAS_PREDICT_MAX_SAMPLES = 16  # model.predict costs tens of ms per call.
+
+
+def _timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    tuner = AITuner(input_dim=5, model_type='bayesian')
+    model = tuner.model
+    rows = np.random.default_rng(0).uniform(-1, 1, size=(64, 5)).astype(np.float32)
+    tuner.predict_uncertainty(rows[:1])  # Extract the posterior once.
+    print(f"{'rows':>5}{'K':>6}{'K x predict':>14}{'K x model(x)':>15}{'batched':>12}{'speedup':>10}")
+    for n in (1, 64):
+        batch = rows[:n]
+        for k in SAMPLES:
+            predict = (_timed(lambda: [model.predict(batch, verbose=0) for _ in range(k)], repeat=1)
+                       if k <= KERAS_PREDICT_MAX_SAMPLES else None)
+            call = _timed(lambda: [model(batch) for _ in range(k)], repeat=1)
+            batched = _timed(lambda: tuner.predict_uncertainty(batch, samples=k))
+            predict_text = f"{predict * 1e3:>11.1f} ms" if predict is not None else f"{'-':>14}"
+            print(f"{n:>5}{k:>6}{predict_text}{call * 1e3:>12.2f} ms{batched * 1e3:>9.3f} ms{call / batched:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Cost of recording one calibration change: rewriting the YAML map (what every tick used to do)
+against appending the changed cell to the binary change journal; and the latency of map-as-of-T
+queries as the journal grows.
+
+Usage: python benchmarks/bench_calibration_journal.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.calibration_journal import RECORD_DTYPE, CalibrationJournal
+from src.calibration_store import CalibrationStore
+from src.instrumentation import NullInstrumentation
+from src.tuning import Tuner
+
+CHANGES = 2000
+WRITES = [10000, 100000, 1000000]  # Cell writes, captured 1000 at a time.
+
+
+def base_params():
+    return {
+        'fuel_map': {'axes': {'rpm': np.linspace(1000, 8000, 16).tolist(), 'load': np.linspace(0.2, 1.0, 8).tolist()},
+                     'values': np.ones((16, 8)).tolist()},
+        'boost_map': 1.0,
+    }
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    try:
+        store = CalibrationStore.create(base_params(), os.path.join(directory, 'map.cal'))
+        tuner = Tuner(store, instrumentation=NullInstrumentation())
+        yaml_path = os.path.join(directory, 'map.yaml')
+        start = time.perf_counter()
+        for i in range(CHANGES // 10):
+            tuner.apply_gradient_increment('boost_map', direction=1)
+            store.to_yaml(yaml_path)
+        yaml_cost = (time.perf_counter() - start) / (CHANGES // 10)
+
+        journal = CalibrationJournal(os.path.join(directory, 'journal'), store)
+        start = time.perf_counter()
+        for i in range(CHANGES):
+            tuner.apply_gradient_increment('fuel_map', direction=1, operating_point={'rpm': 4500, 'load': 0.6})
+            journal.capture('ai_tune')
+            store.commit()
+        journal.flush()
+        journal_cost = (time.perf_counter() - start) / CHANGES
+        start = time.perf_counter()
+        for i in range(CHANGES):
+            tuner.apply_gradient_increment('fuel_map', direction=1, operating_point={'rpm': 4500, 'load': 0.6})
+            store.commit()
+        commit_cost = (time.perf_counter() - start) / CHANGES
+        print(f"Per-change cost ({CHANGES} changes, {store.size} cells)")
+        print(f"{'YAML rewrite':<32}{yaml_cost * 1e6:>10.1f}us")
+        print(f"{'store commit + journal append':<32}{journal_cost * 1e6:>10.1f}us")
+        print(f"{'store commit only':<32}{commit_cost * 1e6:>10.1f}us")
+        print(f"{'journal append (difference)':<32}{(journal_cost - commit_cost) * 1e6:>10.1f}us")
+        journal.close()
+
+        print(f"\n{'records':>10}{'log MB':>9}{'as_of':>12}{'full replay':>14}")
+        rng = np.random.default_rng(0)
+        for size in WRITES:
+            memory_store = CalibrationStore.create(base_params())
+            path = os.path.join(directory, f'journal_{size}')
+            journal = CalibrationJournal(path, memory_store, snapshot_interval=10000)
+            t0 = time.time() + 1.0
+            cells = rng.integers(0, memory_store.size, size)
+            for chunk in range(0, size, 1000):
+                memory_store.write_offsets(cells[chunk:chunk + 1000], rng.normal(1.0, 0.1, len(cells[chunk:chunk + 1000])))
+                journal.capture('ai_tune', t0 + chunk)
+                memory_store.commit()
+            journal.flush()
+            queries = t0 + rng.uniform(0, size, 50)
+            start = time.perf_counter()
+            for t in queries:
+                journal.as_of(t)
+            as_of = (time.perf_counter() - start) / len(queries)
+            # Rebuilding from the first snapshot means replaying every record up to T.
+            log = np.fromfile(os.path.join(path, 'changes.log'), dtype=RECORD_DTYPE)
+            start = time.perf_counter()
+            values = np.ones(memory_store.size)  # The initial map.
+            for offset, value in zip(log['offset'].tolist(), log['value'].tolist()):
+                values[offset] = value
+            replay = time.perf_counter() - start
+            print(f"{journal.records:>10}{journal.stats()['log_bytes'] / 1e6:>9.1f}{as_of * 1e3:>10.2f}ms"
+                  f"{replay * 1e3:>12.1f}ms")
+            journal.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
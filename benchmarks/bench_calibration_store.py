@@ -0,0 +1,66 @@
+"""
+Per-tick persistence cost: full YAML rewrite (BaseMap.update_map) vs the memory-mapped
+calibration store, which writes the changed cells in place and commits them.
+
+Usage: python benchmarks/bench_calibration_store.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.calibration_store import CalibrationStore
+
+MAPS = {
+    "2 scalars": {'fuel_map': 1.0, 'boost_map': 1.0},
+    "2 x 16x16 tables": {'fuel_map': np.ones((16, 16)).tolist(), 'boost_map': np.ones((16, 16)).tolist()},
+    "2 x 32x32x8 tables": {'fuel_map': np.ones((32, 32, 8)).tolist(), 'boost_map': np.ones((32, 32, 8)).tolist()},
+}
+
+
+def _bench_yaml(params, path, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        with open(path, 'w') as f:
+            yaml.dump(params, f)
+    return (time.perf_counter() - start) / ticks
+
+
+def _bench_store(params, path, ticks):
+    store = CalibrationStore.create(params, path)
+    name = 'fuel_map'
+    shape = store.shape(name)
+    # A tune touches the cells around one operating point.
+    index = tuple(np.array([0, 1]) for _ in shape) if shape else None
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if index is None:
+            store[name] = store[name] + 0.01
+        else:
+            store.add_cells(name, index, 0.01)
+        store.commit()
+    elapsed = (time.perf_counter() - start) / ticks
+    store.close()
+    return elapsed
+
+
+def main() -> None:
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{'map':<22}{'yaml rewrite':>16}{'store commit':>16}{'speedup':>10}")
+        for name, params in MAPS.items():
+            yaml_time = _bench_yaml(params, os.path.join(workdir, 'map.yaml'), 20)
+            store_time = _bench_store(params, os.path.join(workdir, 'map.cal'), 2000)
+            print(f"{name:<22}{yaml_time * 1e6:>13.1f} us{store_time * 1e6:>13.1f} us{yaml_time / store_time:>9.0f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Lookups/s for CalibrationTable: scalar queries vs batched queries, 2-D and 3-D tables.
+
+Usage: python benchmarks/bench_calibration_table.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.calibration_store import CalibrationStore
+from src.calibration_table import CalibrationTable
+
+AXES = {
+    "2-D rpm x load (32x16)": {'rpm': np.linspace(500, 9000, 32), 'load': np.linspace(0, 1.2, 16)},
+    "3-D rpm x load x temp (32x16x8)": {
+        'rpm': np.linspace(500, 9000, 32), 'load': np.linspace(0, 1.2, 16), 'temp': np.geomspace(1, 120, 8),
+    },
+}
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'table':<34}{'scalar lookups/s':>18}{'batched lookups/s':>20}{'batched updates/s':>20}")
+    for name, axes in AXES.items():
+        shape = tuple(len(axis) for axis in axes.values())
+        store = CalibrationStore.create({'fuel_map': {
+            'axes': {axis: points.tolist() for axis, points in axes.items()},
+            'values': rng.uniform(0.8, 1.2, size=shape).tolist(),
+        }})
+        table = CalibrationTable(store, 'fuel_map')
+        low = [points[0] for points in axes.values()]
+        high = [points[-1] for points in axes.values()]
+        points = rng.uniform(low, high, size=(100000, len(axes)))
+
+        scalar_points = points[:20000].tolist()
+        start = time.perf_counter()
+        for point in scalar_points:
+            table.lookup(point)
+        scalar_rate = len(scalar_points) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        table.lookup_batch(points)
+        batch_rate = len(points) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        table.apply_increment_batch(points, 0.001)
+        update_rate = len(points) / (time.perf_counter() - start)
+        print(f"{name:<34}{scalar_rate:>18,.0f}{batch_rate:>20,.0f}{update_rate:>20,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+CAN decode throughput in frames/s: the naive per-frame decoder (one Python int and dict per frame
+and signal) against the batched decoder over NumPy structured arrays, at several batch sizes.
+
+Usage: python benchmarks/bench_can_decode.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.can_bus import FRAME_DTYPE, SignalDatabase
+
+BATCH_SIZES = [16, 256, 4096, 65536]
+FRAMES = 200000
+
+
+def _frames(database, n, rng):
+    ids = np.array(sorted(database.plans), dtype=np.uint32)
+    payloads = np.frombuffer(rng.bytes(8 * n), dtype=np.uint8).reshape(n, 8)
+    frames = np.zeros(n, dtype=FRAME_DTYPE)
+    frames['arbitration_id'] = ids[rng.integers(len(ids), size=n)]
+    frames['dlc'] = 8
+    frames['data'] = payloads
+    return frames
+
+
+def main() -> None:
+    database = SignalDatabase.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs', 'telemetry.dbc'))
+    frames = _frames(database, FRAMES, np.random.default_rng(0))
+    naive = frames[:20000]
+    items = [(int(i), bytes(d)) for i, d in zip(naive['arbitration_id'], naive['data'])]
+    start = time.perf_counter()
+    for message_id, data in items:
+        database.decode_frame(message_id, data)
+    naive_rate = len(items) / (time.perf_counter() - start)
+    print(f"Decode throughput, {len(database.plans)} message IDs, {len(database.columns)} telemetry columns")
+    print(f"{'decoder':>10}{'batch':>8}{'frames/s':>14}{'speedup':>9}")
+    print(f"{'naive':>10}{1:>8}{naive_rate:>14,.0f}{1.0:>9.1f}")
+    for batch_size in BATCH_SIZES:
+        batches = [frames[i:i + batch_size] for i in range(0, FRAMES, batch_size)]
+        start = time.perf_counter()
+        for batch in batches:
+            database.decode(batch)
+        rate = FRAMES / (time.perf_counter() - start)
+        print(f"{'batched':>10}{batch_size:>8}{rate:>14,.0f}{rate / naive_rate:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
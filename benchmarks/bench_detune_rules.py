@@ -0,0 +1,72 @@
+"""
+Detune evaluation cost as monitored parts grow: the per-part loop (check_part_degradation, then one
+apply_detune call per affected parameter) against the compiled rule engine (Detuner.apply_health),
+on a CalibrationStore of scalar and RPM x load table parameters.
+
+Usage: python benchmarks/bench_detune_rules.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.calibration_store import CalibrationStore
+from src.detuner import DegradationRules, Detuner
+from src.instrumentation import NullInstrumentation
+
+PART_COUNTS = [10, 100, 1000, 5000]
+PARAMETERS = 200  # One in ten is a 16x8 table.
+RULES_PER_PART = 3
+DEGRADED = 0.2
+
+
+def build(num_parts, rng):
+    params = {}
+    for i in range(PARAMETERS):
+        if i % 10 == 0:
+            params[f'param_{i}'] = {'axes': {'rpm': np.linspace(1000, 8000, 16).tolist(),
+                                             'load': np.linspace(0.2, 1.0, 8).tolist()},
+                                    'values': np.ones((16, 8)).tolist()}
+        else:
+            params[f'param_{i}'] = 1.0
+    parts = {f'part_{p}': {f'param_{j}': float(rng.uniform(0.25, 1.0))
+                           for j in rng.choice(PARAMETERS, RULES_PER_PART, replace=False)}
+             for p in range(num_parts)}
+    limits = {name: {'minimum': 0.0, 'max_step': 0.05} for name in params}
+    status = {part: bool(rng.uniform() < DEGRADED) for part in parts}
+    return params, DegradationRules(parts, limits), status
+
+
+def _time(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"Detune pass latency, {PARAMETERS} parameters, {RULES_PER_PART} rules per part, "
+          f"{DEGRADED:.0%} of parts degraded")
+    print(f"{'parts':>7}{'per-part loop':>16}{'apply_health':>15}{'speedup':>9}")
+    for num_parts in PART_COUNTS:
+        params, rules, status = build(num_parts, rng)
+        store = CalibrationStore.create(params)
+        detuner = Detuner(store, gradient_step=1e-6, instrumentation=NullInstrumentation(), rules=rules)
+
+        def per_part():
+            for param in detuner.check_part_degradation(status):
+                detuner.apply_detune(param)
+
+        repeats = max(3, 2000 // num_parts)
+        loop = _time(per_part, repeats)
+        bulk = _time(lambda: detuner.apply_health(status), repeats * 5)
+        print(f"{num_parts:>7}{loop * 1e3:>14.3f}ms{bulk * 1e3:>13.3f}ms{loop / bulk:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
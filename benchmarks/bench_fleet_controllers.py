@@ -0,0 +1,68 @@
+"""
+Scalar AeroController/ActiveLamdaController loops vs the array-based fleet controllers,
+scaling the number of cars N from 1 to 1e6.
+
+Usage: python benchmarks/bench_fleet_controllers.py
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.aero_controller import AeroController, AeroFleetController
+from src.lamda_controller import ActiveLamdaController, LambdaFleetController
+
+# Scalar loops above this size are too slow to be worth timing directly.
+SCALAR_LIMIT = 10000
+
+
+def _scalar_step(aero, lambdas, wheel_speeds, speeds, readings):
+    for i in range(len(speeds)):
+        aero.update_drs(speeds[i], 75.0)
+        aero.update_braking_stability(wheel_speeds[i])
+        lambdas[i].update_lambda(readings[i])
+
+
+def main() -> None:
+    logging.disable(logging.INFO)  # Measure the control math, not the per-call logging.
+    rng = np.random.default_rng(0)
+    print(f"{'N':>9}{'scalar step':>16}{'fleet step':>16}{'fleet cars/s':>16}{'speedup':>10}")
+    for n in [1, 10, 100, 1000, 10000, 100000, 1000000]:
+        wheel_speeds = rng.uniform(40, 120, size=(n, 4))
+        speeds = rng.uniform(0, 160, size=n)
+        readings = rng.uniform(0.85, 1.15, size=n)
+        lap_times = np.full(n, 75.0)
+
+        aero_fleet = AeroFleetController(n)
+        lambda_fleet = LambdaFleetController(n)
+        out = np.empty((n, 4))
+        repeats = max(1, 100000 // n)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            aero_fleet.update_drs(speeds, lap_times)
+            aero_fleet.update_braking_stability(wheel_speeds, out=out)
+            lambda_fleet.update_lambda(readings)
+        fleet_time = (time.perf_counter() - start) / repeats
+
+        if n <= SCALAR_LIMIT:
+            aero = AeroController()
+            lambdas = [ActiveLamdaController() for _ in range(n)]
+            ws, sp, rd = wheel_speeds.tolist(), speeds.tolist(), readings.tolist()
+            scalar_repeats = max(1, 1000 // n)
+            start = time.perf_counter()
+            for _ in range(scalar_repeats):
+                _scalar_step(aero, lambdas, ws, sp, rd)
+            scalar_time = (time.perf_counter() - start) / scalar_repeats
+            scalar_text = f"{scalar_time * 1e3:>13.3f} ms"
+            speedup = f"{scalar_time / fleet_time:>9.1f}x"
+        else:
+            scalar_text, speedup = f"{'-':>16}", f"{'-':>10}"
+        print(f"{n:>9}{scalar_text}{fleet_time * 1e3:>13.3f} ms{n / fleet_time:>16,.0f}{speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Memory and latency of the AITuner 'graph' model as the sensor count grows from 5 to hundreds:
+size of the sparse normalized adjacency against a dense one, and inference latency for one
+time step per call against one batched call scoring many time steps as disjoint graphs.
+
+Usage: python benchmarks/bench_graph_model.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.sensor_graph import random_sensor_graph
+
+SENSOR_COUNTS = [5, 20, 50, 100, 200, 500]
+STEPS = 256  # Time steps scored per batched call.
+REPEAT = 20
+
+
+def _time(fn, repeat=REPEAT):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    print(f"{STEPS} time steps, about 4 links per sensor")
+    print(f"{'sensors':>8}{'nonzeros':>10}{'sparse adj':>12}{'dense adj':>12}"
+          f"{'1 step':>10}{'per step, looped':>18}{'per step, batched':>19}{'speedup':>9}")
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for sensors in SENSOR_COUNTS:
+            graph = random_sensor_graph(sensors, seed=sensors)
+            path = os.path.join(directory, f'graph_{sensors}.yaml')
+            graph.save(path)
+            tuner = AITuner(input_dim=sensors, model_type='graph', hyperparameters={'sensor_graph': path})
+            steps = rng.uniform(-1, 1, size=(STEPS, sensors)).astype(np.float32)
+            single = _time(lambda: tuner.predict_raw(steps[:1]))
+            looped = _time(lambda: [tuner.predict_raw(step[None]) for step in steps], repeat=2) / STEPS
+            batched = _time(lambda: tuner.predict_raw(steps)) / STEPS
+            dense_bytes = sensors * sensors * 4
+            print(f"{sensors:>8}{len(graph.values):>10}{graph.nbytes / 1024:>9.1f} kB"
+                  f"{dense_bytes / 1024:>9.1f} kB{single * 1e6:>7.0f} us{looped * 1e6:>15.0f} us"
+                  f"{batched * 1e6:>16.1f} us{looped / batched:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
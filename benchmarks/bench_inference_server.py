@@ -0,0 +1,68 @@
+"""
+Throughput and latency of N concurrent callers requesting AITuner predictions either directly
+(one model call per request) or through the micro-batching InferenceServer. Batching pays off
+when a model call has a large fixed cost (Keras predict, tf.function); the NumPy engine is
+already cheaper per row than the 2 ms coalescing budget.
+
+Usage: python benchmarks/bench_inference_server.py
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.inference_server import InferenceServer
+from src.instrumentation import Instrumentation
+
+REQUESTS_PER_CALLER = 50
+CONFIGS = [
+    ('default', False),  # Keras Model.predict per request.
+    ('default', True),   # NumPy engine.
+    ('lstm', True),      # tf.function engine.
+]
+
+
+def _run_callers(predict, rows, callers):
+    def worker(offset):
+        for i in range(REQUESTS_PER_CALLER):
+            predict(rows[(offset + i) % len(rows)])
+    threads = [threading.Thread(target=worker, args=(c,)) for c in range(callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return callers * REQUESTS_PER_CALLER / (time.perf_counter() - start)
+
+
+def main() -> None:
+    rows = np.random.default_rng(0).uniform(-1, 1, size=(256, 5)).astype(np.float32)
+    print(f"{'model':<10}{'engine':>8}{'callers':>9}{'direct req/s':>14}{'served req/s':>14}"
+          f"{'mean batch':>12}{'p50':>11}{'p99':>11}{'max queue':>11}")
+    for model_type, fast_inference in CONFIGS:
+        tuner = AITuner(input_dim=5, model_type=model_type, fast_inference=fast_inference)
+        lock = threading.Lock()
+
+        def direct(row):
+            with lock:  # One model shared by all callers, as without the server.
+                return tuner.predict_adjustment(row)
+
+        for callers in [1, 4, 16, 64]:
+            direct_rate = _run_callers(direct, rows, callers)
+            with InferenceServer(tuner, max_batch_size=64, max_latency=0.002,
+                                 instrumentation=Instrumentation()) as server:
+                served_rate = _run_callers(server.predict_adjustment, rows, callers)
+                stats = server.stats()
+            engine = type(tuner.engine).__name__.replace('InferenceEngine', '') if tuner.engine else 'Keras'
+            print(f"{model_type:<10}{engine:>8}{callers:>9}{direct_rate:>14,.0f}{served_rate:>14,.0f}"
+                  f"{stats['mean_batch_size']:>12.1f}{stats['request_latency_p50'] * 1e3:>8.2f} ms"
+                  f"{stats['request_latency_p99'] * 1e3:>8.2f} ms{stats['max_queue_depth']:>11}")
+
+
+if __name__ == '__main__':
+    main()
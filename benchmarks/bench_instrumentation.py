@@ -0,0 +1,81 @@
+"""
+Per-decision cost of the controllers under three observability settings:
+- decision logging: every decision formatted and written by a logging handler (the old behaviour),
+- instrumentation: counters, latency histograms and the event ring buffer (the default),
+- none: NullInstrumentation and no logging (the bare control math).
+
+Usage: python benchmarks/bench_instrumentation.py
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.aero_controller import AeroController
+from src.detuner import Detuner
+from src.instrumentation import Instrumentation, NullInstrumentation
+from src.lamda_controller import ActiveLamdaController
+from src.tuning import Tuner
+
+CALLS = 50000
+CONTROLLER_LOGGERS = ['src.tuning', 'src.detuner', 'src.aero_controller', 'src.lamda_controller']
+
+
+def _controllers(instrumentation):
+    base_map = {'fuel_map': 1.0, 'boost_map': 1.0}
+    return (Tuner(base_map, instrumentation=instrumentation), Detuner(base_map, instrumentation=instrumentation),
+            AeroController(instrumentation=instrumentation), ActiveLamdaController(instrumentation=instrumentation))
+
+
+def _time_stages(instrumentation):
+    tuner, detuner, aero, lamda = _controllers(instrumentation)
+    wheel_speeds = np.array([90.0, 92.0, 88.0, 91.0])
+    out = np.empty(4)
+    stages = {
+        'Tuner.apply_gradient_increment': lambda i: tuner.apply_gradient_increment('fuel_map', 1 - 2 * (i & 1)),
+        'Detuner.apply_detune': lambda i: detuner.apply_detune('boost_map'),
+        'AeroController.update_drs': lambda i: aero.update_drs(70.0 + (i & 31), 75.0),
+        'AeroController.update_braking_stability_array':
+            lambda i: aero.update_braking_stability_array(wheel_speeds, out=out),
+        'ActiveLamdaController.update_lambda': lambda i: lamda.update_lambda(1.1 - 0.2 * (i & 1)),
+    }
+    timings = {}
+    for name, call in stages.items():
+        start = time.perf_counter()
+        for i in range(CALLS):
+            call(i)
+        timings[name] = (time.perf_counter() - start) / CALLS
+    return timings
+
+
+def main() -> None:
+    handler = logging.FileHandler(os.devnull)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+    loggers = [logging.getLogger(name) for name in CONTROLLER_LOGGERS]
+    for controller_logger in loggers:
+        controller_logger.addHandler(handler)
+        controller_logger.propagate = False
+
+    for controller_logger in loggers:
+        controller_logger.setLevel(logging.DEBUG)
+    logged = _time_stages(NullInstrumentation())
+    for controller_logger in loggers:
+        controller_logger.setLevel(logging.WARNING)
+    instrumentation = Instrumentation()
+    instrumented = _time_stages(instrumentation)
+    bare = _time_stages(NullInstrumentation())
+
+    print(f"{'stage':<48}{'logging':>12}{'instrumented':>14}{'none':>10}{'overhead':>11}")
+    for name in bare:
+        print(f"{name:<48}{logged[name] * 1e6:>9.2f} us{instrumented[name] * 1e6:>11.2f} us"
+              f"{bare[name] * 1e6:>7.2f} us{(instrumented[name] - bare[name]) * 1e6:>8.2f} us")
+    print()
+    print(instrumentation.format_summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Adaptive lambda trims: convergence on a simulated engine whose fueling error varies over RPM x load,
+against a single global trim nudged by a fixed step (the bang-bang rule of ActiveLamdaController),
+and long-term trim updates/s for streaming single samples vs one batched call over a replayed log.
+
+Usage: python benchmarks/bench_lambda_trim.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.instrumentation import NullInstrumentation
+from src.lambda_trim import AdaptiveLambdaController, LongTermTrimTable
+
+TICKS = 30000  # 5 minutes at 100 Hz.
+WINDOW = 1000
+
+
+def fueling_error(rpm, load):
+    """Relative fuel shortfall of the base map at each operating point (lean where positive)."""
+    return 0.08 * np.sin(rpm / 1500.0) + 0.06 * (load - 0.6)
+
+
+def drive_cycle(ticks, rng):
+    t = np.arange(ticks)
+    rpm = 4000 + 3000 * np.sin(t / 310.0) + rng.normal(0, 50, ticks)
+    load = 0.6 + 0.35 * np.sin(t / 170.0 + 1.0)
+    return rpm, load
+
+
+def run(controller_step, rpm, load, rng):
+    errors = np.empty(len(rpm))
+    correction = 0.0
+    noise = rng.normal(0, 0.005, len(rpm))
+    for i in range(len(rpm)):
+        sensor_lambda = (1.0 + fueling_error(rpm[i], load[i])) / (1.0 + correction) + noise[i]
+        errors[i] = abs(sensor_lambda - 1.0)
+        correction = controller_step(sensor_lambda, rpm[i], load[i])
+    return errors
+
+
+def bang_bang(step=0.01, tolerance=0.05):
+    state = {'trim': 0.0}
+
+    def update(sensor_lambda, rpm, load):
+        error = sensor_lambda - 1.0
+        if abs(error) > tolerance:
+            state['trim'] += step if error > 0 else -step
+        return state['trim']
+    return update
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    rpm, load = drive_cycle(TICKS, rng)
+    adaptive = AdaptiveLambdaController(instrumentation=NullInstrumentation())
+    results = {
+        'global bang-bang trim': run(bang_bang(), rpm, load, np.random.default_rng(1)),
+        'PI + RPM x load table': run(adaptive.update, rpm, load, np.random.default_rng(1)),
+    }
+    print(f"Mean |lambda - 1| per {WINDOW / 100:.0f} s window over a {TICKS / 100:.0f} s drive cycle")
+    print(f"{'controller':<24}" + ''.join(f"{f'{i * WINDOW // 100}s':>8}" for i in range(0, TICKS // WINDOW, 5)))
+    for name, errors in results.items():
+        windows = errors.reshape(-1, WINDOW).mean(axis=1)
+        print(f"{name:<24}" + ''.join(f"{value:>8.4f}" for value in windows[::5]))
+
+    print(f"\n{'long-term trim update':<24}{'samples':>10}{'updates/s':>14}")
+    for n in [10000, 100000, 1000000]:
+        points = np.column_stack([rng.uniform(500, 9000, n), rng.uniform(0, 1.2, n)])
+        corrections = rng.normal(0, 0.05, n)
+        table = LongTermTrimTable()
+        streamed = min(n, 20000)
+        start = time.perf_counter()
+        for point, correction in zip(points[:streamed].tolist(), corrections[:streamed].tolist()):
+            table.learn(point, correction)
+        streaming = streamed / (time.perf_counter() - start)
+        start = time.perf_counter()
+        LongTermTrimTable().update(points, corrections)
+        batched = n / (time.perf_counter() - start)
+        print(f"{'streaming':<24}{n:>10}{streaming:>14,.0f}")
+        print(f"{'batched':<24}{n:>10}{batched:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
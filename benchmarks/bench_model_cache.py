@@ -0,0 +1,58 @@
+"""
+Cold vs warm AITuner startup with the on-disk model cache, per model_type.
+
+Each measurement runs in a fresh interpreter: construct AITuner(cache=...) and score one sensor
+row. "cold" starts from an empty cache (build, compile, store); "warm" reuses the artifact.
+Dense-only models warm-start from the cached NumPy engine without importing TensorFlow.
+
+Usage: python benchmarks/bench_model_cache.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, REPO_ROOT)
+
+from src.ai_tuner import MODEL_BUILDERS
+
+SCRIPT = (
+    "import sys; sys.path.insert(0, {root!r}); "
+    "from src.ai_tuner import AITuner; from src.model_cache import ModelCache; "
+    "tuner = AITuner(input_dim=5, model_type={model_type!r}, cache=ModelCache({cache!r})); "
+    "tuner.predict_raw([[0.5, 0.3, 0.2, 0.1, 0.0]]); "
+    "print('tensorflow' in sys.modules)"
+)
+
+
+def _run(model_type: str, cache: str):
+    code = SCRIPT.format(root=REPO_ROOT, model_type=model_type, cache=cache)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return None, None
+    return elapsed, result.stdout.strip().splitlines()[-1] == 'True'
+
+
+def main() -> None:
+    print(f"{'model_type':<18}{'cold':>10}{'warm':>10}{'speedup':>10}{'TF on warm start':>19}")
+    for model_type in list(MODEL_BUILDERS) + ['autoencoder']:
+        cache = tempfile.mkdtemp()
+        try:
+            cold, _ = _run(model_type, cache)
+            if cold is None:
+                print(f"{model_type:<18}{'fails to build in this environment':>49}")
+                continue
+            warm, tf_loaded = _run(model_type, cache)
+            print(f"{model_type:<18}{cold:>8.2f} s{warm:>8.2f} s{cold / warm:>9.1f}x{'yes' if tf_loaded else 'no':>19}")
+        finally:
+            shutil.rmtree(cache)
+
+
+if __name__ == '__main__':
+    main()
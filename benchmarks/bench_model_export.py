@@ -0,0 +1,88 @@
+"""
+Latency, weight memory and cold import cost of the exported standalone NumPy modules
+(float32 and int8) against the Keras model and the in-process NumPy engine, per Dense model_type.
+Import time and peak RSS are measured in a fresh interpreter that loads the model and scores one row.
+
+Usage: python benchmarks/bench_model_export.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.inference_engine import QuantizedDenseInferenceEngine
+from src.model_export import export_tuner, load_exported
+
+MODEL_TYPES = ['default', 'automl', 'reinforcement', 'quantile']
+ROW = np.array([[0.5, 0.3, 0.2, 0.1, 0.0]], dtype=np.float32)
+COLD_START = (
+    "import time; start = time.perf_counter(); {load}; "
+    "predict([[0.5, 0.3, 0.2, 0.1, 0.0]]); "
+    "elapsed = time.perf_counter() - start; "
+    "print(elapsed, [line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM')][0])"
+)
+KERAS_LOAD = ("import numpy as np; import tensorflow as tf; "
+              "model = tf.keras.Sequential([tf.keras.Input((5,)), tf.keras.layers.Dense(16), "
+              "tf.keras.layers.Dense(8), tf.keras.layers.Dense(1)]); "
+              "predict = lambda x: model.predict(np.asarray(x), verbose=0)")
+
+
+def _per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def _cold_start(load, cwd):
+    result = subprocess.run([sys.executable, '-c', COLD_START.format(load=load)], cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    seconds, rss_kb = result.stdout.split()
+    return float(seconds), int(rss_kb) / 1024
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    batch = np.random.default_rng(0).uniform(-1, 1, size=(1024, 5)).astype(np.float32)
+    try:
+        print(f"{'model':<14}{'runtime':<16}{'1 row':>10}{'1024 rows':>12}{'weights':>10}{'max |err|':>11}")
+        for model_type in MODEL_TYPES:
+            tuner = AITuner(input_dim=5, model_type=model_type)
+            expected = tuner.model.predict(batch, verbose=0)
+            quantized = QuantizedDenseInferenceEngine.from_engine(tuner.engine)
+            runtimes = [
+                ('keras predict', lambda x: tuner.model.predict(x, verbose=0), None),
+                ('numpy float32', tuner.engine.predict, tuner.engine.nbytes),
+                ('numpy int8', quantized.predict, quantized.nbytes),
+            ]
+            for dtype in ('float32', 'int8'):
+                module = load_exported(export_tuner(tuner, os.path.join(directory, f'{model_type}_{dtype}.py'), dtype))
+                runtimes.append((f'export {dtype}', module.predict,
+                                 sum(a.nbytes for layer in module.LAYERS for a in layer[:3] if a is not None)))
+            for name, predict, nbytes in runtimes:
+                number = 20 if name == 'keras predict' else 2000
+                single = _per_call(lambda: predict(ROW), number)
+                batched = _per_call(lambda: predict(batch), max(number // 20, 5))
+                error = np.max(np.abs(predict(batch) - expected))
+                print(f"{model_type:<14}{name:<16}{single * 1e6:>7.1f} us{batched * 1e6:>9.1f} us"
+                      f"{(f'{nbytes} B' if nbytes else '-'):>10}{error:>11.2e}")
+
+        print()
+        print(f"{'cold start (default)':<30}{'import + 1 row':>16}{'peak RSS':>12}")
+        for name, load in [
+            ('tensorflow keras', KERAS_LOAD),
+            ('export float32', "from default_float32 import predict"),
+            ('export int8', "from default_int8 import predict"),
+        ]:
+            seconds, rss = _cold_start(load, directory)
+            print(f"{name:<30}{seconds * 1e3:>13.0f} ms{rss:>9.0f} MB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
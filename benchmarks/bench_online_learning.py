@@ -0,0 +1,60 @@
+"""
+Prediction latency of the control loop's AITuner while an OnlineTrainer runs mini-batch updates
+on its background thread, against the same predictions with training idle, plus the update and
+publish (weight swap) throughput reached meanwhile.
+
+Usage: python benchmarks/bench_online_learning.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.instrumentation import Instrumentation
+from src.online_learning import OnlineTrainer
+
+DURATION = 3.0  # Seconds of predictions per measurement.
+MODEL_TYPES = ['default', 'lstm']
+
+
+def _predict_for(tuner, rows, duration):
+    latencies = []
+    end = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        tuner.predict_adjustment(rows[i % len(rows)])
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    return np.array(latencies)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    rows = rng.uniform(-1, 1, size=(1024, 5)).astype(np.float32)
+    print(f"{'model':<10}{'training':>10}{'predictions/s':>15}{'p50':>11}{'p99':>11}"
+          f"{'updates/s':>11}{'publishes':>11}")
+    for model_type in MODEL_TYPES:
+        tuner = AITuner(input_dim=5, model_type=model_type)
+        trainer = OnlineTrainer(tuner, batch_size=32, publish_every=10, update_interval=0.0, seed=0,
+                                instrumentation=Instrumentation())
+        for row in rows:
+            trainer.record(row, 1.0 if row[0] > 0 else -1.0, rng.uniform(-1, 1))
+        for training in (False, True):
+            if training:
+                trainer.start()
+            updates = trainer.updates
+            latencies = _predict_for(tuner, rows, DURATION)
+            update_rate = (trainer.updates - updates) / DURATION
+            trainer.stop()
+            print(f"{model_type:<10}{'on' if training else 'off':>10}{len(latencies) / DURATION:>15,.0f}"
+                  f"{np.percentile(latencies, 50) * 1e6:>8.0f} us{np.percentile(latencies, 99) * 1e6:>8.0f} us"
+                  f"{update_rate:>11,.0f}{trainer.published:>11}")
+
+
+if __name__ == '__main__':
+    main()
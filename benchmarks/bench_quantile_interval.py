@@ -0,0 +1,50 @@
+"""
+Batched `predict_interval` + interval policy against the scalar path (one `predict_adjustment`
+call per sensor vector) for the 'quantile' model, with the NumPy engine and with Keras predict.
+
+Usage: python benchmarks/bench_quantile_interval.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner, directions_from_intervals
+
+BATCH_SIZES = [1, 16, 256, 4096]
+KERAS_SCALAR_ROWS = 32  # Keras predict costs tens of ms per call; the scalar path is timed on a prefix.
+
+
+def _timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rows = np.random.default_rng(0).uniform(-1, 1, size=(max(BATCH_SIZES), 5)).astype(np.float32)
+    print(f"{'engine':<8}{'rows':>6}{'scalar us/row':>15}{'batched us/row':>16}{'speedup':>10}")
+    for fast_inference in (True, False):
+        tuner = AITuner(input_dim=5, model_type='quantile', fast_inference=fast_inference)
+        engine = 'numpy' if fast_inference else 'keras'
+
+        def batched(batch):
+            lower, _, upper = tuner.predict_interval(batch)
+            return directions_from_intervals(lower, upper)
+
+        for n in BATCH_SIZES:
+            batch = rows[:n]
+            scalar_rows = batch if fast_inference else batch[:KERAS_SCALAR_ROWS]
+            scalar = _timed(lambda: [tuner.predict_adjustment(row) for row in scalar_rows]) / len(scalar_rows)
+            vectorized = _timed(lambda: batched(batch)) / n
+            print(f"{engine:<8}{n:>6}{scalar * 1e6:>15.1f}{vectorized * 1e6:>16.2f}{scalar / vectorized:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Replay throughput: ticks/s for one session in-process, and wall time for a batch of
+sessions sharded across a process pool.
+
+Usage: python benchmarks/bench_replay.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.replay import ReplayEngine, replay_sessions
+
+TICKS = 50000
+SESSIONS = 8
+
+
+def _session(rng, n):
+    base = np.array([0.5, 0.7, 0.2, 0.3, 0.4, 0.5, 90, 92, 88, 91, 1.0, 100.0])
+    return base + rng.normal(scale=0.05, size=(n, len(base))) * np.maximum(base, 1.0)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    engine = ReplayEngine({'fuel_map': 1.0, 'boost_map': 1.0}, AITuner(input_dim=5),
+                          part_status={'turbocharger': True})
+    telemetry = _session(rng, TICKS)
+    start = time.perf_counter()
+    engine.run(telemetry)
+    elapsed = time.perf_counter() - start
+    print(f"single session: {TICKS} ticks in {elapsed:.2f} s ({TICKS / elapsed:,.0f} ticks/s, "
+          f"{TICKS / 100 / elapsed:,.0f}x real time at 100 Hz)")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        paths = []
+        for i in range(SESSIONS):
+            path = os.path.join(workdir, f"session_{i}.npy")
+            np.save(path, _session(rng, TICKS))
+            paths.append(path)
+        for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            replay_sessions(engine, paths, processes=processes)
+            elapsed = time.perf_counter() - start
+            print(f"{SESSIONS} sessions, {processes} process(es): {elapsed:.2f} s "
+                  f"({SESSIONS * TICKS / elapsed:,.0f} ticks/s)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
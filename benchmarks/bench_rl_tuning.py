@@ -0,0 +1,53 @@
+"""
+Reinforcement-learning throughput in env-steps/s: stepping TuningEnvs alone as the number of
+vectorized environments grows, and full training iterations (batched rollouts plus the policy
+update) as the rollouts are shared by more worker processes.
+
+Usage: python benchmarks/bench_rl_tuning.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.instrumentation import Instrumentation
+from src.rl_tuning import PolicyGradientTrainer, TuningEnvs
+
+ENV_COUNTS = [1, 16, 256, 4096]
+STEPS = 200
+TRAIN_ENVS = 2048
+HORIZON = 64
+ITERATIONS = 5
+
+
+def main() -> None:
+    print(f"TuningEnvs.step, {STEPS} steps")
+    print(f"{'envs':>8}{'env-steps/s':>14}")
+    for num_envs in ENV_COUNTS:
+        envs = TuningEnvs(num_envs, seed=0)
+        actions = np.random.default_rng(0).integers(0, 3, size=(STEPS, num_envs))
+        start = time.perf_counter()
+        for step_actions in actions:
+            envs.step(step_actions)
+        print(f"{num_envs:>8}{num_envs * STEPS / (time.perf_counter() - start):>14,.0f}")
+
+    cores = os.cpu_count() or 1
+    print(f"\nPolicy-gradient training, {TRAIN_ENVS} envs x {HORIZON} steps per iteration, {cores} cores")
+    print(f"{'workers':>8}{'env-steps/s':>14}{'lambda error':>14}")
+    for workers in sorted({1, 2, cores} - {0}):
+        tuner = AITuner(input_dim=5, model_type='reinforcement')
+        trainer = PolicyGradientTrainer(tuner, num_envs=TRAIN_ENVS, horizon=HORIZON, workers=workers, seed=0,
+                                        instrumentation=Instrumentation())
+        trainer.train(1)  # Trace the update and start-up costs outside the timing.
+        start = time.perf_counter()
+        trainer.train(ITERATIONS)
+        rate = ITERATIONS * TRAIN_ENVS * HORIZON / (time.perf_counter() - start)
+        print(f"{workers:>8}{rate:>14,.0f}{trainer.evaluate(seed=1):>14.4f}")
+
+
+if __name__ == '__main__':
+    main()
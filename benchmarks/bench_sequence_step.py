@@ -0,0 +1,48 @@
+"""
+Per-tick latency of the windowed sequence models as the window grows: rerunning the whole window
+through the compiled model every tick (naive re-windowing) against the incremental step engines,
+which carry the LSTM state or the transformer key/value cache between ticks.
+
+Usage: python benchmarks/bench_sequence_step.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.sequence_inference import RewindowStepEngine
+
+MODEL_TYPES = ['lstm', 'hybrid_cnn_lstm', 'transformer']
+WINDOWS = [8, 32, 128, 512]
+TICKS = 200
+
+
+def _per_tick(engine, frames):
+    engine.reset()
+    for frame in frames[:10]:
+        engine.step(frame)
+    start = time.perf_counter()
+    for frame in frames:
+        engine.step(frame)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main() -> None:
+    frames = np.random.default_rng(0).normal(size=(TICKS, 5)).astype(np.float32)
+    print(f"Per-tick latency over {TICKS} ticks, one 5-sensor frame per tick")
+    print(f"{'model':>16}{'window':>8}{'re-window':>12}{'incremental':>13}{'speedup':>9}")
+    for model_type in MODEL_TYPES:
+        for window in WINDOWS:
+            tuner = AITuner(input_dim=5, model_type=model_type, hyperparameters={'window': window})
+            naive = _per_tick(RewindowStepEngine(tuner.predict_raw, window, 5), frames)
+            incremental = _per_tick(tuner.sequence_engine(), frames)
+            print(f"{model_type:>16}{window:>8}{naive * 1e6:>9.0f} us{incremental * 1e6:>10.1f} us"
+                  f"{naive / incremental:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
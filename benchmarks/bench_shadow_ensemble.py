@@ -0,0 +1,57 @@
+"""
+Shadow evaluation overhead: per-call latency of the primary AITuner alone vs wrapped in a ShadowEnsemble
+with shadow models scoring the same stream in a thread or process pool, plus each shadow's
+batched latency, agreement with the primary and dropped rows.
+
+Usage: python benchmarks/bench_shadow_ensemble.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ai_tuner import AITuner
+from src.instrumentation import Instrumentation
+from src.shadow_ensemble import ShadowEnsemble
+
+ROWS = 5000
+SHADOWS = ['quantile', 'reinforcement', 'automl']
+
+
+def per_call_latency(predict, rows):
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict(row)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label:<28} p50 {np.percentile(latencies, 50) * 1e6:8.1f} us   "
+          f"p99 {np.percentile(latencies, 99) * 1e6:8.1f} us")
+
+
+def main():
+    rows = np.random.default_rng(0).normal(size=(ROWS, 5)).astype(np.float32)
+    primary = AITuner(input_dim=5, model_type='default')
+    shadows = {name: AITuner(input_dim=5, model_type=name) for name in SHADOWS}
+    primary.predict_adjustment(rows[0])
+    report("primary alone", per_call_latency(primary.predict_adjustment, rows))
+    for executor in ('thread', 'process'):
+        ensemble = ShadowEnsemble(primary, shadows, executor=executor, instrumentation=Instrumentation())
+        report(f"primary + shadows ({executor})", per_call_latency(ensemble.predict_adjustment, rows))
+        ensemble.shutdown()
+        stats = ensemble.stats()
+        print(f"  dropped rows: {stats['primary']['dropped_rows']}")
+        for name in SHADOWS:
+            entry = stats[name]
+            print(f"  {name:<14} rows {entry['rows']:6d}   agreement {entry['agreement']:.3f}   "
+                  f"batch p50 {entry['latency_p50'] * 1e6:8.1f} us   p99 {entry['latency_p99'] * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Measure process startup time and peak RSS for each control-loop mode.
+
+Each mode runs in a fresh interpreter inside a scratch directory (main() rewrites
+configs/base_map.yaml relative to the working directory).
+
+Usage: python benchmarks/bench_startup.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(REPO_ROOT, 'src')
+
+MODES = {
+    "controllers only": (
+        "import tuning, detuner, aero_controller, lamda_controller, base_map"
+    ),
+    "import ai_tuner (lazy)": "import ai_tuner",
+    "main --no-ai, 10 ms run": "import main; main.main(['--no-ai', '--duration', '0.01'])",
+    "main with AI, 10 ms run": "import main; main.main(['--duration', '0.01'])",
+}
+
+
+def _run(code: str, workdir: str):
+    script = f"import sys; sys.path.insert(0, {SRC!r}); {code}"
+    start = time.perf_counter()
+    pid = subprocess.Popen(
+        [sys.executable, '-c', script], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ).pid
+    _, status, usage = os.wait4(pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        raise RuntimeError(f"Mode failed with status {status}: {code}")
+    # ru_maxrss is reported in kilobytes on Linux.
+    return elapsed, usage.ru_maxrss / 1024.0
+
+
+def main() -> None:
+    workdir = tempfile.mkdtemp()
+    try:
+        shutil.copytree(os.path.join(REPO_ROOT, 'configs'), os.path.join(workdir, 'configs'))
+        print(f"{'mode':<26}{'wall time':>12}{'peak RSS':>14}")
+        for name, code in MODES.items():
+            elapsed, rss_mb = _run(code, workdir)
+            print(f"{name:<26}{elapsed:>10.3f} s{rss_mb:>11.1f} MB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
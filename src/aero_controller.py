@@ -1,12 +1,26 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import logging
 
+import numpy as np
+
+try:
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from instrumentation import Instrumentation, default_instrumentation
+
 logger = logging.getLogger(__name__)
 
 class AeroController:
-    def __init__(self) -> None:
+    def __init__(self, instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param instrumentation: Receives each update's latency and outcome; defaults to the
+                                process-wide instrumentation.
+        """
         self.drs_active = False
         self.brake_stability_active = False
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._drs_stage = self.instrumentation.stage('aero.update_drs')
+        self._brake_stage = self.instrumentation.stage('aero.update_braking_stability')
 
     def update_drs(self, vehicle_speed: float, lap_time: float, race_mode: bool = True) -> bool:
         """
@@ -16,11 +30,14 @@ class AeroController:
         :param race_mode: Flag indicating if race mode is active.
         :return: DRS state.
         """
+        start = self.instrumentation.clock()
         if race_mode and vehicle_speed > 80:
             self.drs_active = True
         else:
             self.drs_active = False
-        logger.info(f"DRS state updated: {self.drs_active}")
+        self.instrumentation.record(self._drs_stage, start, self.drs_active)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"DRS state updated: {self.drs_active}")
         return self.drs_active
 
     def update_braking_stability(self, wheel_speeds: List[float]) -> Dict[str, float]:
@@ -29,16 +46,88 @@ class AeroController:
         :param wheel_speeds: List of wheel speeds [FL, FR, RL, RR].
         :return: Dictionary with braking adjustments.
         """
+        start = self.instrumentation.clock()
         avg_speed = sum(wheel_speeds) / len(wheel_speeds)
         adjustments = {}
         for idx, speed in enumerate(wheel_speeds):
             adjustments[f'wheel_{idx+1}'] = max(0.0, 1 - abs(speed - avg_speed) / avg_speed)
         self.brake_stability_active = any(val < 0.9 for val in adjustments.values())
-        logger.info(f"Brake stability adjustments computed: {adjustments}")
+        self.instrumentation.record(self._brake_stage, start, self.brake_stability_active)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Brake stability adjustments computed: {adjustments}")
         return adjustments
 
+    def update_braking_stability_array(self, wheel_speeds: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Array variant of update_braking_stability for streaming input: the per-wheel adjustments
+        are written into `out` (same wheel order) instead of a new dictionary.
+        :param wheel_speeds: Array of wheel speeds [FL, FR, RL, RR].
+        :param out: Optional preallocated output array of the same length.
+        :return: Array with braking adjustments.
+        """
+        start = self.instrumentation.clock()
+        avg_speed = wheel_speeds.sum() / len(wheel_speeds)
+        out = np.subtract(wheel_speeds, avg_speed, out=out)
+        np.abs(out, out=out)
+        np.divide(out, avg_speed, out=out)
+        np.subtract(1, out, out=out)
+        np.maximum(out, 0.0, out=out)
+        self.brake_stability_active = bool((out < 0.9).any())
+        self.instrumentation.record(self._brake_stage, start, self.brake_stability_active)
+        return out
+
     def get_aero_status(self) -> Dict[str, bool]:
         return {
             "DRS": self.drs_active,
             "BrakeStability": self.brake_stability_active
         }
+
+
+class AeroFleetController:
+    """
+    Array-based AeroController for N cars (or N replayed sessions) at once.
+    Every method matches the scalar AeroController element for element.
+    """
+
+    def __init__(self, num_cars: int) -> None:
+        self.num_cars = num_cars
+        self.drs_active = np.zeros(num_cars, dtype=bool)
+        self.brake_stability_active = np.zeros(num_cars, dtype=bool)
+
+    def update_drs(self, vehicle_speed: np.ndarray, lap_time: np.ndarray,
+                   race_mode: Union[bool, np.ndarray] = True) -> np.ndarray:
+        """
+        :param vehicle_speed: Array of shape (N,) with each car's speed.
+        :param lap_time: Array of shape (N,) with each car's current lap time.
+        :param race_mode: Flag, or array of shape (N,), indicating if race mode is active.
+        :return: DRS states, shape (N,).
+        """
+        np.logical_and(race_mode, np.asarray(vehicle_speed) > 80, out=self.drs_active)
+        return self.drs_active
+
+    def update_braking_stability(self, wheel_speeds: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        :param wheel_speeds: Array of shape (N, 4) with wheel speeds [FL, FR, RL, RR] per car.
+        :param out: Optional preallocated (N, 4) output array.
+        :return: Braking adjustments, shape (N, 4).
+        """
+        wheel_speeds = np.asarray(wheel_speeds, dtype=np.float64)
+        # Accumulate wheel by wheel so the average rounds exactly like the scalar sum().
+        avg_speed = wheel_speeds[:, 0].copy()
+        for idx in range(1, wheel_speeds.shape[1]):
+            avg_speed += wheel_speeds[:, idx]
+        avg_speed /= wheel_speeds.shape[1]
+        avg_speed = avg_speed[:, None]
+        out = np.subtract(wheel_speeds, avg_speed, out=out)
+        np.abs(out, out=out)
+        np.divide(out, avg_speed, out=out)
+        np.subtract(1, out, out=out)
+        np.maximum(out, 0.0, out=out)
+        np.any(out < 0.9, axis=1, out=self.brake_stability_active)
+        return out
+
+    def get_aero_status(self) -> Dict[str, np.ndarray]:
+        return {
+            "DRS": self.drs_active,
+            "BrakeStability": self.brake_stability_active
+        }
@@ -1,26 +1,194 @@
-import tensorflow as tf
+import hashlib
+import importlib
+import inspect
+import json
+import sys
 import numpy as np
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 import logging
 
-# Additional dependencies for advanced features.
-import tensorflow_probability as tfp
-try:
-    import keras_tuner as kt
-except ImportError:
-    kt = None
-try:
-    from spektral.layers import GCNConv
-except ImportError:
-    GCNConv = None
+if TYPE_CHECKING:
+    import tensorflow as tf
 
-from tensorflow.keras.layers import MultiHeadAttention, LayerNormalization, Dense, Input
+try:
+    from .inference_engine import BayesianInferenceEngine, DenseInferenceEngine, build_inference_engine
+    from .model_cache import ModelCache
+    from .sensor_graph import DEFAULT_SENSOR_GRAPH, SensorGraph
+    from .sequence_inference import RewindowStepEngine, build_step_engine
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import BayesianInferenceEngine, DenseInferenceEngine, build_inference_engine
+    from model_cache import ModelCache
+    from sensor_graph import DEFAULT_SENSOR_GRAPH, SensorGraph
+    from sequence_inference import RewindowStepEngine, build_step_engine
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Predictions beyond +/- this threshold are turned into a tuning direction.
+ADJUSTMENT_THRESHOLD = 0.1
+
+# Network used by build_automl_model until an AutoML search has chosen better values (see automl.py).
+AUTOML_DEFAULTS: Dict[str, Any] = {'depth': 1, 'units': 32, 'activation': 'relu', 'learning_rate': 1e-3}
+
+# Quantile levels predicted by build_quantile_model unless hyperparameters={'quantiles': [...]} is given.
+QUANTILE_DEFAULTS: Dict[str, Any] = {'quantiles': (0.1, 0.5, 0.9)}
+
+# Monte-Carlo samples per prediction of the 'bayesian' model, and the share of samples that must
+# agree with the mean's direction before it adjusts.
+MC_SAMPLES = 32
+MIN_CONFIDENCE = 0.8
+
+# Tuning direction of each action of the 'reinforcement' policy: increase, decrease, maintain.
+POLICY_DIRECTIONS = np.array([1, -1, 0], dtype=np.int64)
+
+# Model types that accept hyperparameters={'window': T}: they then score the last T sensor frames
+# (see `predict_step`) instead of treating a single snapshot as a sequence.
+SEQUENCE_MODELS = ('lstm', 'hybrid_cnn_lstm', 'transformer')
+
+# Registry of model_type -> builder method. Builders import their heavy dependencies
+# (TensorFlow, TensorFlow Probability, Keras Tuner) only when first called,
+# so importing this module stays cheap.
+MODEL_BUILDERS: Dict[str, str] = {
+    'default': 'build_default_model',
+    'lstm': 'build_lstm_model',
+    'attention': 'build_attention_model',
+    'bayesian': 'build_bayesian_model',
+    'hybrid_cnn_lstm': 'build_hybrid_cnn_lstm_model',
+    'reinforcement': 'build_reinforcement_policy',
+    'automl': 'build_automl_model',
+    'transformer': 'build_transformer_model',
+    'quantile': 'build_quantile_model',
+    'graph': 'build_graph_model',
+}
+
+
+def _tensorflow() -> Any:
+    """Import TensorFlow on first use."""
+    return importlib.import_module('tensorflow')
+
+
+def _tensorflow_probability() -> Any:
+    """Import TensorFlow Probability on first use."""
+    return importlib.import_module('tensorflow_probability')
+
+
+def _tf_keras() -> Any:
+    """Import Keras 2 (tf_keras), which TensorFlow Probability layers are built on, on first use."""
+    return importlib.import_module('tf_keras')
+
+
+def _builder_source(builder: Callable[..., Any], namespaces: Sequence[Any]) -> bytes:
+    """
+    Source code of a model builder and of every helper it calls (found by name in `namespaces`,
+    including calls from nested functions), so editing a shared helper also changes the hash.
+    """
+    sources = []
+    seen = set()
+    functions = [builder]
+    while functions:
+        function = functions.pop()
+        if function.__code__ in seen:
+            continue
+        seen.add(function.__code__)
+        try:
+            sources.append(inspect.getsource(function).encode('utf-8'))
+        except OSError:  # Source unavailable (e.g. frozen build).
+            sources.append(function.__code__.co_code)
+        codes = [function.__code__]
+        while codes:
+            code = codes.pop()
+            codes.extend(const for const in code.co_consts if inspect.iscode(const))
+            for name in code.co_names:
+                for namespace in namespaces:
+                    helper = getattr(namespace, name, None)
+                    if inspect.isfunction(helper):
+                        functions.append(helper)
+    return b''.join(sources)
+
+
+def _mean_field_posterior(kernel_size: int, bias_size: int = 0, dtype: Any = None) -> Any:
+    """
+    Trainable independent-Normal posterior over a DenseVariational layer's kernel and bias.
+    Means start from small random values and scales around 0.01, so training starts from a
+    nearly deterministic network rather than from noise.
+    """
+    tf = _tensorflow()
+    tfp = _tensorflow_probability()
+    keras = _tf_keras()
+    n = kernel_size + bias_size
+    scale_offset = np.log(np.expm1(1.0))
+    return keras.Sequential([
+        tfp.layers.VariableLayer(2 * n, dtype=dtype, initializer=keras.initializers.RandomNormal(stddev=0.3)),
+        tfp.layers.DistributionLambda(lambda t: tfp.distributions.Independent(
+            tfp.distributions.Normal(loc=t[..., :n], scale=1e-5 + 0.01 * tf.nn.softplus(scale_offset + t[..., n:])),
+            reinterpreted_batch_ndims=1)),
+    ])
+
+
+def _trainable_prior(kernel_size: int, bias_size: int = 0, dtype: Any = None) -> Any:
+    """Unit-scale Normal prior with a trainable mean for a DenseVariational layer."""
+    tfp = _tensorflow_probability()
+    n = kernel_size + bias_size
+    return _tf_keras().Sequential([
+        tfp.layers.VariableLayer(n, dtype=dtype),
+        tfp.layers.DistributionLambda(lambda t: tfp.distributions.Independent(
+            tfp.distributions.Normal(loc=t, scale=1.0), reinterpreted_batch_ndims=1)),
+    ])
+
+
+def _optional_import(name: str) -> Any:
+    """Import an optional dependency on first use, returning None if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def pinball_loss(quantiles: Sequence[float]) -> Callable[[Any, Any], Any]:
+    """
+    Vectorized pinball (quantile) loss for a model with one output per quantile level.
+    :param quantiles: Quantile levels in (0, 1), in the order of the model's outputs.
+    :return: Keras loss comparing targets of shape (n, 1) with predictions of shape (n, len(quantiles)).
+    """
+    tf = _tensorflow()
+    levels = tf.constant(list(quantiles), dtype=tf.float32)
+
+    def loss(y_true, y_pred):
+        error = tf.reshape(tf.cast(y_true, y_pred.dtype), (-1, 1)) - y_pred
+        return tf.reduce_mean(tf.maximum(levels * error, (levels - 1.0) * error), axis=-1)
+    return loss
+
+def directions_from_predictions(predictions: np.ndarray) -> np.ndarray:
+    """Map raw scalar predictions to tuning directions (+1, -1 or 0) using ADJUSTMENT_THRESHOLD."""
+    directions = np.zeros(np.shape(predictions), dtype=np.int64)
+    directions[predictions > ADJUSTMENT_THRESHOLD] = 1
+    directions[predictions < -ADJUSTMENT_THRESHOLD] = -1
+    return directions
+
+def directions_from_policy(probabilities: np.ndarray) -> np.ndarray:
+    """Greedy tuning directions from 'reinforcement' action probabilities of shape (n, 3)."""
+    return POLICY_DIRECTIONS[np.argmax(np.asarray(probabilities).reshape(-1, len(POLICY_DIRECTIONS)), axis=1)]
+
+def interval_from_quantiles(outputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lower, median and upper predictions from quantile outputs of shape (n, k), k >= 2, ordered by
+    quantile level. Outputs are sorted per row first, so crossing quantile heads stay a valid interval.
+    """
+    outputs = np.sort(np.asarray(outputs).reshape(len(outputs), -1), axis=1)
+    return outputs[:, 0], outputs[:, outputs.shape[1] // 2], outputs[:, -1]
+
+def directions_from_intervals(lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Tuning directions that only move when the whole predicted interval clears ADJUSTMENT_THRESHOLD:
+    +1 if lower > threshold, -1 if upper < -threshold, else 0.
+    """
+    directions = np.zeros(np.shape(lower), dtype=np.int64)
+    directions[lower > ADJUSTMENT_THRESHOLD] = 1
+    directions[upper < -ADJUSTMENT_THRESHOLD] = -1
+    return directions
+
 class AITuner:
-    def __init__(self, input_dim: int = 5, model_type: str = 'default') -> None:
+    def __init__(self, input_dim: int = 5, model_type: str = 'default', fast_inference: bool = True,
+                 cache: Optional[ModelCache] = None, hyperparameters: Optional[Dict[str, Any]] = None) -> None:
         """
         Initialize the AI Tuner with the specified input dimension and model type.
         
@@ -38,10 +206,47 @@ class AITuner:
             'autoencoder'       : Autoencoder for anomaly detection.
         
         When model_type is 'default', the behavior replicates the original implementation.
+
+        With fast_inference enabled, predictions bypass `Model.predict` and run through a NumPy
+        or tf.function engine (see inference_engine.py); Keras predict is used as a fallback.
+
+        With a ModelCache, a cached artifact for this model_type, input_dim and builder is loaded
+        instead of a fresh initialisation (and stored on a miss). Dense-only models then predict
+        through the cached NumPy engine and the Keras model is only rebuilt when first accessed.
+
+        `hyperparameters` configure builders that accept them, e.g. the values chosen by an
+        AutoML search for 'automl' (see automl.py), the quantile levels of 'quantile' or the
+        sensor topology config of 'graph' (see sensor_graph.py).
+
+        With hyperparameters={'window': T}, the SEQUENCE_MODELS take the last T sensor frames,
+        flattened oldest first, instead of one snapshot. `predict_step` feeds them one frame per
+        tick and carries the LSTM state or the transformer key/value cache between ticks.
+
+        The 'quantile' model predicts an interval (see `predict_interval`) and only adjusts when
+        the whole interval clears the adjustment threshold. The 'bayesian' model scores MC_SAMPLES
+        posterior samples per prediction (see `predict_uncertainty`) and only adjusts when at least
+        MIN_CONFIDENCE of them agree with the direction of their mean.
         """
         self.input_dim = input_dim
         self.model_type = model_type
-        self.model = self.build_model(input_dim)
+        self.hyperparameters = dict(hyperparameters) if hyperparameters else None
+        self.cache = cache
+        if self.window is not None and (model_type not in SEQUENCE_MODELS or self.window < 1):
+            raise ValueError(f"A sequence window needs a positive length and one of {list(SEQUENCE_MODELS)}, "
+                             f"got window={self.window} for '{model_type}'.")
+        self._sensor_graph: Optional[SensorGraph] = None
+        self._model: Optional['tf.keras.Model'] = None
+        self._artifact = cache.load(model_type, input_dim, self.architecture_hash()) if cache is not None else None
+        self.engine = None
+        self._sampler: Optional[BayesianInferenceEngine] = None
+        self._stepper: Optional[Any] = None
+        if fast_inference and self._artifact is not None:
+            self.engine = self._artifact.load_engine()
+        if self.engine is None:
+            model = self.model
+            self.engine = build_inference_engine(model, self.model_input_dim) if fast_inference else None
+        if cache is not None and self._artifact is None:
+            self.save_to_cache()
         
         # Initialize an autoencoder if specified.
         if model_type == 'autoencoder':
@@ -49,33 +254,87 @@ class AITuner:
         else:
             self.autoencoder = None
 
-    def build_model(self, input_dim: int) -> tf.keras.Model:
+    @property
+    def model(self) -> 'tf.keras.Model':
+        """The Keras model, built (and restored from the cache) on first access."""
+        if self._model is None:
+            self._model = self.build_model(self.input_dim)
+            if self._artifact is not None:
+                self._artifact.load_weights(self._model)
+        return self._model
+
+    @model.setter
+    def model(self, model: 'tf.keras.Model') -> None:
+        self._model = model
+
+    def architecture_hash(self) -> str:
+        """
+        Digest of the builder's source code and of the helpers it calls, so editing a builder or a
+        shared helper (e.g. _sequence_input) invalidates its cached artifacts.
+        """
+        builder = getattr(type(self), MODEL_BUILDERS.get(self.model_type, 'build_default_model'))
+        source = _builder_source(builder, [type(self), SensorGraph, sys.modules[__name__]])
+        if self.hyperparameters:
+            source += json.dumps(self.hyperparameters, sort_keys=True).encode('utf-8')
+        if self.model_type == 'graph':
+            source += self.sensor_graph().fingerprint().encode('utf-8')
+        return hashlib.sha256(source).hexdigest()
+
+    @property
+    def window(self) -> Optional[int]:
+        """Sensor frames per input of a windowed sequence model, None in snapshot mode."""
+        return (self.hyperparameters or {}).get('window')
+
+    @property
+    def model_input_dim(self) -> int:
+        """Width of the model's flat input: one frame, or `window` frames in windowed mode."""
+        return self.input_dim * (self.window or 1)
+
+    @property
+    def quantiles(self) -> Tuple[float, ...]:
+        """Sorted quantile levels of the 'quantile' model."""
+        quantiles = tuple(sorted(dict(QUANTILE_DEFAULTS, **(self.hyperparameters or {}))['quantiles']))
+        if len(quantiles) < 2 or not all(0.0 < q < 1.0 for q in quantiles):
+            raise ValueError(f"Expected at least two quantile levels in (0, 1), got {quantiles}.")
+        return quantiles
+
+    def sensor_graph(self) -> SensorGraph:
+        """Sensor topology of the 'graph' model, loaded once from its config."""
+        if self._sensor_graph is None:
+            path = (self.hyperparameters or {}).get('sensor_graph', DEFAULT_SENSOR_GRAPH)
+            self._sensor_graph = SensorGraph.load(path)
+        return self._sensor_graph
+
+    def save_to_cache(self) -> None:
+        """Store the current (e.g. freshly trained) weights in the model cache."""
+        if self.cache is None:
+            raise ValueError("AITuner was created without a model cache.")
+        if self._model is None and self._artifact is not None:
+            return  # The model was never rebuilt, so the cached weights are still current.
+        self.refresh_inference_engine()
+        engine = self.engine if isinstance(self.engine, DenseInferenceEngine) else None
+        variant = json.dumps(self.hyperparameters or {}, sort_keys=True)
+        self._artifact = self.cache.store(self.model_type, self.input_dim, self.architecture_hash(), self.model, engine,
+                                          variant=variant)
+
+    def _sequence_input(self, input_dim: int) -> List[Any]:
+        """Leading layers of the recurrent builders: (window, input_dim) frames or a snapshot as a sequence."""
+        tf = _tensorflow()
+        if self.window is None:
+            return [tf.keras.layers.Reshape((input_dim, 1), input_shape=(input_dim,))]
+        return [tf.keras.layers.Input(shape=(self.window * input_dim,)),
+                tf.keras.layers.Reshape((self.window, input_dim))]
+
+    def build_model(self, input_dim: int) -> 'tf.keras.Model':
         """Select and build the model based on the provided model_type."""
-        if self.model_type == 'lstm':
-            return self.build_lstm_model(input_dim)
-        elif self.model_type == 'attention':
-            return self.build_attention_model(input_dim)
-        elif self.model_type == 'bayesian':
-            return self.build_bayesian_model(input_dim)
-        elif self.model_type == 'hybrid_cnn_lstm':
-            return self.build_hybrid_cnn_lstm_model(input_dim)
-        elif self.model_type == 'reinforcement':
-            return self.build_reinforcement_policy(input_dim)
-        elif self.model_type == 'automl':
-            return self.build_automl_model(input_dim)
-        elif self.model_type == 'transformer':
-            return self.build_transformer_model(input_dim)
-        elif self.model_type == 'quantile':
-            return self.build_quantile_model(input_dim)
-        elif self.model_type == 'graph':
-            return self.build_graph_model(input_dim)
-        else:
-            return self.build_default_model(input_dim)
+        builder = getattr(self, MODEL_BUILDERS.get(self.model_type, 'build_default_model'))
+        return builder(input_dim)
 
-    def build_default_model(self, input_dim: int) -> tf.keras.Model:
+    def build_default_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Default model replicating the original simple feedforward neural network.
         """
+        tf = _tensorflow()
         model = tf.keras.Sequential([
             tf.keras.layers.Dense(16, activation='relu', input_shape=(input_dim,)),
             tf.keras.layers.Dense(8, activation='relu'),
@@ -85,12 +344,13 @@ class AITuner:
         logger.info("Default AI Tuner model built successfully.")
         return model
 
-    def build_lstm_model(self, input_dim: int) -> tf.keras.Model:
+    def build_lstm_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         LSTM/GRU Network for handling sequential sensor data.
+        Runs over the sensor window in windowed mode, else over the features of one snapshot.
         """
-        model = tf.keras.Sequential([
-            tf.keras.layers.Reshape((input_dim, 1), input_shape=(input_dim,)),
+        tf = _tensorflow()
+        model = tf.keras.Sequential(self._sequence_input(input_dim) + [
             tf.keras.layers.LSTM(32),
             tf.keras.layers.Dense(1, activation='tanh')
         ], name="AITuner_LSTM_Model")
@@ -98,38 +358,47 @@ class AITuner:
         logger.info("LSTM model built successfully.")
         return model
 
-    def build_attention_model(self, input_dim: int) -> tf.keras.Model:
+    def build_attention_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Attention Mechanism to emphasize critical sensor readings.
         """
-        inputs = Input(shape=(input_dim,))
-        x = MultiHeadAttention(num_heads=2, key_dim=2)(inputs, inputs)
-        x = LayerNormalization()(x)
-        outputs = Dense(1, activation='tanh')(x)
+        tf = _tensorflow()
+        inputs = tf.keras.layers.Input(shape=(input_dim,))
+        x = tf.keras.layers.MultiHeadAttention(num_heads=2, key_dim=2)(inputs, inputs)
+        x = tf.keras.layers.LayerNormalization()(x)
+        outputs = tf.keras.layers.Dense(1, activation='tanh')(x)
         model = tf.keras.Model(inputs=inputs, outputs=outputs, name="AITuner_Attention_Model")
         model.compile(optimizer='adam', loss='mse')
         logger.info("Attention model built successfully.")
         return model
 
-    def build_bayesian_model(self, input_dim: int) -> tf.keras.Model:
+    def build_bayesian_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Bayesian Neural Network for uncertainty estimation.
+        Mean-field variational layers; TensorFlow Probability layers need Keras 2 (tf_keras).
+        The KL term is weighted for a training set of about 1000 samples.
         """
-        model = tf.keras.Sequential([
-            tfp.layers.DenseVariational(16, activation='relu', input_shape=(input_dim,)),
-            tfp.layers.DenseVariational(8, activation='relu'),
-            tfp.layers.DenseVariational(1, activation='tanh')
+        tfp = _tensorflow_probability()
+        keras = _tf_keras()
+        def variational(units, activation, **kwargs):
+            return tfp.layers.DenseVariational(units, _mean_field_posterior, _trainable_prior, kl_weight=1e-3,
+                                               activation=activation, **kwargs)
+        model = keras.Sequential([
+            variational(16, 'relu', input_shape=(input_dim,)),
+            variational(8, 'relu'),
+            variational(1, 'tanh')
         ], name="AITuner_Bayesian_Model")
         model.compile(optimizer='adam', loss='mse')
         logger.info("Bayesian model built successfully.")
         return model
 
-    def build_hybrid_cnn_lstm_model(self, input_dim: int) -> tf.keras.Model:
+    def build_hybrid_cnn_lstm_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Hybrid CNN-LSTM to capture both spatial and temporal features.
+        In windowed mode the convolution runs over time, three frames at a time.
         """
-        model = tf.keras.Sequential([
-            tf.keras.layers.Reshape((input_dim, 1), input_shape=(input_dim,)),
+        tf = _tensorflow()
+        model = tf.keras.Sequential(self._sequence_input(input_dim) + [
             tf.keras.layers.Conv1D(16, 3, activation='relu'),
             tf.keras.layers.LSTM(16),
             tf.keras.layers.Dense(1, activation='tanh')
@@ -138,11 +407,12 @@ class AITuner:
         logger.info("Hybrid CNN-LSTM model built successfully.")
         return model
 
-    def build_reinforcement_policy(self, input_dim: int) -> tf.keras.Model:
+    def build_reinforcement_policy(self, input_dim: int) -> 'tf.keras.Model':
         """
         Reinforcement Learning approach to dynamically adapt tuning policies.
         This snippet defines a simple policy network.
         """
+        tf = _tensorflow()
         policy_net = tf.keras.Sequential([
             tf.keras.layers.Dense(32, activation='relu', input_shape=(input_dim,)),
             tf.keras.layers.Dense(3, activation='softmax')  # Actions: increase, decrease, maintain
@@ -151,81 +421,208 @@ class AITuner:
         logger.info("Reinforcement policy network built successfully.")
         return policy_net
 
-    def build_automl_model(self, input_dim: int) -> tf.keras.Model:
+    def build_automl_model(self, input_dim: int) -> 'tf.keras.Model':
         """
-        Hyperparameter Optimization using Keras Tuner.
-        If used with a tuner, `hp` will be provided; otherwise, defaults are used.
+        Feedforward network whose depth, width, activation and learning rate are chosen by a
+        Keras Tuner search (see automl.py). Without search results AUTOML_DEFAULTS are used.
         """
-        units = 32
-        if kt is not None:
-            # Placeholder for tuner integration; default units are used in this standalone build.
-            units = 32
-        model = tf.keras.Sequential([
-            tf.keras.layers.Dense(units, activation='relu', input_shape=(input_dim,)),
+        tf = _tensorflow()
+        hp = dict(AUTOML_DEFAULTS, **(self.hyperparameters or {}))
+        hidden = [tf.keras.layers.Dense(hp['units'], activation=hp['activation'], input_shape=(input_dim,))]
+        hidden += [tf.keras.layers.Dense(hp['units'], activation=hp['activation']) for _ in range(hp['depth'] - 1)]
+        model = tf.keras.Sequential(hidden + [
             tf.keras.layers.Dense(1, activation='tanh')
         ], name="AITuner_AutoML_Model")
-        model.compile(optimizer='adam', loss='mse')
+        model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=hp['learning_rate']), loss='mse')
         logger.info("AutoML model built successfully.")
         return model
 
-    def build_transformer_model(self, input_dim: int) -> tf.keras.Model:
+    def build_transformer_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Transformer Architecture to capture long-range dependencies.
+        In windowed mode the newest frame attends over the embedded window (no positional encoding,
+        so the key/value cache of TransformerStepEngine can be a ring), followed by a residual
+        LayerNormalization and the output head.
         """
-        inputs = Input(shape=(input_dim,))
-        x = Dense(32)(inputs)
-        x = MultiHeadAttention(num_heads=4, key_dim=8)(x, x)
-        outputs = Dense(1, activation='tanh')(x)
+        tf = _tensorflow()
+        if self.window is not None:
+            window = self.window
+            inputs = tf.keras.layers.Input(shape=(window * input_dim,))
+            frames = tf.keras.layers.Dense(32)(tf.keras.layers.Reshape((window, input_dim))(inputs))
+            newest = tf.keras.layers.Cropping1D((window - 1, 0))(frames)
+            attended = tf.keras.layers.MultiHeadAttention(num_heads=4, key_dim=8)(newest, frames)
+            x = tf.keras.layers.LayerNormalization()(tf.keras.layers.Add()([newest, attended]))
+            outputs = tf.keras.layers.Dense(1, activation='tanh')(tf.keras.layers.Flatten()(x))
+            model = tf.keras.Model(inputs=inputs, outputs=outputs, name="AITuner_Transformer_Model")
+            model.compile(optimizer='adam', loss='mse')
+            logger.info("Windowed transformer model built successfully.")
+            return model
+        inputs = tf.keras.layers.Input(shape=(input_dim,))
+        x = tf.keras.layers.Dense(32)(inputs)
+        x = tf.keras.layers.MultiHeadAttention(num_heads=4, key_dim=8)(x, x)
+        outputs = tf.keras.layers.Dense(1, activation='tanh')(x)
         model = tf.keras.Model(inputs=inputs, outputs=outputs, name="AITuner_Transformer_Model")
         model.compile(optimizer='adam', loss='mse')
         logger.info("Transformer model built successfully.")
         return model
 
-    def build_quantile_model(self, input_dim: int) -> tf.keras.Model:
+    def build_quantile_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Quantile Regression to predict a range of values (e.g., adjustment magnitude).
+        One linear output per quantile level, trained with the pinball loss.
         """
-        def quantile_loss(y_true, y_pred):
-            # Placeholder quantile loss; refine this function as needed.
-            return tf.reduce_mean(tf.abs(y_true - y_pred))
+        tf = _tensorflow()
+        quantiles = self.quantiles
         model = tf.keras.Sequential([
             tf.keras.layers.Dense(16, activation='relu', input_shape=(input_dim,)),
-            tf.keras.layers.Dense(3)  # Predicting 3 quantiles (e.g., 10th, 50th, 90th percentiles)
+            tf.keras.layers.Dense(len(quantiles))  # One output per quantile (e.g., 10th, 50th, 90th percentiles)
         ], name="AITuner_Quantile_Model")
-        model.compile(optimizer='adam', loss=quantile_loss)
+        model.compile(optimizer='adam', loss=pinball_loss(quantiles))
         logger.info("Quantile model built successfully.")
         return model
 
-    def build_graph_model(self, input_dim: int) -> tf.keras.Model:
+    def build_graph_model(self, input_dim: int) -> 'tf.keras.Model':
         """
         Graph Neural Network to model sensor relationships when sensor data is represented as a graph.
+        Two GCN layers (H' = relu(A_hat H W)) over the sensor topology, mean-pooled over the sensors.
+        The flat input holds `input_dim / nodes` features per sensor node, node by node; the
+        normalized adjacency is a constant of the model, so one call scores a whole batch of time steps.
         """
-        if GCNConv is None:
-            raise ImportError("Spektral must be installed to use the graph model.")
-        inputs = Input(shape=(input_dim,))
-        adj = Input(shape=(None,))  # Adjacency matrix input
-        x = GCNConv(16)([inputs, adj])
-        outputs = GCNConv(1)([x, adj])
-        model = tf.keras.Model(inputs=[inputs, adj], outputs=outputs, name="AITuner_Graph_Model")
+        tf = _tensorflow()
+        graph = self.sensor_graph()
+        if input_dim % graph.num_nodes:
+            raise ValueError(f"input_dim {input_dim} is not a multiple of the {graph.num_nodes} sensor graph nodes.")
+        inputs = tf.keras.layers.Input(shape=(input_dim,))
+        x = tf.keras.layers.Reshape((graph.num_nodes, input_dim // graph.num_nodes))(inputs)
+        for units in (16, 16):
+            x = tf.keras.layers.Dense(units)(x)
+            x = graph.propagation_layer()(x)
+            x = tf.keras.layers.Activation('relu')(x)
+        x = tf.keras.layers.GlobalAveragePooling1D()(x)
+        outputs = tf.keras.layers.Dense(1, activation='tanh')(x)
+        model = tf.keras.Model(inputs=inputs, outputs=outputs, name="AITuner_Graph_Model")
         model.compile(optimizer='adam', loss='mse')
         logger.info("Graph model built successfully.")
         return model
 
-    def build_autoencoder(self, input_dim: int) -> tf.keras.Model:
+    def build_autoencoder(self, input_dim: int) -> 'tf.keras.Model':
         """
-        Autoencoder for anomaly detection as a data sanity check.
+        Autoencoder for anomaly detection as a data sanity check (see anomaly_gate.py).
+        The code is narrower than the input, so the network cannot learn the identity and
+        readings that break the usual relationships between sensors reconstruct poorly.
+        A flat stack of Dense layers, so sensor batches can be scored by the NumPy engine.
         """
-        encoder = tf.keras.Sequential([
-            tf.keras.layers.Dense(8, activation='relu', input_shape=(input_dim,))
-        ], name="AITuner_Autoencoder_Encoder")
-        decoder = tf.keras.Sequential([
-            tf.keras.layers.Dense(input_dim, activation='linear')
-        ], name="AITuner_Autoencoder_Decoder")
-        autoencoder = tf.keras.Model(inputs=encoder.input, outputs=decoder(encoder.output), name="AITuner_Autoencoder")
+        tf = _tensorflow()
+        autoencoder = tf.keras.Sequential([
+            tf.keras.layers.Input(shape=(input_dim,)),
+            tf.keras.layers.Dense(8, activation='relu', name="AITuner_Autoencoder_Encoder"),
+            tf.keras.layers.Dense(max(1, input_dim // 2), activation='linear', name="AITuner_Autoencoder_Code"),
+            tf.keras.layers.Dense(8, activation='relu', name="AITuner_Autoencoder_Decoder"),
+            tf.keras.layers.Dense(input_dim, activation='linear', name="AITuner_Autoencoder_Output")
+        ], name="AITuner_Autoencoder")
         autoencoder.compile(optimizer='adam', loss='mse')
         logger.info("Autoencoder built successfully.")
         return autoencoder
 
+    def refresh_inference_engine(self) -> None:
+        """Reload the inference engine weights after the Keras model has been trained."""
+        if self.engine is not None:
+            self.engine.sync(self.model)
+        if self._sampler is not None and self._sampler is not self.engine:
+            self._sampler.sync(self.model)
+        if self._stepper is not None:
+            self._stepper.sync(self.model)
+
+    def predict_uncertainty(self, batch: np.ndarray, samples: int = MC_SAMPLES
+                            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Monte-Carlo prediction of the 'bayesian' model: `samples` weight sets drawn from the posterior
+        and evaluated for the whole batch in one batched NumPy call (see BayesianInferenceEngine).
+
+        :param batch: Array-like of shape (n, input_dim).
+        :return: (mean, std, confidence) arrays of shape (n,); confidence is the share of samples whose
+                 tuning direction matches the direction of the mean.
+        """
+        if self.model_type != 'bayesian':
+            raise ValueError(f"predict_uncertainty needs the 'bayesian' model, not '{self.model_type}'.")
+        if self._sampler is None:
+            # The posterior is extracted once and reused until refresh_inference_engine.
+            self._sampler = (self.engine if isinstance(self.engine, BayesianInferenceEngine)
+                             else BayesianInferenceEngine.from_model(self.model))
+        batch = np.asarray(batch, dtype=np.float32).reshape(-1, self.input_dim)
+        draws = self._sampler.sample(batch, samples)[:, :, 0]
+        mean = draws.mean(axis=0)
+        confidence = np.mean(directions_from_predictions(draws) == directions_from_predictions(mean), axis=0)
+        return mean, draws.std(axis=0), confidence
+
+    def predict_raw(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run the model on a batch of sensor vectors.
+        :param batch: Array of shape (n, input_dim), or (n, window * input_dim) in windowed mode.
+        :return: Raw model outputs of shape (n, outputs).
+        """
+        batch = np.asarray(batch, dtype=np.float32).reshape(-1, self.model_input_dim)
+        if self.engine is not None:
+            return self.engine.predict(batch)
+        return np.asarray(self.model.predict(batch, verbose=0)).reshape(len(batch), -1)
+
+    def reset_sequence_state(self, streams: int = 1) -> None:
+        """Forget the frame history of `predict_step`, e.g. at the start of a session."""
+        self.sequence_engine().reset(streams)
+
+    def predict_step(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Feed the newest sensor frame of each stream to a windowed sequence model.
+        The LSTM state or the transformer key/value cache carries over from the previous call, so
+        the cost does not grow with the window; models the step engines do not cover rerun the whole window.
+
+        :param frames: Array of shape (streams, input_dim), one frame per stream (one stream after a
+                       reset without arguments).
+        :return: Raw model outputs of shape (streams, outputs).
+        """
+        return self.sequence_engine().step(frames)
+
+    def predict_adjustment_step(self, sensor_data: List[float]) -> int:
+        """Tuning direction (+1, -1 or 0) of a windowed sequence model after feeding it one sensor frame."""
+        return int(directions_from_predictions(self.predict_step(sensor_data)[:, 0])[0])
+
+    def sequence_engine(self) -> Any:
+        """Step engine behind `predict_step`, created on first use."""
+        if self.window is None:
+            raise ValueError("Per-tick prediction needs a windowed sequence model (hyperparameters={'window': T}).")
+        if self._stepper is None:
+            self._stepper = build_step_engine(self.model) or RewindowStepEngine(self.predict_raw, self.window,
+                                                                               self.input_dim)
+        return self._stepper
+
+    def predict_interval(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predicts the adjustment interval of the 'quantile' model for many sensor vectors in one call.
+
+        :param batch: Array-like of shape (n, input_dim).
+        :return: (lower, median, upper) arrays of shape (n,) at the lowest, middle and highest quantile.
+        """
+        if self.model_type != 'quantile':
+            raise ValueError(f"predict_interval needs the 'quantile' model, not '{self.model_type}'.")
+        return interval_from_quantiles(self.predict_raw(batch))
+
+    def predict_adjustments(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Predicts tuning adjustment directions for many sensor vectors in one call.
+        
+        :param batch: Array-like of shape (n, input_dim).
+        :return: Integer array of shape (n,) with values +1, -1 or 0.
+        """
+        if self.model_type == 'quantile':
+            lower, _, upper = self.predict_interval(batch)
+            return directions_from_intervals(lower, upper)
+        if self.model_type == 'bayesian':
+            mean, _, confidence = self.predict_uncertainty(batch)
+            return np.where(confidence >= MIN_CONFIDENCE, directions_from_predictions(mean), 0)
+        if self.model_type == 'reinforcement':
+            return directions_from_policy(self.predict_raw(batch))
+        return directions_from_predictions(self.predict_raw(batch)[:, 0])
+
     def predict_adjustment(self, sensor_data: List[float]) -> int:
         """
         Predicts a tuning adjustment direction based on sensor data.
@@ -233,14 +630,16 @@ class AITuner:
         :param sensor_data: A list of sensor readings.
         :return: +1 (increase), -1 (decrease), or 0 (no change).
         
-        Note: This function is designed for models that output a single scalar prediction.
+        Note: This function is designed for models that output a single scalar prediction;
+        the 'quantile' and 'bayesian' models use their uncertainty policies and the 'reinforcement'
+        policy takes its most probable action (see `predict_adjustments`).
         """
-        sensor_array = np.array(sensor_data).reshape(1, -1)
-        # For certain advanced models (e.g., graph networks), additional inputs may be required.
-        prediction = self.model.predict(sensor_array)[0][0]
-        if prediction > 0.1:
+        if self.model_type in ('quantile', 'bayesian', 'reinforcement'):
+            return int(self.predict_adjustments(sensor_data)[0])
+        prediction = self.predict_raw(sensor_data)[0][0]
+        if prediction > ADJUSTMENT_THRESHOLD:
             return 1
-        elif prediction < -0.1:
+        elif prediction < -ADJUSTMENT_THRESHOLD:
             return -1
         else:
             return 0
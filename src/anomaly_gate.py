@@ -0,0 +1,207 @@
+from typing import Any, Dict, Optional
+import logging
+
+import numpy as np
+
+try:
+    from .inference_engine import DenseInferenceEngine
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine
+    from instrumentation import Instrumentation, default_instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class EwmaThreshold:
+    """
+    Running anomaly threshold mean + max(k * std, tolerance * mean) over exponentially weighted
+    reconstruction errors; the tolerance keeps near-constant telemetry from flagging rounding noise.
+    A batch of m errors is folded in with one vectorized update equivalent to m sequential EWMA steps;
+    the estimates are bias-corrected, so they are usable from the first batch.
+    """
+
+    def __init__(self, alpha: float = 0.01, k: float = 4.0, tolerance: float = 0.5, warmup: int = 200) -> None:
+        """
+        :param alpha: Weight of each new error.
+        :param k: Standard deviations above the mean at which an error is anomalous.
+        :param tolerance: Smallest margin above the mean, relative to the mean.
+        :param warmup: Errors observed before the threshold is trusted.
+        """
+        self.alpha = alpha
+        self.k = k
+        self.tolerance = tolerance
+        self.warmup = warmup
+        self.count = 0
+        self._mean = 0.0
+        self._square = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.warmup
+
+    @property
+    def threshold(self) -> float:
+        correction = 1.0 - (1.0 - self.alpha) ** self.count
+        if correction == 0.0:
+            return float('inf')
+        mean = self._mean / correction
+        variance = max(self._square / correction - mean * mean, 0.0)
+        return mean + max(self.k * variance ** 0.5, self.tolerance * mean)
+
+    def update(self, errors: np.ndarray) -> None:
+        errors = np.asarray(errors, dtype=np.float64).ravel()
+        m = len(errors)
+        if m == 0:
+            return
+        # Weight of the i-th newest error after m steps: alpha * (1 - alpha) ** i.
+        weights = self.alpha * (1.0 - self.alpha) ** np.arange(m - 1, -1, -1)
+        decay = (1.0 - self.alpha) ** m
+        self._mean = decay * self._mean + weights @ errors
+        self._square = decay * self._square + weights @ (errors * errors)
+        self.count += m
+
+
+class QuantileThreshold:
+    """
+    Running anomaly threshold at a high quantile of recent reconstruction errors, read from a
+    fixed log-spaced histogram sketch whose counts decay with every batch. Updating costs one
+    searchsorted and one bincount per batch, whatever the history length.
+    """
+
+    EDGES = np.logspace(-8, 4, 12 * 16 + 1)  # 16 buckets per decade.
+
+    def __init__(self, quantile: float = 0.999, margin: float = 1.5, half_life: int = 5000, warmup: int = 200) -> None:
+        """
+        :param quantile: Quantile of recent errors considered normal.
+        :param margin: Factor applied to that quantile.
+        :param half_life: Errors after which an observation's weight has halved.
+        :param warmup: Errors observed before the threshold is trusted.
+        """
+        self.quantile = quantile
+        self.margin = margin
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.warmup = warmup
+        self.count = 0
+        self.counts = np.zeros(len(self.EDGES) + 1)
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.warmup
+
+    @property
+    def threshold(self) -> float:
+        total = self.counts.sum()
+        if total == 0.0:
+            return float('inf')
+        bucket = int(np.searchsorted(np.cumsum(self.counts), self.quantile * total))
+        upper = self.EDGES[min(bucket, len(self.EDGES) - 1)]
+        return float(upper * self.margin)
+
+    def update(self, errors: np.ndarray) -> None:
+        errors = np.asarray(errors, dtype=np.float64).ravel()
+        if len(errors) == 0:
+            return
+        self.counts *= self.decay ** len(errors)
+        self.counts += np.bincount(np.searchsorted(self.EDGES, errors), minlength=len(self.counts))
+        self.count += len(errors)
+
+
+class AnomalyGate:
+    """
+    Streaming anomaly detection in front of the tuning pipeline. Batches of sensor vectors are
+    scored by the reconstruction error of an autoencoder (see AITuner.build_autoencoder) and compared
+    with a running threshold. Any anomalous row closes the gate for the next `hold` rows; the Tuner
+    does not change the map while the gate is closed, nor before the threshold has warmed up.
+
+    Only rows accepted as normal update the threshold, so a burst of corrupt data cannot raise the
+    threshold that is supposed to reject it. After a genuine change of operating regime, retrain
+    and reseed the gate with `fit`.
+    """
+
+    def __init__(self, autoencoder: Any, threshold: Optional[Any] = None, hold: int = 100,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param autoencoder: Keras model reconstructing its input; Dense-only models are scored in NumPy.
+        :param threshold: QuantileThreshold (default) or EwmaThreshold. Reconstruction errors are
+                          heavy-tailed, so mean + k * std flags more normal rows than a high quantile.
+        :param hold: Rows the gate stays closed after an anomaly.
+        :param instrumentation: Receives the latency and anomaly count of each scored batch; defaults to
+                                the process-wide instrumentation.
+        """
+        self.autoencoder = autoencoder
+        self.engine = DenseInferenceEngine.from_model(autoencoder) if DenseInferenceEngine.supports(autoencoder) else None
+        self.threshold = threshold if threshold is not None else QuantileThreshold()
+        self.hold = hold
+        input_dim = autoencoder.inputs[0].shape[-1]
+        self.offset = np.zeros(input_dim, dtype=np.float32)
+        self.scale = np.ones(input_dim, dtype=np.float32)
+        self.rows = 0
+        self.anomalies = 0
+        self._closed_until = 0
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stage = self.instrumentation.stage('anomaly_gate.check')
+
+    @property
+    def is_open(self) -> bool:
+        """True if map changes are allowed: the threshold is warm and no anomaly was seen within `hold` rows."""
+        return self.threshold.ready and self.rows >= self._closed_until
+
+    def score(self, batch: np.ndarray) -> np.ndarray:
+        """
+        :param batch: Sensor vectors of shape (n, input_dim).
+        :return: Mean squared reconstruction error of each (standardized) row, shape (n,).
+        """
+        x = (np.asarray(batch, dtype=np.float32).reshape(-1, len(self.offset)) - self.offset) / self.scale
+        if self.engine is not None:
+            reconstruction = self.engine.predict(x)
+        else:
+            reconstruction = np.asarray(self.autoencoder.predict(x, verbose=0))
+        return np.mean((x - reconstruction) ** 2, axis=1)
+
+    def check(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Score a batch, update the gate and the running threshold.
+        :return: Boolean array of shape (n,), True for normal rows.
+        """
+        start = self.instrumentation.clock()
+        errors = self.score(batch)
+        if self.threshold.ready:
+            threshold = self.threshold.threshold
+            anomalous = ~(errors <= threshold)  # NaN errors (non-finite sensor values) are anomalous too.
+            self.threshold.update(errors[~anomalous])
+        else:
+            anomalous = np.zeros(len(errors), dtype=bool)
+            self.threshold.update(errors[np.isfinite(errors)])
+        self.rows += len(errors)
+        count = int(np.count_nonzero(anomalous))
+        if count:
+            last = len(errors) - 1 - int(np.flatnonzero(anomalous)[-1])
+            self._closed_until = max(self._closed_until, self.rows - last + self.hold)
+            self.anomalies += count
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{count} anomalous sensor rows (max error {errors.max():.4g}); tuning gated.")
+        self.instrumentation.record(self._stage, start, float(count))
+        return ~anomalous
+
+    def fit(self, rows: np.ndarray, epochs: int = 20, batch_size: int = 64) -> None:
+        """
+        Train the autoencoder on known-good telemetry, standardizing each feature, and seed the
+        threshold with the resulting reconstruction errors.
+        """
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, len(self.offset))
+        self.offset = rows.mean(axis=0)
+        self.scale = np.maximum(rows.std(axis=0), 1e-6)
+        x = (rows - self.offset) / self.scale
+        self.autoencoder.fit(x, x, epochs=epochs, batch_size=batch_size, verbose=0)
+        if self.engine is not None:
+            self.engine.sync(self.autoencoder)
+        self.threshold.update(self.score(rows))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'anomalies': self.anomalies,
+            'threshold': float(self.threshold.threshold),
+            'open': self.is_open,
+        }
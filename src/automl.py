@@ -0,0 +1,244 @@
+"""
+Keras Tuner hyperparameter search for the 'automl' AITuner model.
+
+The Keras Tuner oracle (Bayesian optimisation or random search) proposes trials in this
+process; trials are trained in parallel worker processes with early stopping. Every finished
+trial is checkpointed by the oracle, so an interrupted search resumes where it stopped when
+started again with the same directory and project name.
+
+Usage: python src/automl.py telemetry.npz --max-trials 30 --workers 8
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+
+try:
+    from .ai_tuner import AITuner, AUTOML_DEFAULTS
+    from .model_cache import ModelCache
+except ImportError:  # Executed as a script from within src/.
+    from ai_tuner import AITuner, AUTOML_DEFAULTS
+    from model_cache import ModelCache
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = 'checkpoint.weights.h5'
+BEST_FILE = 'best.json'
+
+
+def _init_worker() -> None:
+    # One trial per core: keep each worker's TensorFlow to a single thread.
+    tf = importlib.import_module('tensorflow')
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _run_trial(input_dim: int, values: Dict[str, Any], data: Tuple[np.ndarray, ...], epochs: int,
+               patience: int, batch_size: int, checkpoint: str) -> Dict[str, float]:
+    """Train one trial with early stopping and save its best weights. Runs in a worker process."""
+    tf = importlib.import_module('tensorflow')
+    x, y, x_val, y_val = data
+    model = AITuner(input_dim=input_dim, model_type='automl', fast_inference=False, hyperparameters=values).model
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)
+    history = model.fit(x, y, validation_data=(x_val, y_val), epochs=epochs, batch_size=batch_size,
+                        callbacks=[early_stopping], verbose=0)
+    model.save_weights(checkpoint)
+    return {'val_loss': float(np.min(history.history['val_loss'])), 'epochs': len(history.history['val_loss'])}
+
+
+class AutoMLSearch:
+    """Parallel, resumable Keras Tuner search over the 'automl' network's hyperparameters."""
+
+    def __init__(self, input_dim: int = 5, directory: str = 'automl_search', project_name: str = 'ai_tuner',
+                 max_trials: int = 20, epochs: int = 50, patience: int = 5, batch_size: int = 64,
+                 workers: Optional[int] = None, algorithm: str = 'bayesian', seed: Optional[int] = None,
+                 verbose: int = 0) -> None:
+        """
+        :param directory: Root directory of the search checkpoints.
+        :param project_name: Sub-directory of this search; reusing it resumes the search.
+        :param max_trials: Total number of trials, including trials run before a resume.
+        :param epochs: Maximum epochs per trial.
+        :param patience: Epochs without val_loss improvement before a trial stops early.
+        :param workers: Trials trained concurrently in worker processes (None uses all cores, 1 trains in-process).
+        :param algorithm: 'bayesian' or 'random'.
+        :param verbose: 1 prints Keras Tuner's per-trial progress.
+        """
+        try:
+            kt = importlib.import_module('keras_tuner')
+        except ImportError:
+            raise ImportError("keras_tuner must be installed to run an AutoML search.")
+        tuner_classes = {'bayesian': kt.BayesianOptimization, 'random': kt.RandomSearch}
+        if algorithm not in tuner_classes:
+            raise ValueError(f"Unknown search algorithm '{algorithm}'; expected one of {list(tuner_classes)}.")
+        self.input_dim = input_dim
+        self.epochs = epochs
+        self.patience = patience
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self._trial_status = kt.engine.trial.TrialStatus
+        # The tuner only owns the oracle and its checkpoints; trials are trained by _run_trial.
+        self.tuner = tuner_classes[algorithm](
+            hypermodel=self.search_space, objective=kt.Objective('val_loss', direction='min'),
+            max_trials=max_trials, seed=seed, directory=directory, project_name=project_name, overwrite=False,
+        )
+        self.tuner.oracle.verbose = verbose
+
+    def search_space(self, hp: Any) -> Any:
+        """Keras Tuner hypermodel: declares the search space and builds the candidate network."""
+        values = {
+            'depth': hp.Int('depth', 1, 4, default=AUTOML_DEFAULTS['depth']),
+            'units': hp.Choice('units', [8, 16, 32, 64, 128], default=AUTOML_DEFAULTS['units']),
+            'activation': hp.Choice('activation', ['relu', 'tanh', 'elu'], default=AUTOML_DEFAULTS['activation']),
+            'learning_rate': hp.Float('learning_rate', 1e-4, 1e-2, sampling='log',
+                                      default=AUTOML_DEFAULTS['learning_rate']),
+        }
+        return AITuner(input_dim=self.input_dim, model_type='automl', fast_inference=False, hyperparameters=values).model
+
+    @property
+    def project_dir(self) -> str:
+        return self.tuner.project_dir
+
+    def run(self, x: np.ndarray, y: np.ndarray, validation_data: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+            validation_split: float = 0.2) -> Dict[str, Any]:
+        """
+        Run (or resume) the search until max_trials trials have finished.
+        :param x: Sensor vectors of shape (n, input_dim).
+        :param y: Target adjustments of shape (n,) in [-1, 1].
+        :param validation_data: (x_val, y_val); without it the last `validation_split` of x/y is held out.
+        :return: The best hyperparameter values.
+        """
+        x = np.asarray(x, dtype=np.float32).reshape(-1, self.input_dim)
+        y = np.asarray(y, dtype=np.float32).reshape(-1, 1)
+        if validation_data is None:
+            split = len(x) - max(1, int(len(x) * validation_split))
+            data = (x[:split], y[:split], x[split:], y[split:])
+        else:
+            x_val, y_val = validation_data
+            data = (x, y, np.asarray(x_val, dtype=np.float32).reshape(-1, self.input_dim),
+                    np.asarray(y_val, dtype=np.float32).reshape(-1, 1))
+
+        oracle = self.tuner.oracle
+        running: Dict[Future, Any] = {}
+        submitted = 0
+        pool = None
+        if self.workers > 1:
+            # Spawned workers avoid inheriting TensorFlow's threads from this process.
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker)
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(running) < self.workers:
+                    trial = oracle.create_trial(f'worker-{submitted}')
+                    submitted += 1
+                    if trial.status == self._trial_status.STOPPED:
+                        exhausted = True  # max_trials reached or the search space is exhausted.
+                        break
+                    if trial.status != self._trial_status.RUNNING:
+                        # The oracle is waiting for running trials to finish before proposing more.
+                        exhausted = not running
+                        break
+                    args = (self.input_dim, dict(trial.hyperparameters.values), data, self.epochs, self.patience,
+                            self.batch_size, os.path.join(self.tuner.get_trial_dir(trial.trial_id), CHECKPOINT_FILE))
+                    if pool is None:
+                        future: Future = Future()
+                        try:
+                            future.set_result(_run_trial(*args))
+                        except Exception as exc:
+                            future.set_exception(exc)
+                    else:
+                        future = pool.submit(_run_trial, *args)
+                    running[future] = trial
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self._finish_trial(running.pop(future), future)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        return self.best_hyperparameters()
+
+    def _finish_trial(self, trial: Any, future: Future) -> None:
+        oracle = self.tuner.oracle
+        exc = future.exception()
+        if exc is None:
+            result = future.result()
+            oracle.update_trial(trial.trial_id, {'val_loss': result['val_loss']}, step=result['epochs'])
+            trial.status = self._trial_status.COMPLETED
+        else:
+            logger.error(f"AutoML trial {trial.trial_id} failed: {exc!r}")
+            trial.status = self._trial_status.FAILED
+            trial.message = repr(exc)
+        oracle.end_trial(trial)
+        # Checkpoint the oracle and record the best trial so far, so an interrupted search resumes here.
+        self.tuner.save()
+        best = oracle.get_best_trials(1)
+        if best:
+            with open(os.path.join(self.project_dir, BEST_FILE), 'w') as f:
+                json.dump({
+                    'trial_id': best[0].trial_id,
+                    'val_loss': best[0].score,
+                    'hyperparameters': best[0].hyperparameters.values,
+                    'weights': os.path.relpath(os.path.join(self.tuner.get_trial_dir(best[0].trial_id), CHECKPOINT_FILE),
+                                               self.project_dir),
+                }, f, indent=2)
+
+    def best_hyperparameters(self) -> Dict[str, Any]:
+        best = self.tuner.oracle.get_best_trials(1)
+        if not best:
+            raise RuntimeError("The AutoML search has no completed trials.")
+        return dict(best[0].hyperparameters.values)
+
+    def best_tuner(self, cache: Optional[ModelCache] = None) -> AITuner:
+        """AITuner with the best trial's architecture and trained weights, ready for inference."""
+        return load_best_tuner(self.project_dir, self.input_dim, cache)
+
+
+def load_best_tuner(project_dir: str, input_dim: int = 5, cache: Optional[ModelCache] = None) -> AITuner:
+    """
+    Build an AITuner from a (possibly finished) search's best trial without importing keras_tuner.
+    :param project_dir: Search project directory containing best.json.
+    """
+    with open(os.path.join(project_dir, BEST_FILE), 'r') as f:
+        best = json.load(f)
+    tuner = AITuner(input_dim=input_dim, model_type='automl', cache=cache, hyperparameters=best['hyperparameters'])
+    tuner.model.load_weights(os.path.join(project_dir, best['weights']))
+    tuner.refresh_inference_engine()
+    if cache is not None:
+        tuner.save_to_cache()
+    return tuner
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Keras Tuner search for the 'automl' AITuner model.")
+    parser.add_argument('data', help=".npz file with arrays 'x' (n, input_dim) and 'y' (n,).")
+    parser.add_argument('--directory', default='automl_search', help="Search checkpoint directory.")
+    parser.add_argument('--project-name', default='ai_tuner', help="Search project (reuse to resume).")
+    parser.add_argument('--max-trials', type=int, default=20, help="Total number of trials.")
+    parser.add_argument('--epochs', type=int, default=50, help="Maximum epochs per trial.")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel trials (default: all cores).")
+    parser.add_argument('--algorithm', default='bayesian', choices=['bayesian', 'random'])
+    parser.add_argument('--model-cache', default='model_cache',
+                        help="Store the best model in this AI Tuner model cache (empty string disables).")
+    args = parser.parse_args(argv)
+
+    with np.load(args.data) as data:
+        x, y = data['x'], data['y']
+    search = AutoMLSearch(input_dim=x.shape[1], directory=args.directory, project_name=args.project_name,
+                          max_trials=args.max_trials, epochs=args.epochs, workers=args.workers,
+                          algorithm=args.algorithm, verbose=1)
+    best = search.run(x, y)
+    logger.info(f"Best AutoML hyperparameters: {best}")
+    search.best_tuner(ModelCache(args.model_cache) if args.model_cache else None)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
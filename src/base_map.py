@@ -1,31 +1,78 @@
 import os
-import yaml
-from typing import Any, Dict
+from typing import Any, Mapping, Optional
 import logging
 
+try:
+    from .calibration_store import CalibrationStore
+    from .calibration_table import CalibrationTable
+except ImportError:  # Executed as a script from within src/.
+    from calibration_store import CalibrationStore
+    from calibration_table import CalibrationTable
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class BaseMap:
-    def __init__(self, config_path: str = 'configs/base_map.yaml') -> None:
+    def __init__(self, config_path: str = 'configs/base_map.yaml', store_path: Optional[str] = None) -> None:
+        """
+        :param config_path: YAML calibration map, used for import and export.
+        :param store_path: Optional binary calibration store. When given, the map is memory-mapped
+                           from this file and `commit` persists only the changed cells.
+        """
         self.config_path = config_path
-        self.map: Dict[str, Any] = {}
+        self.store_path = store_path
+        self.map: CalibrationStore
         self.load_map()
 
-    def load_map(self) -> Dict[str, Any]:
+    def load_map(self) -> CalibrationStore:
+        if self.store_path is not None and os.path.exists(self.store_path) and not self._yaml_is_newer():
+            self.map = CalibrationStore.open(self.store_path)
+            logger.info("Base map loaded from calibration store.")
+            return self.map
         if not os.path.exists(self.config_path):
             logger.error(f"Base map file not found at {self.config_path}")
             raise FileNotFoundError(f"Base map file not found at {self.config_path}")
-        with open(self.config_path, 'r') as f:
-            self.map = yaml.safe_load(f)
+        self.map = CalibrationStore.from_yaml(self.config_path, self.store_path)
         logger.info("Base map loaded successfully.")
         return self.map
 
-    def get_map(self) -> Dict[str, Any]:
+    def _yaml_is_newer(self) -> bool:
+        # A YAML map edited after the store was last written is re-imported.
+        return os.path.exists(self.config_path) and \
+            os.path.getmtime(self.config_path) > os.path.getmtime(self.store_path)
+
+    def get_map(self) -> CalibrationStore:
         return self.map
 
-    def update_map(self, new_map: Dict[str, Any]) -> None:
-        self.map = new_map
-        with open(self.config_path, 'w') as f:
-            yaml.dump(self.map, f)
+    def get_table(self, name: str) -> CalibrationTable:
+        """Interpolating lookup table view of a table parameter (e.g. an RPM x load fuel map)."""
+        return CalibrationTable(self.map, name)
+
+    def commit(self) -> None:
+        """Persist pending changes to the binary store without rewriting the YAML map."""
+        self.map.commit()
+
+    def export_yaml(self, path: Optional[str] = None) -> None:
+        """Write the current calibration values to YAML (defaults to config_path)."""
+        self.map.to_yaml(path or self.config_path)
+        if path in (None, self.config_path) and self.store_path is not None and \
+                os.path.exists(self.store_path) and not self.map.dirty:
+            # The export matches the committed store, so it must not count as a newer YAML edit.
+            os.utime(self.store_path)
+
+    def update_map(self, new_map: Mapping[str, Any]) -> None:
+        """
+        Write new values for the existing parameters, then persist the store and the YAML map.
+        The Tuner, Detuner and journal hold this store object, so its layout cannot change here:
+        adding or removing parameters goes through the YAML map and a restart.
+        """
+        if new_map is not self.map:
+            if set(new_map) != set(self.map):
+                added, removed = sorted(set(new_map) - set(self.map)), sorted(set(self.map) - set(new_map))
+                raise ValueError(f"update_map cannot change the parameter set (added {added}, removed {removed}); "
+                                 f"edit {self.config_path} and reload instead.")
+            for name, value in new_map.items():
+                self.map[name] = value['values'] if isinstance(value, dict) else value
+        self.map.commit()
+        self.export_yaml()
         logger.info("Base map updated and saved.")
@@ -0,0 +1,311 @@
+"""
+Append-only change journal of a CalibrationStore: every changed cell is appended as a fixed-size
+binary record (time, cell, source, delta, new value), with periodic full snapshots so the map as
+of any time T is rebuilt from the nearest snapshot instead of replaying the whole history.
+
+Journal directory layout:
+    header.json    : cell layout of the store, snapshot interval and the first record still kept
+    changes.log    : RECORD_DTYPE records in time order
+    snapshots.bin  : snapshot entries (time, index of the first record not included, all cells)
+
+Usage: python src/calibration_journal.py calibration_journal --as-of 1700000000 --parameter fuel_map
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+try:
+    from .calibration_store import CalibrationStore
+except ImportError:  # Executed as a script from within src/.
+    from calibration_store import CalibrationStore
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+
+# Who changed a cell; stored as one byte per record.
+SOURCES: Dict[str, int] = {'manual': 0, 'ai_tune': 1, 'detune': 2, 'lambda': 3, 'rollback': 4}
+SOURCE_NAMES: Dict[int, str] = {code: name for name, code in SOURCES.items()}
+
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('offset', '<u4'), ('source', 'u1'), ('delta', '<f8'), ('value', '<f8')])
+
+
+def _snapshot_dtype(size: int) -> np.dtype:
+    return np.dtype([('time', '<f8'), ('record', '<u8'), ('values', '<f8', (size,))])
+
+
+class CalibrationJournal:
+    """
+    Change journal of one CalibrationStore. Call `capture(source)` after a component changes the
+    map; it appends one record per cell that differs from the journaled state (only cells written
+    since the last commit are compared). A snapshot is taken every `snapshot_interval` records.
+
+    `as_of(T)` finds the last snapshot at or before T and the last record at or before T by binary
+    search, then applies only the records in between: O(log n) plus at most one snapshot interval.
+    """
+
+    def __init__(self, directory: str, store: CalibrationStore, snapshot_interval: int = 10000) -> None:
+        """
+        :param directory: Journal directory; created with an initial snapshot if it does not exist.
+        :param store: The calibration store whose changes are journaled.
+        :param snapshot_interval: Records between automatic snapshots.
+        """
+        self.directory = directory
+        self.store = store
+        self.layout = {name: [list(store.shape(name)), int(store.cell_offsets(name)[0])] for name in store}
+        self._header_path = os.path.join(directory, 'header.json')
+        self._log_path = os.path.join(directory, 'changes.log')
+        self._snapshot_path = os.path.join(directory, 'snapshots.bin')
+        self._snapshot_dtype = _snapshot_dtype(store.size)
+        self._shadow = store.read_offsets(np.arange(store.size)).copy()
+        if os.path.exists(self._header_path):
+            with open(self._header_path, 'r') as f:
+                header = json.load(f)
+            if header['version'] != JOURNAL_VERSION or header['layout'] != self.layout:
+                raise ValueError(f"Journal at {directory} was written for a different calibration layout.")
+            self.snapshot_interval = header['snapshot_interval']
+            self.first_record = header['first_record']
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.snapshot_interval = snapshot_interval
+            self.first_record = 0
+            open(self._log_path, 'wb').close()
+            open(self._snapshot_path, 'wb').close()
+            self._write_header()
+        self.records = self.first_record + os.path.getsize(self._log_path) // RECORD_DTYPE.itemsize
+        snapshots = self._snapshots()
+        self._snapshot_times = snapshots['time'].tolist()
+        self._snapshot_records = snapshots['record'].tolist()
+        self._last_time = 0.0
+        if self.records > self.first_record:
+            self._last_time = float(self._log()['time'][-1])
+        self._log_file = open(self._log_path, 'ab')
+        if self._snapshot_times:
+            self._last_time = max(self._last_time, self._snapshot_times[-1])
+            journaled = self.as_of(float('inf'))
+            current, self._shadow = self._shadow, journaled
+            changed = np.flatnonzero(current != journaled)
+            if changed.size and not store.readonly:
+                # The store was changed outside the journal (e.g. a YAML re-import).
+                self._append(changed, current[changed], SOURCES['manual'], None)
+        else:
+            self.snapshot()
+
+    def _write_header(self) -> None:
+        tmp_path = f"{self._header_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': JOURNAL_VERSION, 'layout': self.layout, 'snapshot_interval': self.snapshot_interval,
+                       'first_record': self.first_record}, f)
+        os.replace(tmp_path, self._header_path)
+
+    def _log(self) -> np.ndarray:
+        if os.path.getsize(self._log_path) == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(self._log_path, dtype=RECORD_DTYPE, mode='r')
+
+    def _snapshots(self) -> np.ndarray:
+        if os.path.getsize(self._snapshot_path) == 0:
+            return np.zeros(0, dtype=self._snapshot_dtype)
+        return np.memmap(self._snapshot_path, dtype=self._snapshot_dtype, mode='r')
+
+    def _timestamp(self, timestamp: Optional[float]) -> float:
+        # Record times never decrease, so they stay binary-searchable.
+        self._last_time = max(self._last_time, time.time() if timestamp is None else float(timestamp))
+        return self._last_time
+
+    def _append(self, offsets: np.ndarray, values: np.ndarray, source: int, timestamp: Optional[float]) -> int:
+        records = np.empty(len(offsets), dtype=RECORD_DTYPE)
+        records['time'] = self._timestamp(timestamp)
+        records['offset'] = offsets
+        records['source'] = source
+        records['delta'] = values - self._shadow[offsets]
+        records['value'] = values
+        self._log_file.write(records.tobytes())
+        self._shadow[offsets] = values
+        self.records += len(records)
+        if self._snapshot_records and self.records - self._snapshot_records[-1] >= self.snapshot_interval:
+            self.snapshot(timestamp)
+        return len(records)
+
+    def capture(self, source: str, timestamp: Optional[float] = None) -> int:
+        """
+        Journal the cells changed since the previous capture.
+        :param source: One of SOURCES, e.g. 'ai_tune', 'detune' or 'lambda'.
+        :param timestamp: Record time (defaults to now).
+        :return: Number of records appended.
+        """
+        offsets = self.store.dirty_offsets()
+        if offsets.size == 0:
+            return 0
+        values = self.store.read_offsets(offsets)
+        changed = values != self._shadow[offsets]
+        if not changed.any():
+            return 0
+        return self._append(offsets[changed], values[changed], SOURCES[source], timestamp)
+
+    def snapshot(self, timestamp: Optional[float] = None) -> None:
+        """Append a full copy of the journaled map, indexed by time."""
+        entry = np.zeros(1, dtype=self._snapshot_dtype)
+        entry['time'] = self._timestamp(timestamp)
+        entry['record'] = self.records
+        entry['values'] = self._shadow
+        self.flush()
+        with open(self._snapshot_path, 'ab') as f:
+            f.write(entry.tobytes())
+        self._snapshot_times.append(float(entry['time'][0]))
+        self._snapshot_records.append(self.records)
+
+    def flush(self) -> None:
+        self._log_file.flush()
+
+    def as_of(self, timestamp: float) -> np.ndarray:
+        """
+        :return: All cells of the map as they were at `timestamp`, in store slot order.
+        """
+        index = int(np.searchsorted(self._snapshot_times, timestamp, side='right')) - 1
+        if index < 0:
+            raise ValueError(f"The journal holds no history before {self._snapshot_times[0]:.3f}.")
+        self.flush()
+        values = np.array(self._snapshots()[index]['values'])
+        log = self._log()
+        start = self._snapshot_records[index] - self.first_record
+        end = start + int(np.searchsorted(log['time'][start:], timestamp, side='right'))
+        if end > start:
+            segment = log[start:end]
+            # The latest record of each cell wins.
+            offsets = segment['offset'][::-1]
+            cells, latest = np.unique(offsets, return_index=True)
+            values[cells] = segment['value'][::-1][latest]
+        return values
+
+    def map_as_of(self, timestamp: float) -> Dict[str, Any]:
+        """The map at `timestamp` in the format of CalibrationStore.to_dict."""
+        values = self.as_of(timestamp)
+        result = {}
+        for name, (shape, offset) in self.layout.items():
+            size = int(np.prod(shape, dtype=np.int64))
+            if not shape:
+                result[name] = float(values[offset])
+                continue
+            table = values[offset:offset + size].reshape(shape).tolist()
+            axes = self.store.axes(name)
+            result[name] = {'axes': {axis: list(points) for axis, points in axes.items()}, 'values': table} if axes else table
+        return result
+
+    def history(self, name: str) -> np.ndarray:
+        """Records still in the log that changed a parameter's cells (offsets relative to the parameter)."""
+        shape, offset = self.layout[name]
+        size = int(np.prod(shape, dtype=np.int64))
+        self.flush()
+        log = self._log()
+        records = np.array(log[(log['offset'] >= offset) & (log['offset'] < offset + size)])
+        records['offset'] -= offset
+        return records
+
+    def rollback(self, timestamp: float) -> int:
+        """
+        Restore the store to its state at `timestamp`; the restore itself is journaled as 'rollback'.
+        :return: Number of cells restored.
+        """
+        self.capture('manual')
+        target = self.as_of(timestamp)
+        offsets = np.flatnonzero(target != self._shadow)
+        if offsets.size:
+            self.store.write_offsets(offsets, target[offsets])
+            self._append(offsets, target[offsets], SOURCES['rollback'], None)
+        logger.info(f"Calibration rolled back to {timestamp:.3f} ({offsets.size} cells).")
+        return int(offsets.size)
+
+    def revert(self, source: str, since: float) -> int:
+        """
+        Undo the changes one source made after `since`, leaving other sources' changes in place:
+        each cell is moved back by the sum of that source's deltas.
+        :return: Number of cells changed.
+        """
+        self.capture('manual')
+        self.flush()
+        log = self._log()
+        start = int(np.searchsorted(log['time'], since, side='right'))
+        records = log[start:]
+        records = records[records['source'] == SOURCES[source]]
+        if len(records) == 0:
+            return 0
+        totals = np.zeros(self.store.size)
+        np.add.at(totals, records['offset'].astype(np.intp), records['delta'])
+        offsets = np.flatnonzero(totals)
+        values = self._shadow[offsets] - totals[offsets]
+        self.store.write_offsets(offsets, values)
+        self._append(offsets, values, SOURCES['rollback'], None)
+        logger.info(f"Reverted '{source}' changes since {since:.3f} ({offsets.size} cells).")
+        return int(offsets.size)
+
+    def compact(self, keep_snapshots: int = 1) -> int:
+        """
+        Drop the records and snapshots older than the last `keep_snapshots` snapshots; the map can
+        no longer be queried before the oldest snapshot kept.
+        :return: Number of records dropped.
+        """
+        if keep_snapshots < 1:
+            raise ValueError("At least one snapshot must be kept.")
+        if len(self._snapshot_times) <= keep_snapshots:
+            return 0
+        self.flush()
+        first_kept = len(self._snapshot_times) - keep_snapshots
+        new_first = self._snapshot_records[first_kept]
+        dropped = new_first - self.first_record
+        kept_log = np.array(self._log()[dropped:])
+        kept_snapshots = np.array(self._snapshots()[first_kept:])
+        self._log_file.close()
+        for path, data in ((self._log_path, kept_log), (self._snapshot_path, kept_snapshots)):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data.tobytes())
+            os.replace(tmp_path, path)
+        self.first_record = new_first
+        self._write_header()
+        self._snapshot_times = self._snapshot_times[first_kept:]
+        self._snapshot_records = self._snapshot_records[first_kept:]
+        self._log_file = open(self._log_path, 'ab')
+        logger.info(f"Calibration journal compacted: {dropped} records dropped.")
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'records': self.records - self.first_record,
+            'snapshots': len(self._snapshot_times),
+            'log_bytes': os.path.getsize(self._log_path),
+        }
+
+    def close(self) -> None:
+        self._log_file.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect a calibration change journal.")
+    parser.add_argument('journal', help="Journal directory.")
+    parser.add_argument('--store', default='configs/base_map.cal', help="Calibration store the journal belongs to.")
+    parser.add_argument('--as-of', type=float, default=None, help="Print the map at this Unix time.")
+    parser.add_argument('--parameter', default=None, help="Print the change history of one parameter.")
+    args = parser.parse_args(argv)
+    store = CalibrationStore.open(args.store, readonly=True)
+    journal = CalibrationJournal(args.journal, store)
+    try:
+        logger.info(f"Journal: {journal.stats()}")
+        if args.as_of is not None:
+            logger.info(f"Map as of {args.as_of}: {journal.map_as_of(args.as_of)}")
+        if args.parameter:
+            for record in journal.history(args.parameter):
+                logger.info(f"{record['time']:.3f} {SOURCE_NAMES[int(record['source'])]:>8} cell {record['offset']}: "
+                            f"{record['delta']:+.5f} -> {record['value']:.5f}")
+    finally:
+        journal.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
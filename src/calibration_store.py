@@ -0,0 +1,312 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   preamble  : magic, version, header length, data offset, slot size (float64 cells), active slot
+#   header    : JSON list of {"name", "shape", "offset", "axes"} describing each parameter
+#   data      : two slots of `slot size` contiguous float64 cells (shadow copies of the map)
+# Writes go to the inactive (working) slot in place. `commit` flushes it and flips the
+# active-slot byte, so a crash mid-commit always leaves one complete, consistent slot.
+MAGIC = b'NTECCAL1'
+VERSION = 1
+_PREAMBLE = struct.Struct('<8sIIQQB')
+_ACTIVE_OFFSET = _PREAMBLE.size - 1
+_ALIGNMENT = 64
+
+
+class CalibrationStore(Mapping):
+    """
+    Array-backed calibration map shared by BaseMap, Tuner and Detuner.
+    Scalars read and write like dictionary entries; tables are float arrays that can be
+    updated cell by cell. Only changed cells are copied on commit.
+    """
+
+    def __init__(self, layout: Dict[str, Tuple[Tuple[int, ...], int]], slot_size: int,
+                 path: Optional[str] = None, readonly: bool = False,
+                 axes: Optional[Dict[str, Dict[str, List[float]]]] = None) -> None:
+        """
+        Use `create`, `open` or `from_yaml` rather than calling this directly.
+        :param layout: Parameter name -> (shape, offset into a slot).
+        :param slot_size: Number of float64 cells per slot.
+        :param path: Backing file, or None for an in-memory store.
+        :param readonly: Map the file read-only and read the last committed slot.
+        :param axes: Table name -> ordered {axis name: breakpoints} for parameters with lookup axes.
+        """
+        self.path = path
+        self.readonly = readonly
+        self._layout = layout
+        self._axes = axes or {}
+        self._slot_size = slot_size
+        self._dirty = np.zeros(slot_size, dtype=bool)
+        if path is None:
+            self._mm = None
+            buffer = np.zeros(slot_size, dtype=np.float64)
+            self._slots = [buffer, buffer]
+            self._active = 0
+        else:
+            self._mm = np.memmap(path, dtype=np.uint8, mode='r' if readonly else 'r+')
+            preamble = _PREAMBLE.unpack_from(self._mm[:_PREAMBLE.size].tobytes())
+            data_offset = preamble[3]
+            nbytes = slot_size * 8
+            self._slots = [
+                self._mm[data_offset + i * nbytes:data_offset + (i + 1) * nbytes].view(np.float64)
+                for i in range(2)
+            ]
+            self._active = preamble[5]
+            if not readonly:
+                self._slots[1 - self._active][:] = self._slots[self._active]
+
+    @property
+    def _working(self) -> np.ndarray:
+        if self._mm is None:
+            return self._slots[0]
+        return self._slots[self._active] if self.readonly else self._slots[1 - self._active]
+
+    @staticmethod
+    def _split_params(params: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, List[float]]]]:
+        """
+        Separate table definitions of the form {'axes': {axis: breakpoints}, 'values': [...]}
+        into their values and their axes.
+        """
+        values, axes = {}, {}
+        for name, value in params.items():
+            if isinstance(value, dict):
+                if 'values' not in value:
+                    raise ValueError(f"Calibration table '{name}' has no 'values'.")
+                table_axes = {axis: [float(x) for x in points] for axis, points in (value.get('axes') or {}).items()}
+                shape = np.shape(value['values'])
+                if table_axes:
+                    if tuple(len(points) for points in table_axes.values()) != shape:
+                        raise ValueError(f"Axes of calibration table '{name}' do not match its shape {shape}.")
+                    for axis, points in table_axes.items():
+                        if len(points) < 2 or np.any(np.diff(points) <= 0):
+                            raise ValueError(f"Axis '{axis}' of '{name}' must have 2+ strictly increasing breakpoints.")
+                    axes[name] = table_axes
+                value = value['values']
+            values[name] = value
+        return values, axes
+
+    @staticmethod
+    def _build_layout(params: Dict[str, Any]) -> Tuple[Dict[str, Tuple[Tuple[int, ...], int]], int]:
+        layout = {}
+        offset = 0
+        for name, value in params.items():
+            try:
+                array = np.asarray(value, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"Calibration parameter '{name}' is not numeric.")
+            layout[name] = (array.shape, offset)
+            offset += array.size
+        return layout, offset
+
+    @classmethod
+    def create(cls, params: Dict[str, Any], path: Optional[str] = None) -> 'CalibrationStore':
+        """
+        Create a store from a mapping of parameter names to scalars, nested lists, or
+        tables given as {'axes': {axis name: breakpoints}, 'values': nested lists}.
+        :param params: Calibration values.
+        :param path: File to write; an existing file is replaced atomically. None keeps the store in memory.
+        """
+        params, axes = cls._split_params(params)
+        layout, slot_size = cls._build_layout(params)
+        if path is None:
+            store = cls(layout, slot_size, axes=axes)
+        else:
+            header = json.dumps([
+                {'name': name, 'shape': list(shape), 'offset': offset, 'axes': axes.get(name, {})}
+                for name, (shape, offset) in layout.items()
+            ]).encode('utf-8')
+            data_offset = -(-(_PREAMBLE.size + len(header)) // _ALIGNMENT) * _ALIGNMENT
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header), data_offset, slot_size, 0))
+                f.write(header)
+                f.truncate(data_offset + 2 * slot_size * 8)
+            os.replace(tmp_path, path)
+            store = cls(layout, slot_size, path, axes=axes)
+        for name, value in params.items():
+            store[name] = value
+        store.commit()
+        return store
+
+    @classmethod
+    def open(cls, path: str, readonly: bool = False) -> 'CalibrationStore':
+        """
+        Open an existing binary calibration store.
+        Only one writer may have a store open at a time; readers should pass readonly=True.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Calibration store not found at {path}")
+        with open(path, 'rb') as f:
+            raw = f.read(_PREAMBLE.size)
+            if len(raw) < _PREAMBLE.size:
+                raise ValueError(f"{path} is not a calibration store.")
+            magic, version, header_len, _, slot_size, _ = _PREAMBLE.unpack(raw)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} calibration store.")
+            header = json.loads(f.read(header_len).decode('utf-8'))
+        layout = {entry['name']: (tuple(entry['shape']), entry['offset']) for entry in header}
+        axes = {entry['name']: entry['axes'] for entry in header if entry.get('axes')}
+        return cls(layout, slot_size, path, readonly, axes)
+
+    @classmethod
+    def from_yaml(cls, yaml_path: str, path: Optional[str] = None) -> 'CalibrationStore':
+        """Import a YAML calibration map."""
+        with open(yaml_path, 'r') as f:
+            params = yaml.safe_load(f) or {}
+        return cls.create(params, path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export the current values as plain Python floats and nested lists."""
+        return {name: self._export(name) for name in self._layout}
+
+    def _export(self, name: str) -> Any:
+        shape, offset = self._layout[name]
+        if not shape:
+            return float(self._working[offset])
+        if name in self._axes:
+            return {'axes': {axis: list(points) for axis, points in self._axes[name].items()},
+                    'values': self.table(name).tolist()}
+        return self.table(name).tolist()
+
+    def to_yaml(self, yaml_path: str) -> None:
+        """Export the current values to a YAML calibration map."""
+        with open(yaml_path, 'w') as f:
+            yaml.dump(self.to_dict(), f)
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._layout:
+            raise KeyError(name)
+        shape, offset = self._layout[name]
+        if not shape:
+            return float(self._working[offset])
+        return self.table(name)
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self._layout
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        if name not in self._layout:
+            raise KeyError(f"{name} not found in the calibration store.")
+        shape, offset = self._layout[name]
+        if not shape:
+            # Scalar fast path: one cell, no broadcasting.
+            self._working[offset] = value
+            self._dirty[offset] = True
+            return
+        size = int(np.prod(shape, dtype=np.int64))
+        self._working[offset:offset + size] = np.broadcast_to(np.asarray(value, dtype=np.float64), shape).ravel()
+        self._dirty[offset:offset + size] = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        return len(self._layout)
+
+    def shape(self, name: str) -> Tuple[int, ...]:
+        return self._layout[name][0]
+
+    def axes(self, name: str) -> Dict[str, List[float]]:
+        """Lookup axes of a table parameter (empty for scalars and plain arrays)."""
+        if name not in self._layout:
+            raise KeyError(name)
+        return self._axes.get(name, {})
+
+    def table(self, name: str) -> np.ndarray:
+        """Read-only array view of a parameter's current values."""
+        shape, offset = self._layout[name]
+        size = int(np.prod(shape, dtype=np.int64))
+        view = self._working[offset:offset + size].reshape(shape)
+        view.flags.writeable = False
+        return view
+
+    def _flat_index(self, name: str, index: Any) -> np.ndarray:
+        shape, offset = self._layout[name]
+        if isinstance(index, tuple) and len(index) == len(shape) and all(
+                np.asarray(i).dtype.kind in 'iu' for i in index):
+            # Integer cell coordinates: resolve without materialising the whole table.
+            flat = np.ravel_multi_index(tuple(np.asarray(i) for i in index), shape)
+        else:
+            flat = np.arange(int(np.prod(shape, dtype=np.int64))).reshape(shape)[index]
+        return np.asarray(flat).ravel() + offset
+
+    def set_cells(self, name: str, index: Any, values: Any) -> None:
+        """
+        Write selected cells of a table in place.
+        :param name: Parameter name.
+        :param index: Tuple of integer coordinate arrays (one per axis), or any other NumPy index.
+        :param values: Values broadcast to the indexed cells.
+        """
+        flat = self._flat_index(name, index)
+        self._working[flat] = np.broadcast_to(np.asarray(values, dtype=np.float64), flat.shape)
+        self._dirty[flat] = True
+
+    def cell_offsets(self, name: str) -> np.ndarray:
+        """Offsets of all of a parameter's cells within a slot, for bulk access across parameters."""
+        shape, offset = self._layout[name]
+        return np.arange(offset, offset + int(np.prod(shape, dtype=np.int64)))
+
+    @property
+    def size(self) -> int:
+        """Number of float64 cells per slot."""
+        return self._slot_size
+
+    def dirty_offsets(self) -> np.ndarray:
+        """Slot offsets of the cells written since the last commit."""
+        return np.flatnonzero(self._dirty)
+
+    def read_offsets(self, offsets: np.ndarray) -> np.ndarray:
+        """Current values of cells given by slot offsets (see cell_offsets), for any mix of parameters."""
+        return self._working[offsets]
+
+    def write_offsets(self, offsets: np.ndarray, values: Any) -> None:
+        """Write cells given by slot offsets in place."""
+        self._working[offsets] = values
+        self._dirty[offsets] = True
+
+    def add_cells(self, name: str, index: Any, deltas: Any) -> None:
+        """Add deltas to selected cells of a table in place (repeated indices accumulate)."""
+        flat = self._flat_index(name, index)
+        np.add.at(self._working, flat, np.broadcast_to(np.asarray(deltas, dtype=np.float64), flat.shape))
+        self._dirty[flat] = True
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty.any())
+
+    def commit(self) -> None:
+        """
+        Make pending writes durable. The working slot is flushed before the active-slot byte
+        is flipped, then only the changed cells are copied into the new working slot.
+        """
+        if self._mm is None or self.readonly:
+            self._dirty[:] = False
+            return
+        changed = np.flatnonzero(self._dirty)
+        if changed.size == 0:
+            return
+        self._mm.flush()
+        self._active = 1 - self._active
+        self._mm[_ACTIVE_OFFSET] = self._active
+        self._mm.flush()
+        self._slots[1 - self._active][changed] = self._slots[self._active][changed]
+        self._dirty[:] = False
+
+    def close(self) -> None:
+        """Commit pending writes and release the memory map. Later writes stay in memory only."""
+        self.commit()
+        if self._mm is not None:
+            snapshot = np.array(self._slots[self._active])
+            self._mm = None
+            self._slots = [snapshot, snapshot]
+            self._active = 0
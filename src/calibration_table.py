@@ -0,0 +1,156 @@
+from bisect import bisect_right
+from itertools import product
+from typing import Any, List, Mapping, Optional, Sequence, Tuple, Union
+import logging
+
+import numpy as np
+
+try:
+    from .calibration_store import CalibrationStore
+except ImportError:  # Executed as a script from within src/.
+    from calibration_store import CalibrationStore
+
+logger = logging.getLogger(__name__)
+
+OperatingPoint = Union[Mapping[str, float], Sequence[float]]
+
+
+class CalibrationTable:
+    """
+    N-dimensional lookup table (e.g. RPM x load, or RPM x load x temperature) over a table
+    parameter of a CalibrationStore, with multilinear interpolation between breakpoints.
+    Queries outside the axes are clamped to the edge of the table.
+    """
+
+    def __init__(self, store: CalibrationStore, name: str) -> None:
+        """
+        :param store: Calibration store holding the table values.
+        :param name: Table parameter name; it must have lookup axes.
+        """
+        axes = store.axes(name)
+        if not axes:
+            raise ValueError(f"'{name}' is not a calibration table with lookup axes.")
+        self.store = store
+        self.name = name
+        self.axis_names: List[str] = list(axes)
+        self.ndim = len(self.axis_names)
+        # Precomputed breakpoint data: Python lists for the scalar path, arrays for batches.
+        self._breakpoints = [list(points) for points in axes.values()]
+        self._axes = [np.asarray(points, dtype=np.float64) for points in axes.values()]
+        self._inv_spacing = [1.0 / np.diff(axis) for axis in self._axes]
+        self._uniform = [bool(np.allclose(np.diff(axis), axis[1] - axis[0])) for axis in self._axes]
+        self._corner_list = list(product((0, 1), repeat=self.ndim))
+        self._corners = np.array(self._corner_list, dtype=np.intp)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only view of the current table cells."""
+        return self.store.table(self.name)
+
+    def _as_point(self, point: OperatingPoint) -> List[float]:
+        if isinstance(point, Mapping):
+            return [float(point[axis]) for axis in self.axis_names]
+        if len(point) != self.ndim:
+            raise ValueError(f"Operating point for '{self.name}' needs {self.ndim} coordinates {self.axis_names}.")
+        return [float(x) for x in point]
+
+    def _locate_scalar(self, point: List[float]) -> Tuple[List[int], List[float]]:
+        cells, fractions = [], []
+        for x, breakpoints, inv_spacing in zip(point, self._breakpoints, self._inv_spacing):
+            i = min(max(bisect_right(breakpoints, x) - 1, 0), len(breakpoints) - 2)
+            t = (x - breakpoints[i]) * inv_spacing[i]
+            cells.append(i)
+            fractions.append(min(max(t, 0.0), 1.0))
+        return cells, fractions
+
+    def _locate(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param points: Array of shape (n, ndim).
+        :return: Lower breakpoint index and interpolation fraction per point and axis, both (n, ndim).
+        """
+        cells = np.empty(points.shape, dtype=np.intp)
+        fractions = np.empty(points.shape, dtype=np.float64)
+        for d, (axis, inv_spacing, uniform) in enumerate(zip(self._axes, self._inv_spacing, self._uniform)):
+            x = points[:, d]
+            if uniform:
+                i = np.floor((x - axis[0]) * inv_spacing[0]).astype(np.intp)
+            else:
+                i = np.searchsorted(axis, x, side='right') - 1
+            np.clip(i, 0, len(axis) - 2, out=i)
+            cells[:, d] = i
+            fractions[:, d] = np.clip((x - axis[i]) * inv_spacing[i], 0.0, 1.0)
+        return cells, fractions
+
+    def neighbours(self, points: Any) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        """
+        Cells surrounding each operating point and their interpolation weights, for callers that
+        update the table with their own rule.
+        :param points: A single operating point, or an array-like of shape (n, ndim) in axis order.
+        :return: Cell coordinates per axis, each (n, 2**ndim), and the matching weights, also (n, 2**ndim).
+        """
+        if isinstance(points, Mapping) or np.ndim(points) <= 1:
+            points = [self._as_point(points)]
+        points = np.asarray(points, dtype=np.float64).reshape(-1, self.ndim)
+        cells, fractions = self._locate(points)
+        corners = self._corners  # (2**ndim, ndim)
+        index = tuple(cells[:, None, d] + corners[None, :, d] for d in range(self.ndim))
+        weights = np.prod(
+            np.where(corners[None, :, :] == 1, fractions[:, None, :], 1.0 - fractions[:, None, :]), axis=2
+        )
+        return index, weights
+
+    def lookup(self, point: OperatingPoint) -> float:
+        """Interpolated value at a single operating point."""
+        cells, fractions = self._locate_scalar(self._as_point(point))
+        values = self.values
+        total = 0.0
+        for corner in self._corner_list:
+            weight = 1.0
+            for bit, t in zip(corner, fractions):
+                weight *= t if bit else 1.0 - t
+            if weight:
+                total += weight * values[tuple(c + bit for c, bit in zip(cells, corner))]
+        return float(total)
+
+    def lookup_batch(self, points: Any) -> np.ndarray:
+        """
+        Interpolated values for many operating points.
+        :param points: Array-like of shape (n, ndim), columns in axis order.
+        :return: Array of shape (n,).
+        """
+        index, weights = self.neighbours(points)
+        return np.einsum('ij,ij->i', self.values[index], weights)
+
+    def apply_increment(self, point: OperatingPoint, delta: float) -> float:
+        """
+        Localized gradient update: only the 2**ndim cells surrounding the operating point change.
+        Each cell moves in proportion to its interpolation weight, scaled so that the interpolated
+        value at the point moves by exactly `delta`.
+        :return: Updated interpolated value at the operating point.
+        """
+        point = self._as_point(point)
+        self.apply_increment_batch([point], [delta])
+        return self.lookup(point)
+
+    def apply_increment_batch(self, points: Any, deltas: Any) -> None:
+        """
+        Apply localized updates for many operating points in one call.
+        Contributions to shared cells accumulate.
+        :param points: Array-like of shape (n, ndim).
+        :param deltas: Scalar or array of shape (n,) with the desired change at each point.
+        """
+        index, weights = self.neighbours(points)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=np.float64), (len(weights),))
+        scale = deltas / np.einsum('ij,ij->i', weights, weights)
+        self.store.add_cells(self.name, tuple(i.ravel() for i in index), (weights * scale[:, None]).ravel())
+
+    def shift(self, delta: float) -> None:
+        """Shift every cell of the table by `delta`."""
+        self.store[self.name] = self.values + delta
+
+
+def find_table(base_map: Mapping[str, Any], name: str) -> Optional[CalibrationTable]:
+    """Return a CalibrationTable if `name` is a table parameter of a CalibrationStore, else None."""
+    if isinstance(base_map, CalibrationStore) and base_map.axes(name):
+        return CalibrationTable(base_map, name)
+    return None
@@ -0,0 +1,338 @@
+"""
+CAN bus ingestion: telemetry signals decoded from raw CAN frames, in batches.
+
+Signals are defined in a DBC file (configs/telemetry.dbc; message and signal lines, Intel and
+Motorola byte order, signed and unsigned). Every message ID is compiled once into an extraction
+plan (shift, mask, sign bit, scale and output column per signal) so a batch of frames, held in a
+NumPy structured array, is decoded with a few array operations per message ID instead of one
+Python object per frame and signal. Signals named like telemetry columns (see
+sensor_stream.DEFAULT_COLUMNS) become telemetry rows for SensorHub, and from there the inputs of
+AITuner, AeroController and ActiveLamdaController.
+
+Reading the bus needs python-can; its virtual interface is the local stand-in for a real bus:
+
+Usage: python src/can_bus.py --simulate --channel vcan0   (sends simulated telemetry frames)
+       python src/main.py --can-channel vcan0            (runs the control loop on them)
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import importlib
+import logging
+import re
+import time
+
+import numpy as np
+
+try:
+    from .sensor_stream import DEFAULT_COLUMNS
+except ImportError:  # Executed as a script from within src/.
+    from sensor_stream import DEFAULT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DBC = 'configs/telemetry.dbc'
+
+# One received frame; payloads shorter than 8 bytes are zero-padded.
+FRAME_DTYPE = np.dtype([('timestamp', '<f8'), ('arbitration_id', '<u4'), ('dlc', 'u1'), ('data', 'u1', (8,))])
+
+_MESSAGE = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)')
+_SIGNAL = re.compile(r'^SG_\s+(\w+)\s*(\S*)\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+                     r'\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[\s*([^|\s]+)\s*\|\s*([^\]\s]+)\s*\]')
+
+
+class CanSignal:
+    """One signal of a DBC message."""
+
+    def __init__(self, name: str, start: int, length: int, little_endian: bool, signed: bool,
+                 factor: float, offset: float, minimum: float = 0.0, maximum: float = 0.0) -> None:
+        if not 1 <= length <= 64:
+            raise ValueError(f"Signal '{name}' has an invalid length of {length} bits.")
+        self.name = name
+        self.start = start
+        self.length = length
+        self.little_endian = little_endian
+        self.signed = signed
+        self.factor = factor
+        self.offset = offset
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def shift(self) -> int:
+        """
+        Right shift of the signal's least significant bit within the 64-bit payload word: the
+        little-endian word for Intel signals, the big-endian word for Motorola signals (whose DBC
+        start bit is the most significant bit, in the byte-wise sawtooth numbering).
+        """
+        if self.little_endian:
+            return self.start
+        msb = (self.start // 8) * 8 + 7 - self.start % 8  # Bit index counted from the first payload bit.
+        return 63 - (msb + self.length - 1)
+
+    @property
+    def mask(self) -> int:
+        return (1 << self.length) - 1
+
+
+class MessagePlan:
+    """
+    Precompiled extraction plan of one message ID: per-signal arrays of shifts, masks, sign bits,
+    factors and offsets, and the output columns the decoded values go to.
+    """
+
+    def __init__(self, message_id: int, name: str, signals: Sequence[CanSignal], columns: Sequence[int]) -> None:
+        self.message_id = message_id
+        self.name = name
+        self.signals = list(signals)
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self.big_endian = np.array([not s.little_endian for s in signals], dtype=bool)
+        self.shifts = np.array([s.shift for s in signals], dtype=np.uint64)
+        self.masks = np.array([s.mask for s in signals], dtype=np.uint64)
+        self.sign_bits = np.array([1 << (s.length - 1) if s.signed else 0 for s in signals], dtype=np.uint64)
+        self.factors = np.array([s.factor for s in signals])
+        self.offsets = np.array([s.offset for s in signals])
+        self._any_big = bool(self.big_endian.any())
+        self._all_big = bool(self.big_endian.all())
+        self._any_signed = bool(self.sign_bits.any())
+
+    def decode(self, little: np.ndarray, big: np.ndarray) -> np.ndarray:
+        """
+        :param little: Payloads of this message's frames as little-endian uint64 words, shape (n,).
+        :param big: The same payloads as big-endian uint64 words.
+        :return: Physical signal values of shape (n, signals).
+        """
+        if self._all_big:
+            words = big[:, None]
+        elif self._any_big:
+            words = np.where(self.big_endian, big[:, None], little[:, None])
+        else:
+            words = little[:, None]
+        raw = (words >> self.shifts) & self.masks
+        if self._any_signed:
+            # Two's complement: subtract 2 * sign bit where the sign bit is set.
+            values = raw.astype(np.int64) - ((raw & self.sign_bits) << np.uint64(1)).astype(np.int64)
+        else:
+            values = raw
+        return values * self.factors + self.offsets
+
+
+class SignalDatabase:
+    """Signal definitions of a DBC file, compiled into one MessagePlan per message ID."""
+
+    def __init__(self, messages: Dict[int, Tuple[str, List[CanSignal]]], columns: Sequence[str] = DEFAULT_COLUMNS) -> None:
+        """
+        :param messages: Message ID -> (message name, signals).
+        :param columns: Output columns; signals with other names are not decoded.
+        :raises ValueError: If no signal provides one of the columns (a reader would never fill it).
+        """
+        self.messages = messages
+        self.columns = list(columns)
+        index = {name: i for i, name in enumerate(self.columns)}
+        self.plans: Dict[int, MessagePlan] = {}
+        for message_id, (name, signals) in messages.items():
+            used = [signal for signal in signals if signal.name in index]
+            if used:
+                self.plans[message_id] = MessagePlan(message_id, name, used, [index[s.name] for s in used])
+        missing = set(self.columns) - {s.name for plan in self.plans.values() for s in plan.signals}
+        if missing:
+            raise ValueError(f"No CAN signal provides the telemetry columns {sorted(missing)}.")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_DBC, columns: Sequence[str] = DEFAULT_COLUMNS) -> 'SignalDatabase':
+        """Parse the message (BO_) and signal (SG_) definitions of a DBC file; other sections are ignored."""
+        messages: Dict[int, Tuple[str, List[CanSignal]]] = {}
+        current: Optional[List[CanSignal]] = None
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                match = _MESSAGE.match(line)
+                if match:
+                    current = []
+                    messages[int(match.group(1)) & 0x1FFFFFFF] = (match.group(2), current)  # Bit 31 flags extended IDs.
+                    continue
+                match = _SIGNAL.match(line)
+                if match and current is not None:
+                    name, multiplex, start, length, order, sign, factor, offset, minimum, maximum = match.groups()
+                    if multiplex:
+                        logger.warning(f"Skipping multiplexed CAN signal '{name}'.")
+                        continue
+                    current.append(CanSignal(name, int(start), int(length), order == '1', sign == '-',
+                                             float(factor), float(offset), float(minimum), float(maximum)))
+        return cls(messages, columns)
+
+    def decode(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Decode a batch of frames.
+        :param frames: Structured array of FRAME_DTYPE.
+        :return: Array of shape (n, len(columns)) with each frame's signal values, NaN for the
+                 columns its message does not carry (frames of unknown IDs are all NaN).
+        """
+        out = np.full((len(frames), len(self.columns)), np.nan)
+        if len(frames) == 0:
+            return out
+        data = np.ascontiguousarray(frames['data'])
+        little = data.view('<u8').ravel()
+        big = data.view('>u8').ravel().astype(np.uint64)
+        ids = frames['arbitration_id']
+        for message_id, plan in self.plans.items():
+            rows = np.flatnonzero(ids == message_id)
+            if len(rows):
+                out[rows[:, None], plan.columns] = plan.decode(little[rows], big[rows])
+        return out
+
+    def decode_frame(self, message_id: int, data: bytes) -> Dict[str, float]:
+        """Reference decoder for a single frame, one signal at a time in plain Python."""
+        plan = self.plans.get(message_id)
+        if plan is None:
+            return {}
+        payload = bytes(data).ljust(8, b'\0')
+        little, big = int.from_bytes(payload, 'little'), int.from_bytes(payload, 'big')
+        values = {}
+        for signal in plan.signals:
+            raw = ((little if signal.little_endian else big) >> signal.shift) & signal.mask
+            if signal.signed and raw >> (signal.length - 1):
+                raw -= 1 << signal.length
+            values[signal.name] = raw * signal.factor + signal.offset
+        return values
+
+    def encode(self, message_id: int, values: Dict[str, float]) -> bytes:
+        """8-byte payload of a message from physical values (missing signals are zero), e.g. for simulation."""
+        name, signals = self.messages[message_id]
+        little = big = 0
+        for signal in signals:
+            physical = values.get(signal.name, signal.offset)
+            if signal.maximum > signal.minimum:
+                physical = min(max(physical, signal.minimum), signal.maximum)
+            raw = int(round((physical - signal.offset) / signal.factor)) & signal.mask
+            if signal.little_endian:
+                little |= raw << signal.shift
+            else:
+                big |= raw << signal.shift
+        return bytes(a | b for a, b in zip(little.to_bytes(8, 'little'), big.to_bytes(8, 'big')))
+
+
+def hold_last(decoded: np.ndarray, state: np.ndarray) -> np.ndarray:
+    """
+    Sample-and-hold telemetry rows from decoded frames: row i holds, for every column, the latest
+    value up to and including frame i, or the value in `state` if none. `state` is updated to the last row.
+    """
+    present = ~np.isnan(decoded)
+    latest = np.where(present, np.arange(len(decoded))[:, None], -1)
+    np.maximum.accumulate(latest, axis=0, out=latest)
+    rows = np.where(latest >= 0, decoded[np.maximum(latest, 0), np.arange(decoded.shape[1])], state)
+    if len(rows):
+        state[:] = rows[-1]
+    return rows
+
+
+def frames_from_messages(messages: Sequence[Any]) -> np.ndarray:
+    """Pack python-can Message objects (or anything with timestamp, arbitration_id, dlc and data) into FRAME_DTYPE."""
+    frames = np.zeros(len(messages), dtype=FRAME_DTYPE)
+    for i, message in enumerate(messages):
+        payload = bytes(message.data)[:8]
+        frames[i] = (message.timestamp, message.arbitration_id, message.dlc, tuple(payload.ljust(8, b'\0')))
+    return frames
+
+
+class CanReader:
+    """
+    Telemetry rows from a CAN bus. Each poll drains up to `batch_size` pending frames without
+    blocking, decodes them as one batch and updates the latest value of every column.
+    """
+
+    def __init__(self, database: SignalDatabase, bus: Optional[Any] = None, channel: str = 'vcan0',
+                 interface: str = 'virtual', batch_size: int = 1024) -> None:
+        """
+        :param bus: An open python-can bus; if None, one is opened on `channel` with `interface`.
+        :param batch_size: Maximum frames decoded per poll.
+        """
+        if bus is None:
+            try:
+                can = importlib.import_module('can')
+            except ImportError:
+                raise ImportError("python-can must be installed to read telemetry from a CAN bus.")
+            bus = can.Bus(channel=channel, interface=interface)
+        self.database = database
+        self.bus = bus
+        self.batch_size = batch_size
+        self.state = np.full(len(database.columns), np.nan)
+        self.frames = 0
+
+    def poll(self) -> np.ndarray:
+        """Receive and decode pending frames. :return: Sample-and-hold rows, one per frame received."""
+        messages = []
+        while len(messages) < self.batch_size:
+            message = self.bus.recv(timeout=0.0)
+            if message is None:
+                break
+            messages.append(message)
+        self.frames += len(messages)
+        return hold_last(self.database.decode(frames_from_messages(messages)), self.state)
+
+    def wait_for_signals(self, timeout: float = 5.0, wait: float = 0.001) -> None:
+        """
+        Poll until every column has been received at least once.
+        :raises TimeoutError: If some columns are still missing after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while np.isnan(self.state).any():
+            if time.monotonic() > deadline:
+                missing = [name for name, value in zip(self.database.columns, self.state) if np.isnan(value)]
+                raise TimeoutError(f"No CAN frames carried the telemetry columns {missing} within {timeout} s.")
+            self.poll()
+            time.sleep(wait)
+
+    def rows(self, wait: float = 0.001, timeout: float = 5.0) -> Iterator[np.ndarray]:
+        """
+        Yield the latest telemetry row once per call, for SensorHub.ingest. The first row is only
+        yielded once every column has been received (see `wait_for_signals`); after that, reading
+        never blocks.
+        """
+        self.wait_for_signals(timeout, wait)
+        while True:
+            self.poll()
+            yield self.state.copy()
+
+    def close(self) -> None:
+        self.bus.shutdown()
+
+
+def simulate(database: SignalDatabase, bus: Any, row: Sequence[float], rate_hz: float = 1000.0,
+             duration: float = 0.0) -> None:
+    """Send every message of the database at `rate_hz`, carrying the telemetry values of `row`."""
+    can = importlib.import_module('can')
+    values = dict(zip(database.columns, row))
+    payloads = [(message_id, database.encode(message_id, values)) for message_id in database.plans]
+    start = time.perf_counter()
+    while duration <= 0.0 or time.perf_counter() - start < duration:
+        for message_id, payload in payloads:
+            bus.send(can.Message(arbitration_id=message_id, data=payload, is_extended_id=message_id > 0x7FF))
+        time.sleep(1.0 / rate_hz)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Send or dump decoded CAN telemetry.")
+    parser.add_argument('--dbc', default=DEFAULT_DBC, help="DBC file with the telemetry signals.")
+    parser.add_argument('--channel', default='vcan0')
+    parser.add_argument('--interface', default='virtual', help="python-can interface (virtual, socketcan, ...).")
+    parser.add_argument('--simulate', action='store_true', help="Send simulated telemetry instead of reading.")
+    parser.add_argument('--duration', type=float, default=0.0, help="Seconds to run (0 runs forever).")
+    args = parser.parse_args(argv)
+    database = SignalDatabase.load(args.dbc)
+    can = importlib.import_module('can')
+    bus = can.Bus(channel=args.channel, interface=args.interface)
+    try:
+        if args.simulate:
+            simulate(database, bus, [0.5, 0.7, 0.2, 0.3, 0.4, 0.5, 90, 92, 88, 91, 1.05, 100], duration=args.duration)
+        else:
+            reader = CanReader(database, bus)
+            for row in reader.rows():
+                logger.info(dict(zip(database.columns, row.round(4).tolist())))
+                time.sleep(0.5)
+    finally:
+        bus.shutdown()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
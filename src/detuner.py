@@ -1,47 +1,216 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Mapping, MutableMapping, List, Optional, Union
 import logging
 
+import numpy as np
+import yaml
+
+try:
+    from .calibration_store import CalibrationStore
+    from .calibration_table import CalibrationTable, OperatingPoint, find_table
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from calibration_store import CalibrationStore
+    from calibration_table import CalibrationTable, OperatingPoint, find_table
+    from instrumentation import Instrumentation, default_instrumentation
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_RULES_PATH = 'configs/degradation_rules.yaml'
+
+# Part -> {parameter: weight} used when no rules file is given.
+DEFAULT_RULES: Dict[str, Dict[str, float]] = {
+    'turbocharger': {'boost_map': 1.0},
+    'fuel_injectors': {'fuel_map': 1.0},
+}
+
+PartHealth = Union[Mapping[str, Union[bool, float]], np.ndarray]
+
+
+class DegradationRules:
+    """
+    Part -> parameter detune rules compiled into flat index arrays. A part's severity (0 healthy,
+    1 fully degraded; True counts as 1) lowers each of its parameters by
+    gradient_step * weight * severity; contributions of several parts to one parameter add up,
+    are capped at the parameter's `max_step` per pass, and never take it below its `minimum`.
+    """
+
+    def __init__(self, parts: Mapping[str, Mapping[str, float]],
+                 parameters: Optional[Mapping[str, Mapping[str, float]]] = None) -> None:
+        """
+        :param parts: Part name -> {parameter name: weight}.
+        :param parameters: Parameter name -> {'minimum': lowest detuned value, 'max_step': largest
+                           detune per pass}; both are optional.
+        """
+        parameters = dict(parameters or {})
+        self.parts: List[str] = list(parts)
+        self.part_index = {part: i for i, part in enumerate(self.parts)}
+        self.parameters: List[str] = list(dict.fromkeys(
+            [name for rules in parts.values() for name in (rules or {})] + list(parameters)))
+        self.parameter_index = {name: i for i, name in enumerate(self.parameters)}
+        rule_part, rule_parameter, rule_weight = [], [], []
+        for part, rules in parts.items():
+            for name, weight in (rules or {}).items():
+                rule_part.append(self.part_index[part])
+                rule_parameter.append(self.parameter_index[name])
+                rule_weight.append(float(weight))
+        self.rule_part = np.array(rule_part, dtype=np.intp)
+        self.rule_parameter = np.array(rule_parameter, dtype=np.intp)
+        self.rule_weight = np.array(rule_weight, dtype=np.float64)
+        self.minimum = np.array([float(parameters.get(name, {}).get('minimum', -np.inf))
+                                 for name in self.parameters])
+        self.max_step = np.array([float(parameters.get(name, {}).get('max_step', np.inf))
+                                  for name in self.parameters])
+        self._by_part: Dict[str, List[str]] = {part: list(rules or {}) for part, rules in parts.items()}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_RULES_PATH) -> 'DegradationRules':
+        """Load rules from YAML with a `parts` section and an optional `parameters` section."""
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        return cls(config.get('parts') or {}, config.get('parameters'))
+
+    @classmethod
+    def default(cls) -> 'DegradationRules':
+        return cls(DEFAULT_RULES)
+
+    def parameters_for(self, part: str) -> List[str]:
+        return self._by_part.get(part, [])
+
+    def severity(self, part_health: PartHealth) -> np.ndarray:
+        """
+        :param part_health: Part name -> degradation flag or severity, or an array in `parts` order.
+        :return: Severity per part, shape (len(parts),); unknown parts are ignored.
+        """
+        if isinstance(part_health, np.ndarray):
+            return np.asarray(part_health, dtype=np.float64).reshape(len(self.parts))
+        severity = np.zeros(len(self.parts))
+        for part, value in part_health.items():
+            index = self.part_index.get(part)
+            if index is not None:
+                severity[index] = float(value)
+        return severity
+
+    def evaluate(self, part_health: PartHealth, gradient_step: float) -> np.ndarray:
+        """
+        :return: Detune step per parameter, shape (len(parameters),), after rate caps (not limits).
+        """
+        severity = np.clip(self.severity(part_health), 0.0, 1.0)
+        steps = np.bincount(self.rule_parameter, weights=self.rule_weight * severity[self.rule_part],
+                            minlength=len(self.parameters)) * gradient_step
+        return np.minimum(steps, self.max_step)
+
+
 class Detuner:
-    def __init__(self, base_map: Dict[str, Any], gradient_step: float = 0.01) -> None:
+    def __init__(self, base_map: MutableMapping[str, Any], gradient_step: float = 0.01,
+                 instrumentation: Optional[Instrumentation] = None, rules: Optional[DegradationRules] = None) -> None:
         """
-        :param base_map: A dictionary representing the calibration values.
+        :param base_map: A dictionary or CalibrationStore holding the calibration values.
         :param gradient_step: The small decrement value for detuning.
+        :param instrumentation: Receives each detune's latency and new value; defaults to the
+                                process-wide instrumentation.
+        :param rules: Part -> parameter detune rules; defaults to DEFAULT_RULES.
         """
         self.map = base_map
         self.gradient_step = gradient_step
+        self.rules = rules if rules is not None else DegradationRules.default()
+        self._tables: Dict[str, Optional[CalibrationTable]] = {}
+        self._cells: Optional[Dict[str, np.ndarray]] = None
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stage = self.instrumentation.stage('detuner.apply_detune')
+        self._bulk_stage = self.instrumentation.stage('detuner.apply_health')
 
     def check_part_degradation(self, part_status: Dict[str, bool]) -> List[str]:
         """
-        Simulate part degradation confirmation.
+        Parameters to detune for the degraded parts.
         :param part_status: Dictionary with part names and degradation flags.
         :return: List of parameters to detune.
         """
         detune_params = []
         for part, degraded in part_status.items():
             if degraded:
-                if part == 'turbocharger':
-                    detune_params.append('boost_map')
-                elif part == 'fuel_injectors':
-                    detune_params.append('fuel_map')
-                # Add additional mappings as needed.
+                detune_params.extend(self.rules.parameters_for(part))
         return detune_params
 
-    def apply_detune(self, parameter: str) -> float:
+    def _compile_cells(self) -> Dict[str, np.ndarray]:
+        """
+        Slot offsets of every cell of the rule parameters present in a CalibrationStore, with the
+        parameter each cell belongs to; the layout is fixed, so this runs once.
+        """
+        present = [i for i, name in enumerate(self.rules.parameters) if name in self.map]
+        missing = [name for name in self.rules.parameters if name not in self.map]
+        if missing:
+            logger.warning(f"Detune rules name parameters missing from the base map: {missing}")
+        offsets = [self.map.cell_offsets(self.rules.parameters[i]) for i in present]
+        return {
+            'offsets': np.concatenate(offsets) if offsets else np.zeros(0, dtype=np.intp),
+            'parameter': np.repeat(np.array(present, dtype=np.intp), [len(o) for o in offsets]),
+        }
+
+    def apply_health(self, part_health: PartHealth) -> Dict[str, float]:
+        """
+        Detune every parameter affected by a part-health vector in one pass: rule contributions are
+        summed per parameter, capped at each parameter's rate cap, and applied to all its cells
+        (whole tables are lowered) without going below its minimum.
+        :param part_health: Part name -> degradation flag or severity in [0, 1], or an array in
+                            `rules.parts` order.
+        :return: Parameter -> detune step applied (before limits), for the parameters that moved.
+        """
+        start = self.instrumentation.clock()
+        steps = self.rules.evaluate(part_health, self.gradient_step)
+        minimum = self.rules.minimum
+        if isinstance(self.map, CalibrationStore):
+            if self._cells is None:
+                self._cells = self._compile_cells()
+            active = steps[self._cells['parameter']] > 0.0
+            offsets, parameter = self._cells['offsets'][active], self._cells['parameter'][active]
+            values = self.map.read_offsets(offsets)
+            lowered = values - steps[parameter]
+            # Cells already below the minimum stay where they are.
+            self.map.write_offsets(offsets, np.maximum(lowered, np.minimum(values, minimum[parameter])))
+        else:
+            for i in np.flatnonzero(steps):
+                name = self.rules.parameters[i]
+                if name in self.map:
+                    value = self.map[name]
+                    self.map[name] = float(max(value - steps[i], min(value, minimum[i])))
+        applied = {self.rules.parameters[i]: float(steps[i]) for i in np.flatnonzero(steps)}
+        self.instrumentation.record(self._bulk_stage, start, float(len(applied)))
+        if applied and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Detuned {len(applied)} parameters: {applied}")
+        return applied
+
+    def apply_detune(self, parameter: str, operating_point: Optional[OperatingPoint] = None) -> float:
         """
         Apply a negative gradient increment to detune a parameter.
         :param parameter: The key in the base map to adjust.
-        :return: Updated parameter value.
+        :param operating_point: For table parameters, restrict the detune to the cells around this point.
+                                Without it the whole table is lowered.
+        :return: Updated parameter value (for tables, the value at the operating point, or the table mean).
         """
+        start = self.instrumentation.clock()
         if parameter not in self.map:
             logger.error(f"{parameter} not found in the base map.")
             raise KeyError(f"{parameter} not found in the base map.")
+        if parameter not in self._tables:
+            self._tables[parameter] = find_table(self.map, parameter)
+        table = self._tables[parameter]
+        if table is not None:
+            if operating_point is None:
+                table.shift(-self.gradient_step)
+                new_value = float(table.values.mean())
+            else:
+                new_value = table.apply_increment(operating_point, -self.gradient_step)
+            self.instrumentation.record(self._stage, start, new_value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Table '{parameter}' detuned by {self.gradient_step} (value now {new_value}).")
+            return new_value
         current_value = self.map[parameter]
         new_value = current_value - self.gradient_step
         self.map[parameter] = new_value
-        logger.info(f"Parameter '{parameter}' detuned from {current_value} to {new_value}.")
+        self.instrumentation.record(self._stage, start, new_value)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Parameter '{parameter}' detuned from {current_value} to {new_value}.")
         return new_value
 
-    def get_updated_map(self) -> Dict[str, Any]:
+    def get_updated_map(self) -> MutableMapping[str, Any]:
         return self.map
@@ -0,0 +1,283 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    shifted = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return shifted / np.sum(shifted, axis=-1, keepdims=True)
+
+
+# NumPy implementations of the Keras activations the engines support, by Keras name.
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0, out=x),
+    'tanh': lambda x: np.tanh(x, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'elu': lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))),
+    'softmax': _softmax,
+}
+
+
+def activation_name(layer: Any) -> str:
+    """Keras name of a layer's activation (the key into ACTIVATIONS), 'linear' if it has none."""
+    activation = layer.get_config().get('activation', 'linear')
+    if isinstance(activation, dict):
+        activation = activation.get('config', {}).get('name', activation.get('class_name'))
+    return str(activation)
+
+
+class DenseInferenceEngine:
+    """
+    Forward pass of a stack of Dense layers evaluated in plain NumPy.
+    Avoids the Keras predict loop, which dominates the cost of scoring a single sensor row.
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, str]]) -> None:
+        """
+        :param layers: Sequence of (kernel, bias, activation name) tuples.
+        """
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{activation}' for NumPy inference.")
+        self.layers = layers
+        self.input_dim = layers[0][0].shape[0]
+        self.output_dim = layers[-1][0].shape[1]
+
+    @staticmethod
+    def supports(model: Any) -> bool:
+        """Return True if every layer of the model is a Dense layer with a known activation."""
+        layers = getattr(model, 'layers', None)
+        if not layers:
+            return False
+        for layer in layers:
+            if type(layer).__name__ != 'Dense' or activation_name(layer) not in ACTIVATIONS:
+                return False
+        return True
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'DenseInferenceEngine':
+        """Export the weights of a Dense-only Keras model."""
+        return cls(cls._export_layers(model))
+
+    @staticmethod
+    def _export_layers(model: Any) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+        layers = []
+        for layer in model.layers:
+            kernel, bias = layer.get_weights()
+            layers.append((
+                np.ascontiguousarray(kernel, dtype=np.float32),
+                np.ascontiguousarray(bias, dtype=np.float32),
+                activation_name(layer),
+            ))
+        return layers
+
+    def sync(self, model: Any) -> None:
+        """Reload the weights after the Keras model has been trained."""
+        self.layers = self._export_layers(model)
+
+    def save(self, path: str) -> None:
+        """Write the layers to a .npz file that `load` can read without TensorFlow."""
+        arrays: Dict[str, np.ndarray] = {'activations': np.array([activation for _, _, activation in self.layers])}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'DenseInferenceEngine':
+        with np.load(path) as data:
+            return cls([(data[f'kernel_{i}'], data[f'bias_{i}'], str(activation))
+                        for i, activation in enumerate(data['activations'])])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the weights."""
+        return sum(kernel.nbytes + bias.nbytes for kernel, bias, _ in self.layers)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        :param batch: Array of shape (n, input_dim).
+        :return: Model outputs of shape (n, output_dim).
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x
+
+
+def quantize_kernel(kernel: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-output-channel int8 quantization of a Dense kernel.
+    :return: (int8 kernel, float32 scale per output column) with kernel ~= q * scale.
+    """
+    scale = np.max(np.abs(kernel), axis=0) / 127.0
+    scale[scale == 0.0] = 1.0
+    q = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+class QuantizedDenseInferenceEngine:
+    """
+    DenseInferenceEngine with int8 kernels and a float32 scale per output channel; biases and
+    activations stay float32. The weights take about a quarter of the memory, and outputs differ
+    from the float32 engine by the kernel rounding only. Kernels stay int8 in memory; NumPy
+    upcasts them inside each matmul.
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, np.ndarray, str]]) -> None:
+        """
+        :param layers: Sequence of (int8 kernel, scale, bias, activation name) tuples.
+        """
+        for _, _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{activation}' for NumPy inference.")
+        self.layers = layers
+        self.input_dim = layers[0][0].shape[0]
+        self.output_dim = layers[-1][0].shape[1]
+
+    @classmethod
+    def from_engine(cls, engine: DenseInferenceEngine) -> 'QuantizedDenseInferenceEngine':
+        return cls([quantize_kernel(kernel) + (bias, activation) for kernel, bias, activation in engine.layers])
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'QuantizedDenseInferenceEngine':
+        return cls.from_engine(DenseInferenceEngine.from_model(model))
+
+    def sync(self, model: Any) -> None:
+        """Re-quantize the weights after the Keras model has been trained."""
+        self.layers = self.from_model(model).layers
+
+    @property
+    def nbytes(self) -> int:
+        return sum(q.nbytes + scale.nbytes + bias.nbytes for q, scale, bias, _ in self.layers)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        x = np.asarray(batch, dtype=np.float32)
+        for q, scale, bias, activation in self.layers:
+            x = ACTIVATIONS[activation]((x @ q) * scale + bias)
+        return x
+
+
+class BayesianInferenceEngine:
+    """
+    Monte-Carlo forward passes of a stack of mean-field variational Dense layers
+    (tfp.layers.DenseVariational) in NumPy. The posterior means and standard deviations are read
+    once from the model; each call then draws K weight sets and evaluates all K networks for the
+    whole batch with batched matmuls, instead of K separate stochastic model calls.
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, int, str]], seed: Optional[int] = None) -> None:
+        """
+        :param layers: Sequence of (posterior loc, posterior scale, units, activation name) tuples; loc
+                       and scale hold the flattened kernel followed by the bias, as in DenseVariational.
+        """
+        for _, _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{activation}' for NumPy inference.")
+        self.layers = layers
+        self.input_dim = layers[0][0].size // layers[0][2] - 1
+        self.output_dim = layers[-1][2]
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def supports(model: Any) -> bool:
+        """Return True if every layer is a DenseVariational layer with a known activation."""
+        layers = getattr(model, 'layers', None)
+        if not layers:
+            return False
+        return all(type(layer).__name__ == 'DenseVariational'
+                   and getattr(layer.activation, '__name__', None) in ACTIVATIONS for layer in layers)
+
+    @classmethod
+    def from_model(cls, model: Any, seed: Optional[int] = None) -> 'BayesianInferenceEngine':
+        return cls(cls._export_layers(model), seed)
+
+    @staticmethod
+    def _export_layers(model: Any) -> List[Tuple[np.ndarray, np.ndarray, int, str]]:
+        layers = []
+        for layer in model.layers:
+            # The posterior ignores its input; the call returns the current Independent(Normal) distribution.
+            posterior = layer._posterior(np.zeros((1,), dtype=np.float32)).distribution
+            layers.append((
+                np.asarray(posterior.loc, dtype=np.float32).ravel(),
+                np.asarray(posterior.scale, dtype=np.float32).ravel(),
+                int(layer.units),
+                layer.activation.__name__,
+            ))
+        return layers
+
+    def sync(self, model: Any) -> None:
+        """Reload the posterior after the Keras model has been trained."""
+        self.layers = self._export_layers(model)
+
+    def sample(self, batch: np.ndarray, samples: int) -> np.ndarray:
+        """
+        :param batch: Array of shape (n, input_dim).
+        :param samples: Number K of weight sets drawn from the posterior.
+        :return: Model outputs of shape (K, n, output_dim).
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        for loc, scale, units, activation in self.layers:
+            weights = loc + scale * self.rng.standard_normal((samples, loc.size), dtype=np.float32)
+            kernel = weights[:, :-units].reshape(samples, -1, units)
+            x = ACTIVATIONS[activation](x @ kernel + weights[:, None, -units:])
+        return x
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """One stochastic forward pass, like calling the Keras model."""
+        return self.sample(batch, 1)[0]
+
+
+class CompiledInferenceEngine:
+    """
+    Wraps a single-input Keras model in a `tf.function` with a fixed input signature,
+    so repeated calls reuse one traced graph instead of going through `Model.predict`.
+    """
+
+    def __init__(self, model: Any, input_dim: int) -> None:
+        import tensorflow as tf
+
+        self.model = model
+        self.input_dim = input_dim
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec(shape=[None, input_dim], dtype=tf.float32)],
+        )
+
+    def sync(self, model: Any) -> None:
+        """Variables are shared with the Keras model, so nothing needs reloading."""
+        self.model = model
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        outputs = self._fn(np.asarray(batch, dtype=np.float32))
+        return np.asarray(outputs).reshape(len(batch), -1)
+
+
+def build_inference_engine(model: Any, input_dim: int) -> Optional[Any]:
+    """
+    Select the fastest available inference engine for a model.
+    Dense-only and DenseVariational-only networks run in NumPy; other single-input models run
+    through a traced graph.
+    :return: An engine exposing `predict(batch)` and `sync(model)`, or None if neither applies.
+    """
+    if DenseInferenceEngine.supports(model):
+        logger.info("Using NumPy inference engine.")
+        return DenseInferenceEngine.from_model(model)
+    if BayesianInferenceEngine.supports(model):
+        logger.info("Using NumPy Monte-Carlo inference engine.")
+        return BayesianInferenceEngine.from_model(model)
+    if len(getattr(model, 'inputs', None) or []) == 1:
+        try:
+            engine = CompiledInferenceEngine(model, input_dim)
+            engine.predict(np.zeros((1, input_dim), dtype=np.float32))
+        except Exception as exc:  # Model cannot be traced with a flat input signature.
+            logger.warning(f"Compiled inference unavailable, falling back to Keras predict: {exc}")
+            return None
+        logger.info("Using compiled tf.function inference engine.")
+        return engine
+    return None
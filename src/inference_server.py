@@ -0,0 +1,187 @@
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .ai_tuner import directions_from_predictions
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from ai_tuner import directions_from_predictions
+    from instrumentation import Instrumentation, default_instrumentation
+
+logger = logging.getLogger(__name__)
+
+_SHUTDOWN = None
+
+
+class InferenceServer:
+    """
+    In-process micro-batching front end for one AITuner. Callers (control loops, simulated cars)
+    submit single sensor vectors and get a Future; a worker thread coalesces pending requests
+    into one batch, up to `max_batch_size` requests or until the oldest request has waited
+    `max_latency` seconds, runs one batched model call and fans the directions back out.
+    """
+
+    def __init__(self, tuner: Any, max_batch_size: int = 64, max_latency: float = 0.002,
+                 instrumentation: Optional[Instrumentation] = None, name: str = 'inference_server') -> None:
+        """
+        :param tuner: AITuner (or any object with input_dim and predict_raw(batch)) with a single-output model.
+                      Batches are scored through its predict_adjustments when it has one, so models with a
+                      decision policy of their own (e.g. the 'bayesian' confidence gate) decide as they would
+                      when called directly.
+        :param max_batch_size: Most requests scored in one model call.
+        :param max_latency: Longest a request waits for its batch to fill, in seconds.
+        :param instrumentation: Receives per-request and per-batch latencies; defaults to the
+                                process-wide instrumentation.
+        :param name: Prefix of the instrumentation stages ('<name>.request', '<name>.batch').
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.tuner = tuner
+        self.input_dim = tuner.input_dim
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        # Probe once: rejects multi-output models up front and warms up the model.
+        outputs = np.asarray(tuner.predict_raw(np.zeros((1, self.input_dim), dtype=np.float32)))
+        if outputs.reshape(1, -1).shape[1] != 1:
+            raise ValueError(f"InferenceServer needs a single-output model; "
+                             f"model_type '{getattr(tuner, 'model_type', '?')}' has {outputs.size} outputs.")
+        self._predict_adjustments = getattr(tuner, 'predict_adjustments', None)
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self.name = name
+        self._request_stage = self.instrumentation.stage(f'{name}.request')
+        self._batch_stage = self.instrumentation.stage(f'{name}.batch')
+        self._batch = np.zeros((max_batch_size, self.input_dim), dtype=np.float32)
+        self._queue: 'queue.SimpleQueue[Optional[Tuple[np.ndarray, Future, float]]]' = queue.SimpleQueue()
+        self.requests = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.batch_size_counts = np.zeros(max_batch_size + 1, dtype=np.int64)
+        self._closed = False
+        # Makes the closed check and the enqueue atomic, so no request is queued after _SHUTDOWN.
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._serve, name=name, daemon=True)
+        self._worker.start()
+
+    def __enter__(self) -> 'InferenceServer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+    def submit(self, sensor_data: Sequence[float]) -> Future:
+        """
+        Queue one sensor vector for scoring.
+        :return: Future resolving to the tuning direction (+1, -1 or 0).
+        """
+        row = np.asarray(sensor_data, dtype=np.float32).reshape(self.input_dim)
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("InferenceServer has been shut down.")
+            self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def predict_adjustment(self, sensor_data: Sequence[float]) -> int:
+        """Blocking drop-in for AITuner.predict_adjustment, served through the batching queue."""
+        return self.submit(sensor_data).result()
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a batch."""
+        return self._queue.qsize()
+
+    def _serve(self) -> None:
+        pending: List[Tuple[np.ndarray, Future, float]] = []
+        while True:
+            request = self._queue.get()
+            if request is _SHUTDOWN:
+                return
+            pending.append(request)
+            deadline = request[2] + self.max_latency
+            shutting_down = False
+            while len(pending) < self.max_batch_size:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if request is _SHUTDOWN:
+                    shutting_down = True
+                    break
+                pending.append(request)
+            depth = self._queue.qsize() + len(pending)
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+            self._run_batch(pending)
+            pending.clear()
+            if shutting_down:
+                return
+
+    def _run_batch(self, pending: List[Tuple[np.ndarray, Future, float]]) -> None:
+        # Requests cancelled while queued (e.g. after a result() timeout) are dropped; the rest
+        # are marked running, so they can no longer be cancelled before their result is set.
+        pending = [request for request in pending if request[1].set_running_or_notify_cancel()]
+        n = len(pending)
+        if n == 0:
+            return
+        batch = self._batch[:n]
+        for i, (row, _, _) in enumerate(pending):
+            batch[i] = row
+        start = self.instrumentation.clock()
+        try:
+            if self._predict_adjustments is not None:
+                directions = np.asarray(self._predict_adjustments(batch)).reshape(n).tolist()
+            else:
+                directions = directions_from_predictions(
+                    np.asarray(self.tuner.predict_raw(batch)).reshape(n, -1)[:, 0]).tolist()
+        except Exception as exc:
+            logger.exception(f"Batched inference of {n} requests failed.")
+            for _, future, _ in pending:
+                future.set_exception(exc)
+            return
+        self.instrumentation.record(self._batch_stage, start, n)
+        self.batches += 1
+        self.requests += n
+        self.batch_size_counts[n] += 1
+        for (_, future, submitted), direction in zip(pending, directions):
+            future.set_result(direction)
+            self.instrumentation.observe(self._request_stage, time.perf_counter() - submitted)
+
+    def stats(self) -> Dict[str, float]:
+        """Requests, batches, batch-size distribution summary, queue depth and latencies (seconds)."""
+        sizes = np.arange(self.max_batch_size + 1)
+        summary = self.instrumentation.summary()
+        request_stats = summary[f'{self.name}.request']
+        batch_stats = summary[f'{self.name}.batch']
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'max_batch_size': int(sizes[self.batch_size_counts > 0].max()) if self.batches else 0,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'request_latency_p50': request_stats['p50'],
+            'request_latency_p99': request_stats['p99'],
+            'request_latency_max': request_stats['max'],
+            'batch_latency_mean': batch_stats['mean'],
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting requests; requests already queued are still answered."""
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_SHUTDOWN)
+        if wait:
+            self._worker.join()
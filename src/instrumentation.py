@@ -0,0 +1,208 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper edges: 100 ns to 10 s, eight buckets per decade.
+LATENCY_EDGES: List[float] = [10.0 ** (exponent / 8.0) for exponent in range(-56, 9)]
+
+
+class Instrumentation:
+    """
+    Low-overhead hot-path instrumentation: per-stage call counters, latency histograms and an
+    in-memory ring buffer of recent decisions. Everything is preallocated; recording a decision
+    costs a clock read, a bisect and a few list stores, and never formats a string. The hot path
+    uses plain lists (indexing a list is several times cheaper than a NumPy scalar store); the
+    summary and dump convert to arrays.
+
+    Thread-safe: the scheduler thread and background writers (online trainer, inference server,
+    shadow pool callbacks) share one instance, so every update is made under a lock. Uncontended,
+    it adds about half a microsecond per record.
+    """
+
+    def __init__(self, max_stages: int = 64, event_capacity: int = 65536) -> None:
+        """
+        :param max_stages: Maximum number of distinct stages that can be registered.
+        :param event_capacity: Decisions kept in the event ring buffer.
+        """
+        self.stage_names: List[str] = []
+        self._stage_ids: Dict[str, int] = {}
+        self.max_stages = max_stages
+        self.counts = [0] * max_stages
+        self.total_latency = [0.0] * max_stages
+        self.max_latency = [0.0] * max_stages
+        self.histogram = [[0] * (len(LATENCY_EDGES) + 1) for _ in range(max_stages)]
+        self.event_capacity = event_capacity
+        self.event_time = [0.0] * event_capacity
+        self.event_stage = [0] * event_capacity
+        self.event_value = [0.0] * event_capacity
+        self.events_recorded = 0
+        self._next_event = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clock() -> float:
+        return time.perf_counter()
+
+    def stage(self, name: str) -> int:
+        """Register (or look up) a stage and return its id for use on the hot path."""
+        with self._lock:
+            stage_id = self._stage_ids.get(name)
+            if stage_id is None:
+                stage_id = len(self.stage_names)
+                if stage_id >= self.max_stages:
+                    raise ValueError(f"Too many instrumentation stages (max {self.max_stages}).")
+                self.stage_names.append(name)
+                self._stage_ids[name] = stage_id
+            return stage_id
+
+    def observe(self, stage_id: int, latency: float) -> None:
+        """Count one call of a stage and add its latency (seconds) to the histogram."""
+        bucket = bisect_right(LATENCY_EDGES, latency)
+        with self._lock:
+            self.counts[stage_id] += 1
+            self.total_latency[stage_id] += latency
+            if latency > self.max_latency[stage_id]:
+                self.max_latency[stage_id] = latency
+            self.histogram[stage_id][bucket] += 1
+
+    def record(self, stage_id: int, start: float, value: float = 0.0) -> None:
+        """
+        Record a decision: the stage's latency since `start` (a `clock()` reading) and the
+        decided value, appended to the event ring buffer.
+        """
+        now = time.perf_counter()
+        latency = now - start
+        bucket = bisect_right(LATENCY_EDGES, latency)
+        with self._lock:
+            self.counts[stage_id] += 1
+            self.total_latency[stage_id] += latency
+            if latency > self.max_latency[stage_id]:
+                self.max_latency[stage_id] = latency
+            self.histogram[stage_id][bucket] += 1
+            index = self._next_event
+            self.event_time[index] = now
+            self.event_stage[index] = stage_id
+            self.event_value[index] = value
+            self._next_event = (index + 1) % self.event_capacity
+            self.events_recorded += 1
+
+    def percentile(self, stage_id: int, q: float) -> float:
+        """Latency percentile (0-100) estimated from the histogram bucket upper edges."""
+        cumulative = np.cumsum(self.histogram[stage_id])
+        if cumulative[-1] == 0:
+            return 0.0
+        bucket = int(np.searchsorted(cumulative, q / 100.0 * cumulative[-1]))
+        if bucket >= len(LATENCY_EDGES):
+            return self.max_latency[stage_id]
+        return min(LATENCY_EDGES[bucket], self.max_latency[stage_id])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count and latency statistics (seconds)."""
+        stats = {}
+        with self._lock:
+            for stage_id, name in enumerate(self.stage_names):
+                count = self.counts[stage_id]
+                stats[name] = {
+                    'count': count,
+                    'mean': self.total_latency[stage_id] / count if count else 0.0,
+                    'p50': self.percentile(stage_id, 50),
+                    'p99': self.percentile(stage_id, 99),
+                    'max': self.max_latency[stage_id],
+                }
+        return stats
+
+    def format_summary(self) -> str:
+        lines = []
+        for name, stats in self.summary().items():
+            if stats['count']:
+                lines.append(f"{name}: n={stats['count']} mean={stats['mean'] * 1e6:.1f}us "
+                             f"p50<={stats['p50'] * 1e6:.1f}us p99<={stats['p99'] * 1e6:.1f}us "
+                             f"max={stats['max'] * 1e6:.1f}us")
+        return '\n'.join(lines)
+
+    def log_summary(self) -> None:
+        """Write the periodic summary to the log (called by a low-rate task, not per decision)."""
+        text = self.format_summary()
+        if text:
+            logger.info(f"Instrumentation summary:\n{text}")
+
+    def events(self, last: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Copy of the buffered decisions in chronological order.
+        :param last: Only return the most recent `last` events.
+        :return: Columns 'time', 'stage' (names) and 'value'.
+        """
+        with self._lock:
+            available = min(self.events_recorded, self.event_capacity)
+            n = available if last is None else min(last, available)
+            order = np.arange(self._next_event - n, self._next_event) % self.event_capacity
+            names = np.array(self.stage_names + [''], dtype=object)
+            return {
+                'time': np.array(self.event_time)[order],
+                'stage': names[np.array(self.event_stage, dtype=np.intp)[order]],
+                'value': np.array(self.event_value)[order],
+            }
+
+    def dump(self, path: str) -> None:
+        """Save counters, histograms and buffered events to a .npz file."""
+        events = self.events()
+        np.savez(
+            path,
+            stage_names=np.array(self.stage_names),
+            counts=np.array(self.counts[:len(self.stage_names)], dtype=np.int64),
+            histogram=np.array(self.histogram[:len(self.stage_names)], dtype=np.int64).reshape(-1, len(LATENCY_EDGES) + 1),
+            latency_edges=np.array(LATENCY_EDGES),
+            event_time=events['time'],
+            event_stage=events['stage'].astype(str),
+            event_value=events['value'],
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            for stage_id in range(self.max_stages):
+                self.counts[stage_id] = 0
+                self.total_latency[stage_id] = 0.0
+                self.max_latency[stage_id] = 0.0
+                self.histogram[stage_id][:] = [0] * (len(LATENCY_EDGES) + 1)
+            self.events_recorded = 0
+            self._next_event = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled (e.g. into replay worker processes); each copy gets its own.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, for offline runs where even counters are overhead."""
+
+    def __init__(self) -> None:
+        super().__init__(max_stages=1, event_capacity=1)
+
+    def stage(self, name: str) -> int:
+        return 0
+
+    def observe(self, stage_id: int, latency: float) -> None:
+        pass
+
+    def record(self, stage_id: int, start: float, value: float = 0.0) -> None:
+        pass
+
+
+_default_instrumentation = Instrumentation()
+
+
+def default_instrumentation() -> Instrumentation:
+    """Process-wide instrumentation used by controllers that are not given their own."""
+    return _default_instrumentation
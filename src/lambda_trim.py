@@ -0,0 +1,261 @@
+"""
+Adaptive lambda control: a fast PI short-term fuel trim and a long-term trim table over RPM x load
+that learns the fueling error of each operating point from streaming or logged lambda samples.
+
+Trims are fuel corrections: +0.05 means 5 % more fuel. A lean reading (lambda above target)
+raises the trim. The long-term table is learned per cell, so corrections learned at one operating
+point no longer move the fueling everywhere else, and `write_back` folds them into the fuel map.
+"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+try:
+    from .calibration_store import CalibrationStore
+    from .calibration_table import CalibrationTable, OperatingPoint
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from calibration_store import CalibrationStore
+    from calibration_table import CalibrationTable, OperatingPoint
+    from instrumentation import Instrumentation, default_instrumentation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPM_AXIS = [1000, 2000, 3000, 4000, 5000, 6000, 7000, 8000]
+DEFAULT_LOAD_AXIS = [0.2, 0.4, 0.6, 0.8, 1.0]
+
+
+def required_correction(sensor_lambda: Any, applied: Any = 0.0, target_lambda: float = 1.0) -> Any:
+    """
+    Fuel correction that would have put a sample on target: fuel mass scales with 1 / lambda, so a
+    sample read with correction `applied` needed (1 + applied) * lambda / target - 1.
+    """
+    return (1.0 + np.asarray(applied)) * np.asarray(sensor_lambda) / target_lambda - 1.0
+
+
+class ShortTermTrim:
+    """
+    PI fuel trim on the lambda error, with both gains scheduled over RPM: the exhaust transport
+    delay shrinks as engine speed rises, so higher RPM tolerates (and needs) faster correction.
+    The integrator is clamped to the trim limit (anti-windup).
+    """
+
+    def __init__(self, kp: float = 0.2, ki: float = 4.0, limit: float = 0.25, target_lambda: float = 1.0,
+                 rpm_schedule: Sequence[float] = (1000, 8000), gain_schedule: Sequence[float] = (0.5, 1.5)) -> None:
+        """
+        :param kp: Proportional gain (trim per unit relative lambda error).
+        :param ki: Integral gain per second.
+        :param limit: Largest trim magnitude.
+        :param rpm_schedule: RPM breakpoints of the gain schedule.
+        :param gain_schedule: Gain factor at each breakpoint, interpolated between them.
+        """
+        self.kp = kp
+        self.ki = ki
+        self.limit = limit
+        self.target_lambda = target_lambda
+        self.rpm_schedule = [float(rpm) for rpm in rpm_schedule]
+        self.gain_schedule = [float(gain) for gain in gain_schedule]
+        self.integral = 0.0
+        self.trim = 0.0
+
+    def gain(self, rpm: float) -> float:
+        return float(np.interp(rpm, self.rpm_schedule, self.gain_schedule))
+
+    def update(self, sensor_lambda: float, rpm: float, dt: float = 0.01) -> float:
+        """
+        :param sensor_lambda: Measured lambda.
+        :param rpm: Engine speed, for the gain schedule.
+        :param dt: Seconds since the previous update.
+        :return: Updated short-term trim.
+        """
+        error = sensor_lambda / self.target_lambda - 1.0
+        gain = self.gain(rpm)
+        self.integral = min(max(self.integral + self.ki * gain * error * dt, -self.limit), self.limit)
+        self.trim = min(max(self.kp * gain * error + self.integral, -self.limit), self.limit)
+        return self.trim
+
+    def absorb(self, amount: float) -> None:
+        """Move `amount` of the integrated correction out of the short-term trim (into the long-term table)."""
+        self.integral -= amount
+        self.trim -= amount
+
+    def reset(self) -> None:
+        self.integral = 0.0
+        self.trim = 0.0
+
+
+class LongTermTrimTable:
+    """
+    Long-term fuel trims over an RPM x load grid. Each sample pulls the cells around its operating
+    point toward the correction it required, weighted by interpolation weight:
+    cell += rate * weight * (correction - cell), an exponentially weighted average per cell.
+
+    `update` takes a whole batch (e.g. a replayed log) in one vectorized call, with exactly the
+    result of learning the samples one at a time in order; `learn` is the single-sample path.
+    """
+
+    def __init__(self, rpm_axis: Sequence[float] = DEFAULT_RPM_AXIS, load_axis: Sequence[float] = DEFAULT_LOAD_AXIS,
+                 rate: float = 0.05, limit: float = 0.25, store: Optional[CalibrationStore] = None,
+                 name: str = 'lambda_trim') -> None:
+        """
+        :param rate: Learning rate of a sample on a cell it sits on exactly.
+        :param limit: Largest trim magnitude of a cell.
+        :param store: Calibration store holding a 2-D `name` table (axes in RPM, load order) to learn in
+                      place, so the trims are committed with the map; by default an in-memory table over
+                      `rpm_axis` x `load_axis` is created.
+        """
+        if not 0.0 < rate < 1.0:
+            raise ValueError(f"Learning rate must be in (0, 1), got {rate}.")
+        if store is None:
+            store = CalibrationStore.create({name: {
+                'axes': {'rpm': [float(x) for x in rpm_axis], 'load': [float(x) for x in load_axis]},
+                'values': np.zeros((len(rpm_axis), len(load_axis))).tolist(),
+            }})
+        self.table = CalibrationTable(store, name)
+        if self.table.ndim != 2:
+            raise ValueError(f"'{name}' must be a 2-D (RPM x load) table.")
+        self.store = store
+        self.name = name
+        self.rate = rate
+        self.limit = limit
+        self.samples = 0
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.table.values
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.values.shape
+
+    def lookup(self, point: OperatingPoint) -> float:
+        return self.table.lookup(point)
+
+    def lookup_batch(self, points: Any) -> np.ndarray:
+        return self.table.lookup_batch(points)
+
+    def learn(self, point: OperatingPoint, correction: float) -> float:
+        """
+        Learn one sample.
+        :param point: (rpm, load) of the sample.
+        :param correction: Fuel correction the sample required (see required_correction).
+        :return: Updated trim at the operating point.
+        """
+        index, weights = self.table.neighbours(point)
+        index = tuple(i[0] for i in index)
+        target = min(max(correction, -self.limit), self.limit)
+        self.store.add_cells(self.name, index, self.rate * weights[0] * (target - self.values[index]))
+        self.samples += 1
+        return self.table.lookup(point)
+
+    def update(self, points: Any, corrections: Any) -> None:
+        """
+        Learn a batch of samples in time order.
+        :param points: Array-like of shape (n, 2) with (rpm, load) per sample.
+        :param corrections: Array-like of shape (n,) with the fuel correction each sample required.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            return
+        corrections = np.clip(np.broadcast_to(np.asarray(corrections, dtype=np.float64), (len(points),)),
+                              -self.limit, self.limit)
+        index, weights = self.table.neighbours(points)
+        # Each (sample, corner) is one step cell <- (1 - a) * cell + a * x with a = rate * weight.
+        # Sorting by cell (stably, keeping time order) turns the steps into one linear recurrence per
+        # cell: cell_final = prod(1 - a) * cell + sum(a_i * x_i * prod_{j > i}(1 - a_j)).
+        flat = np.ravel_multi_index(index, self.shape).ravel()
+        a = self.rate * weights.ravel()
+        order = np.argsort(flat, kind='stable')
+        flat, a = flat[order], a[order]
+        b = a * np.repeat(corrections, weights.shape[1])[order]
+        log_decay = np.log1p(-a)
+        starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]])
+        cumulative = np.cumsum(log_decay)
+        ends = np.r_[starts[1:], len(flat)] - 1
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(flat)]))
+        later = cumulative[ends][group] - cumulative  # Sum of log(1 - a_j) over later steps of the same cell.
+        cells = flat[starts]
+        decay = np.exp(cumulative[ends] - np.r_[0.0, cumulative[ends[:-1]]])
+        current = self.values.ravel()[cells]
+        updated = decay * current + np.add.reduceat(b * np.exp(later), starts)
+        self.store.set_cells(self.name, np.unravel_index(cells, self.shape), updated)
+        self.samples += len(points)
+
+    def write_back(self, store: CalibrationStore, parameter: str = 'fuel_map') -> None:
+        """
+        Fold the learned trims into a fuel parameter of the calibration map and clear them.
+        A table parameter with 'rpm' and 'load' axes is scaled cell by cell by (1 + trim) at its own
+        breakpoints; a scalar parameter is scaled by the mean trim.
+        """
+        axes = store.axes(parameter)
+        if axes:
+            if set(axes) != {'rpm', 'load'}:
+                raise ValueError(f"'{parameter}' must be an RPM x load table to take lambda trims.")
+            grid = np.meshgrid(*[np.asarray(axes[axis], dtype=np.float64) for axis in axes], indexing='ij')
+            columns = {axis: coordinates.ravel() for axis, coordinates in zip(axes, grid)}
+            trims = self.lookup_batch(np.column_stack([columns['rpm'], columns['load']])).reshape(grid[0].shape)
+            store[parameter] = store.table(parameter) * (1.0 + trims)
+        elif not store.shape(parameter):
+            store[parameter] = store[parameter] * (1.0 + float(self.values.mean()))
+        else:
+            raise ValueError(f"'{parameter}' has no lookup axes to map lambda trims onto.")
+        self.store[self.name] = 0.0
+        logger.info(f"Lambda trims folded into '{parameter}' ({self.samples} samples learned).")
+
+
+class AdaptiveLambdaController:
+    """
+    Short-term PI trim plus long-term per-cell trims. Each sample teaches the long-term table the
+    correction it required; whatever the table learns at the current point is taken back out of the
+    short-term integrator, so the total correction stays continuous while the short-term trim
+    decays toward zero and the table holds the learned fueling error.
+    """
+
+    def __init__(self, table: Optional[LongTermTrimTable] = None, short_term: Optional[ShortTermTrim] = None,
+                 target_lambda: float = 1.0, instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param instrumentation: Receives each update's latency and total correction; defaults to the
+                                process-wide instrumentation.
+        """
+        self.table = table if table is not None else LongTermTrimTable()
+        self.short_term = short_term if short_term is not None else ShortTermTrim(target_lambda=target_lambda)
+        self.short_term.target_lambda = target_lambda
+        self.target_lambda = target_lambda
+        self.correction = 0.0
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stage = self.instrumentation.stage('lambda.adaptive_update')
+
+    def update(self, sensor_lambda: float, rpm: float, load: float, dt: float = 0.01) -> float:
+        """
+        :param sensor_lambda: Measured lambda, read with the correction returned by the previous update.
+        :return: Total fuel correction to apply (long-term trim at the point plus short-term trim).
+        """
+        start = self.instrumentation.clock()
+        point = (rpm, load)
+        before = self.table.lookup(point)
+        learned = self.table.learn(point, required_correction(sensor_lambda, self.correction, self.target_lambda))
+        self.short_term.absorb(learned - before)
+        self.correction = learned + self.short_term.update(sensor_lambda, rpm, dt)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Fuel correction {self.correction:+.4f} at {rpm:.0f} rpm, load {load:.2f} "
+                         f"(long-term {learned:+.4f}, lambda {sensor_lambda:.3f})")
+        self.instrumentation.record(self._stage, start, self.correction)
+        return self.correction
+
+    def learn_log(self, points: Any, sensor_lambda: Any, applied: Any = 0.0) -> None:
+        """
+        Learn long-term trims from a recorded log in one call.
+        :param points: (rpm, load) per sample, shape (n, 2).
+        :param sensor_lambda: Measured lambda per sample.
+        :param applied: Fuel correction active when each sample was recorded (0 for logs without trims).
+        """
+        self.table.update(points, required_correction(sensor_lambda, applied, self.target_lambda))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'correction': float(self.correction),
+            'short_term': float(self.short_term.trim),
+            'samples': self.table.samples,
+            'max_long_term': float(np.abs(self.table.values).max()),
+        }
@@ -1,17 +1,29 @@
-from typing import Any
+from typing import Any, Optional
 import logging
 
+import numpy as np
+
+try:
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from instrumentation import Instrumentation, default_instrumentation
+
 logger = logging.getLogger(__name__)
 
 class ActiveLamdaController:
-    def __init__(self, target_lambda: float = 1.0, adjustment_step: float = 0.01) -> None:
+    def __init__(self, target_lambda: float = 1.0, adjustment_step: float = 0.01,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
         """
         Initialize the Active Lambda Controller.
         :param target_lambda: Desired lambda value (1.0 is typically stoichiometric).
         :param adjustment_step: The gradient step for adjusting the lambda target.
+        :param instrumentation: Receives each update's latency and target; defaults to the
+                                process-wide instrumentation.
         """
         self.target_lambda = target_lambda
         self.adjustment_step = adjustment_step
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stage = self.instrumentation.stage('lambda.update_lambda')
 
     def update_lambda(self, sensor_lambda: float, tolerance: float = 0.05) -> float:
         """
@@ -20,14 +32,46 @@ class ActiveLamdaController:
         :param tolerance: Allowable margin before adjustment.
         :return: Updated lambda target.
         """
+        start = self.instrumentation.clock()
         error = sensor_lambda - self.target_lambda
         if abs(error) > tolerance:
             if error > 0:
                 self.target_lambda -= self.adjustment_step  # Enrich by lowering target
             else:
                 self.target_lambda += self.adjustment_step  # Lean out by raising target
-            logger.info(f"Lambda target adjusted to {self.target_lambda:.3f} (error: {error:.3f})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Lambda target adjusted to {self.target_lambda:.3f} (error: {error:.3f})")
+        self.instrumentation.record(self._stage, start, self.target_lambda)
         return self.target_lambda
 
     def get_current_target(self) -> float:
         return self.target_lambda
+
+
+class LambdaFleetController:
+    """
+    Array-based ActiveLamdaController for N cars (or N replayed sessions) at once.
+    Targets evolve exactly as N independent scalar controllers would.
+    """
+
+    def __init__(self, num_cars: int, target_lambda: float = 1.0, adjustment_step: float = 0.01) -> None:
+        self.target_lambda = np.full(num_cars, target_lambda, dtype=np.float64)
+        self.adjustment_step = adjustment_step
+        self._error = np.empty(num_cars, dtype=np.float64)
+        self._adjust = np.empty(num_cars, dtype=bool)
+
+    def update_lambda(self, sensor_lambda: np.ndarray, tolerance: float = 0.05) -> np.ndarray:
+        """
+        :param sensor_lambda: Array of shape (N,) with each car's measured lambda.
+        :param tolerance: Allowable margin before adjustment.
+        :return: Updated lambda targets, shape (N,).
+        """
+        error = np.subtract(sensor_lambda, self.target_lambda, out=self._error)
+        adjust = np.greater(np.abs(error), tolerance, out=self._adjust)
+        # Enrich by lowering the target where lean, lean out by raising it where rich.
+        np.subtract(self.target_lambda, self.adjustment_step, out=self.target_lambda, where=adjust & (error > 0))
+        np.add(self.target_lambda, self.adjustment_step, out=self.target_lambda, where=adjust & (error < 0))
+        return self.target_lambda
+
+    def get_current_target(self) -> np.ndarray:
+        return self.target_lambda
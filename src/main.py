@@ -1,81 +1,293 @@
-import time
+import argparse
+import itertools
 import logging
+from typing import List, Optional, Tuple, TYPE_CHECKING
+import numpy as np
 from base_map import BaseMap
+from calibration_journal import CalibrationJournal
+from can_bus import DEFAULT_DBC, CanReader, SignalDatabase
 from tuning import Tuner
-from ai_tuner import AITuner
-from detuner import Detuner
+from detuner import DEFAULT_RULES_PATH, DegradationRules, Detuner
 from aero_controller import AeroController
+from anomaly_gate import AnomalyGate
 from lamda_controller import ActiveLamdaController
+from instrumentation import default_instrumentation
+from online_learning import OnlineTrainer, lambda_outcome
+from scheduler import ControlScheduler
+from shadow_ensemble import ShadowEnsemble
+from sensor_stream import SensorHub, read_csv
+
+if TYPE_CHECKING:
+    from ai_tuner import AITuner
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main() -> None:
+# Release rate of each control task.
+TASK_RATES_HZ = {
+    'sensors': 100.0,
+    'lambda': 100.0,
+    'aero': 50.0,
+    'ai_tuning': 5.0,
+    'anomaly_gate': 10.0,
+    'detune': 1.0,
+    'persist_map': 1.0,
+    'instrumentation': 0.1,
+}
+
+# Loggers whose per-decision lines are only emitted with --log-decisions.
+DECISION_LOGGERS = ['tuning', 'detuner', 'aero_controller', 'lamda_controller', __name__]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="n.Tec-5 real-time control loop.")
+    parser.add_argument('--no-ai', action='store_true',
+                        help="Run the control loop without the AI tuner (TensorFlow is never imported).")
+    parser.add_argument('--model-type', default='default', help="AITuner model_type to use.")
+    parser.add_argument('--duration', type=float, default=0.0,
+                        help="Seconds to run the control loop for (0 runs forever).")
+    parser.add_argument('--replay', default=None,
+                        help="CSV telemetry log to stream into the sensor buffers instead of simulated data.")
+    parser.add_argument('--model-cache', default='model_cache',
+                        help="Directory of cached AI Tuner models (empty string disables the cache).")
+    parser.add_argument('--log-decisions', action='store_true',
+                        help="Log every controller decision (costly at control-loop rates).")
+    parser.add_argument('--metrics-dump', default=None,
+                        help="Write instrumentation counters, histograms and recent events to this .npz file on exit.")
+    parser.add_argument('--anomaly-gate', action='store_true',
+                        help="Score incoming sensor rows with an autoencoder and hold AI map changes on anomalies.")
+    parser.add_argument('--online-learning', action='store_true',
+                        help="Train the AI tuner in the background from the lambda outcome of its adjustments.")
+    parser.add_argument('--sequence-window', type=int, default=None,
+                        help="Feed the last N sensor frames to the 'lstm', 'hybrid_cnn_lstm' or 'transformer' "
+                             "model, one frame per AI tick.")
+    parser.add_argument('--can-channel', default=None,
+                        help="Read telemetry from this CAN channel instead of simulated data (needs python-can).")
+    parser.add_argument('--can-interface', default='virtual', help="python-can interface (virtual, socketcan, ...).")
+    parser.add_argument('--can-dbc', default=DEFAULT_DBC, help="DBC file defining the telemetry signals.")
+    parser.add_argument('--detune-rules', default=DEFAULT_RULES_PATH,
+                        help="YAML rules mapping degraded parts to the parameters they detune.")
+    parser.add_argument('--journal', default=None,
+                        help="Directory of an append-only journal of every calibration change (for rollback and audits).")
+    parser.add_argument('--shadow-models', nargs='+', default=None,
+                        help="AITuner model_types scored in shadow mode next to --model-type (agreement and latency only).")
+    parser.add_argument('--shadow-executor', default='thread', choices=['thread', 'process'],
+                        help="Pool that runs the shadow models.")
+    return parser.parse_args(argv)
+
+def create_ai_tuner(model_type: str = 'default', cache_dir: Optional[str] = None,
+                    window: Optional[int] = None) -> Optional["AITuner"]:
+    """
+    Build the AI tuner, falling back to no-AI mode if TensorFlow is unavailable.
+    The import is deferred so that --no-ai runs never load TensorFlow.
+    :param cache_dir: Model cache directory; a warm cache restores the previous weights
+                      (and skips TensorFlow entirely for Dense-only models).
+    :param window: Sensor frames seen by a windowed sequence model (see AITuner.predict_step).
+    """
+    try:
+        from ai_tuner import AITuner
+        from model_cache import ModelCache
+        cache = ModelCache(cache_dir) if cache_dir else None
+        hyperparameters = {'window': window} if window else None
+        return AITuner(input_dim=5, model_type=model_type, cache=cache, hyperparameters=hyperparameters)
+    except ImportError as exc:
+        logger.warning(f"AI tuner unavailable ({exc}); running without AI tuning.")
+        return None
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.log_decisions:
+        for name in DECISION_LOGGERS:
+            logging.getLogger(name).setLevel(logging.DEBUG)
+    instrumentation = default_instrumentation()
+    log_decisions = logger.isEnabledFor(logging.DEBUG)
+
     # Load the base calibration map.
-    base_map_instance = BaseMap()
+    base_map_instance = BaseMap(store_path='configs/base_map.cal')
     base_map = base_map_instance.get_map()
     
     # Initialize modules with configuration parameters.
     tuner = Tuner(base_map, gradient_step=0.01)
-    ai_tuner = AITuner(input_dim=5)
-    detuner = Detuner(base_map, gradient_step=0.01)
+    ai_tuner = None if args.no_ai else create_ai_tuner(args.model_type, args.model_cache, args.sequence_window)
+    detuner = Detuner(base_map, gradient_step=0.01, rules=DegradationRules.load(args.detune_rules))
+    journal = CalibrationJournal(args.journal, base_map) if args.journal else None
     aero_controller = AeroController()
     lamda_controller = ActiveLamdaController(target_lambda=1.0, adjustment_step=0.01)
-    
-    # Main control loop.
-    while True:
-        # Simulated sensor data (replace with real sensor inputs).
-        sensor_data = {
-            'steering_angle': 0.5,
-            'throttle_position': 0.7,
-            'brake_pressure': 0.2,
-            'accelerometer': [0.3, 0.4, 0.5],
-            'wheel_speeds': [90, 92, 88, 91],
-            'vehicle_speed': 100,
-            'lap_time': 75  # seconds
-        }
-        
-        # AI-based tuning for "fuel_map".
-        sensor_input = [0.5, 0.7, 0.2, 0.3, 0.9]  # Replace with actual sensor input.
-        adjustment_direction = ai_tuner.predict_adjustment(sensor_input)
+    anomaly_gate = None
+    if ai_tuner is not None and args.anomaly_gate:
+        autoencoder = ai_tuner.autoencoder or ai_tuner.build_autoencoder(ai_tuner.input_dim)
+        anomaly_gate = AnomalyGate(autoencoder, instrumentation=instrumentation)
+        tuner.gate = anomaly_gate
+    online_trainer = None
+    if ai_tuner is not None and args.online_learning:
+        try:
+            online_trainer = OnlineTrainer(ai_tuner, instrumentation=instrumentation)
+        except ValueError as exc:
+            logger.warning(f"Online learning unavailable: {exc}")
+    shadow_ensemble = None
+    if ai_tuner is not None and args.shadow_models:
+        if ai_tuner.window is not None:
+            logger.warning("Shadow evaluation scores single snapshots; ignoring --shadow-models for a windowed model.")
+        else:
+            shadows = {}
+            for name in args.shadow_models:
+                shadow = create_ai_tuner(name, args.model_cache)
+                if shadow is None:
+                    logger.warning(f"Shadow model '{name}' could not be built; evaluating without it.")
+                else:
+                    shadows[name] = shadow
+            if shadows:
+                shadow_ensemble = ShadowEnsemble(ai_tuner, shadows, executor=args.shadow_executor,
+                                                 instrumentation=instrumentation)
+
+    # Sensor ingestion: telemetry rows stream into per-channel ring buffers that the controllers read.
+    sensors = SensorHub()
+    can_reader = None
+    if args.replay:
+        telemetry = read_csv(args.replay)
+    elif args.can_channel:
+        can_reader = CanReader(SignalDatabase.load(args.can_dbc), channel=args.can_channel,
+                               interface=args.can_interface)
+        telemetry = can_reader.rows()
+    else:
+        # Simulated telemetry (steering, throttle, brake, accelerometer xyz, wheel speeds, lambda, speed).
+        telemetry = itertools.repeat([0.5, 0.7, 0.2, 0.3, 0.4, 0.5, 90, 92, 88, 91, 1.05, 100])
+    lap_time = 75  # seconds
+    part_status = {
+        'turbocharger': True,      # Simulated degradation.
+        'fuel_injectors': False
+    }
+    brake_adjustments = np.zeros(4)
+
+    def sensor_task() -> None:
+        if sensors.ingest(telemetry, limit=1) == 0:
+            logger.info("Telemetry replay finished.")
+            scheduler.stop()
+
+    gate_rows = 0
+
+    def anomaly_gate_task() -> None:
+        # Score the sensor rows ingested since the previous check in one batch.
+        nonlocal gate_rows
+        total = sensors['lambda'].buffer.total
+        if total > gate_rows:
+            anomaly_gate.check(sensors.ai_window(total - gate_rows))
+            gate_rows = total
+
+    def lambda_task() -> None:
+        # Active Lambda Control from the latest lambda sensor reading.
+        lambda_sensor = sensors['lambda'].last_value()
+        updated_lambda_target = lamda_controller.update_lambda(lambda_sensor)
+        if log_decisions:
+            logger.debug(f"[Lambda] Updated target lambda: {updated_lambda_target:.3f} (Sensor reading: {lambda_sensor})")
+
+    def aero_task() -> None:
+        # Aero Controller: update DRS and braking stability.
+        drs_state = aero_controller.update_drs(sensors['vehicle_speed'].last_value(), lap_time)
+        aero_controller.update_braking_stability_array(sensors['wheel_speeds'].last(), out=brake_adjustments)
+        if log_decisions:
+            logger.debug(f"[Aero] DRS State: {'Active' if drs_state else 'Inactive'}")
+            logger.debug(f"[Aero] Brake Stability Adjustments: {brake_adjustments}")
+            logger.debug(f"[Aero] Aero Status: {aero_controller.get_aero_status()}")
+
+    def ai_inference() -> Tuple[np.ndarray, int]:
+        # The input row is copied because the online trainer keeps it with the decision.
+        sensor_row = sensors.ai_input().copy()
+        if ai_tuner.window is not None:
+            # One frame per tick; the model keeps the history of the previous ticks.
+            return sensor_row, ai_tuner.predict_adjustment_step(sensor_row)
+        if shadow_ensemble is not None:
+            # The primary decides; the row is also queued for the shadow models.
+            return sensor_row, shadow_ensemble.predict_adjustment(sensor_row)
+        return sensor_row, ai_tuner.predict_adjustment(sensor_row)
+
+    previous_decision = {}
+
+    def apply_ai_adjustment(decision: Tuple[np.ndarray, int]) -> None:
+        # AI-based tuning for "fuel_map"; runs in the scheduler thread once inference completes.
+        sensor_row, adjustment_direction = decision
+        if online_trainer is not None:
+            # The previous decision's outcome is the change in lambda error since it was applied.
+            lambda_error = abs(sensors['lambda'].last_value() - lamda_controller.target_lambda)
+            if previous_decision:
+                online_trainer.record(previous_decision['sensors'], previous_decision['direction'],
+                                      lambda_outcome(previous_decision['lambda_error'], lambda_error))
+            previous_decision.update(sensors=sensor_row, direction=adjustment_direction, lambda_error=lambda_error)
         if adjustment_direction != 0:
             try:
                 new_value = tuner.apply_gradient_increment("fuel_map", direction=adjustment_direction)
-                logger.info(f"[Tuning] Adjusted 'fuel_map' to {new_value:.3f} (direction: {adjustment_direction})")
+                if journal is not None:
+                    journal.capture('ai_tune')
+                if log_decisions:
+                    logger.debug(f"[Tuning] Adjusted 'fuel_map' to {new_value:.3f} (direction: {adjustment_direction})")
             except KeyError:
                 logger.warning("Parameter 'fuel_map' not found in base map. Skipping tuning.")
-        
-        # Check for part degradation and apply detuning.
-        part_status = {
-            'turbocharger': True,      # Simulated degradation.
-            'fuel_injectors': False
-        }
-        detune_params = detuner.check_part_degradation(part_status)
-        for param in detune_params:
-            try:
-                new_detuned_value = detuner.apply_detune(param)
-                logger.info(f"[Detune] Detuned '{param}' to {new_detuned_value:.3f} due to degradation.")
-            except KeyError:
-                logger.warning(f"Parameter '{param}' not found in base map. Skipping detune.")
-        
-        # Update base map file after tuning/detuning.
-        base_map_instance.update_map(tuner.get_updated_map())
-        
-        # Aero Controller: update DRS and braking stability.
-        drs_state = aero_controller.update_drs(sensor_data['vehicle_speed'], sensor_data['lap_time'])
-        logger.info(f"[Aero] DRS State: {'Active' if drs_state else 'Inactive'}")
-        brake_adjustments = aero_controller.update_braking_stability(sensor_data['wheel_speeds'])
-        logger.info(f"[Aero] Brake Stability Adjustments: {brake_adjustments}")
-        aero_status = aero_controller.get_aero_status()
-        logger.info(f"[Aero] Aero Status: {aero_status}")
-        
-        # Active Lambda Control: simulate lambda sensor reading.
-        simulated_lambda_sensor = 1.05  # Example: slightly lean condition.
-        updated_lambda_target = lamda_controller.update_lambda(simulated_lambda_sensor)
-        logger.info(f"[Lambda] Updated target lambda: {updated_lambda_target:.3f} (Sensor reading: {simulated_lambda_sensor})")
-        
-        # Sleep to simulate a real-time control loop.
-        time.sleep(2)
+
+    def detune_task() -> None:
+        # Check for part degradation and detune every affected parameter in one pass.
+        detuned = detuner.apply_health(part_status)
+        if detuned and journal is not None:
+            journal.capture('detune')
+        if log_decisions:
+            for param, step in detuned.items():
+                logger.debug(f"[Detune] Detuned '{param}' by {step:.3f} due to degradation.")
+
+    def persist_map_task() -> None:
+        base_map_instance.commit()
+        if journal is not None:
+            journal.flush()
+
+    scheduler = ControlScheduler(instrumentation=instrumentation)
+    scheduler.add_task('sensors', sensor_task, TASK_RATES_HZ['sensors'])
+    scheduler.add_task('lambda', lambda_task, TASK_RATES_HZ['lambda'])
+    scheduler.add_task('aero', aero_task, TASK_RATES_HZ['aero'])
+    if ai_tuner is not None:
+        # Model inference runs off the hot loop; the map update is applied on completion.
+        # At most one inference is in flight, so the shared AI input buffer is read by one worker at a time.
+        scheduler.add_task('ai_tuning', ai_inference, TASK_RATES_HZ['ai_tuning'], offload=True,
+                           on_complete=apply_ai_adjustment)
+    if anomaly_gate is not None:
+        scheduler.add_task('anomaly_gate', anomaly_gate_task, TASK_RATES_HZ['anomaly_gate'])
+    scheduler.add_task('detune', detune_task, TASK_RATES_HZ['detune'])
+    # Persist the changed calibration cells after tuning/detuning.
+    scheduler.add_task('persist_map', persist_map_task, TASK_RATES_HZ['persist_map'])
+    # Periodic latency/counter summary instead of per-decision log lines.
+    scheduler.add_task('instrumentation', instrumentation.log_summary, TASK_RATES_HZ['instrumentation'])
+
+    if online_trainer is not None:
+        online_trainer.start()
+    try:
+        if can_reader is not None:
+            # Fail at startup, not inside the sensor task, if the bus never delivers some signal.
+            can_reader.wait_for_signals()
+        scheduler.run(duration=args.duration if args.duration > 0 else None)
+    except KeyboardInterrupt:
+        logger.info("Control loop interrupted.")
+    finally:
+        scheduler.shutdown()
+        if can_reader is not None:
+            can_reader.close()
+        if online_trainer is not None:
+            online_trainer.stop()
+            logger.info(f"[Online learning] {online_trainer.stats()}")
+            if ai_tuner.cache is not None:
+                ai_tuner.save_to_cache()  # Keep the learned weights for the next start.
+        if anomaly_gate is not None:
+            logger.info(f"[Anomaly gate] {anomaly_gate.stats()}")
+        if shadow_ensemble is not None:
+            shadow_ensemble.shutdown()
+            for name, stats in shadow_ensemble.stats().items():
+                logger.info(f"[Shadow] {name}: {stats}")
+        for name, stats in scheduler.report().items():
+            logger.info(f"[Scheduler] {name}: {stats}")
+        instrumentation.log_summary()
+        if args.metrics_dump:
+            instrumentation.dump(args.metrics_dump)
+        # Keep the YAML map in sync for inspection and version control.
+        base_map_instance.commit()
+        base_map_instance.export_yaml()
+        if journal is not None:
+            logger.info(f"[Journal] {journal.stats()}")
+            journal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,173 @@
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import shutil
+import time
+
+try:
+    from .inference_engine import DenseInferenceEngine
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+WEIGHTS_FILE = 'model.weights.h5'
+ENGINE_FILE = 'engine.npz'
+
+
+class ModelArtifact:
+    """One cached AITuner model: trained weights plus, for Dense-only models, a NumPy engine."""
+
+    def __init__(self, path: str, meta: Dict[str, Any]) -> None:
+        self.path = path
+        self.meta = meta
+
+    @property
+    def weights_path(self) -> str:
+        return os.path.join(self.path, WEIGHTS_FILE)
+
+    @property
+    def has_engine(self) -> bool:
+        return bool(self.meta.get('engine'))
+
+    def load_engine(self) -> Optional[DenseInferenceEngine]:
+        """Inference-ready engine that needs no TensorFlow, or None if the model is not Dense-only."""
+        if not self.has_engine:
+            return None
+        return DenseInferenceEngine.load(os.path.join(self.path, ENGINE_FILE))
+
+    def load_weights(self, model: Any) -> None:
+        """Restore the cached weights into a freshly built model of the same architecture."""
+        model.load_weights(self.weights_path)
+
+
+class ModelCache:
+    """
+    On-disk cache of AITuner models keyed by model_type, input_dim and an architecture hash,
+    so a restart loads trained weights (and, for Dense-only models, a TensorFlow-free engine)
+    instead of starting from a new random initialisation. Artifacts for an outdated
+    architecture of the same model variant (model_type, input_dim and hyperparameters) are
+    removed when a new one is stored, and the least recently used artifacts are evicted
+    beyond `max_entries`.
+    """
+
+    def __init__(self, directory: str = 'model_cache', max_entries: int = 16) -> None:
+        """
+        :param directory: Directory holding one sub-directory per artifact.
+        :param max_entries: Most artifacts kept on disk.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.directory = directory
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(model_type: str, input_dim: int, architecture: str) -> str:
+        return f"{model_type}-in{input_dim}-{architecture[:16]}"
+
+    def _read_meta(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(path, META_FILE), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('format') == FORMAT_VERSION else None
+
+    def _write_meta(self, path: str, meta: Dict[str, Any]) -> None:
+        tmp_path = os.path.join(path, f"{META_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, META_FILE))
+
+    def load(self, model_type: str, input_dim: int, architecture: str) -> Optional[ModelArtifact]:
+        """
+        Look up an artifact and mark it as recently used.
+        :return: The artifact, or None on a cache miss.
+        """
+        path = os.path.join(self.directory, self.key(model_type, input_dim, architecture))
+        meta = self._read_meta(path)
+        if meta is None or meta.get('architecture') != architecture or not os.path.exists(os.path.join(path, WEIGHTS_FILE)):
+            return None
+        meta['last_used'] = time.time_ns()
+        self._write_meta(path, meta)
+        logger.info(f"Loaded cached '{model_type}' model from {path}.")
+        return ModelArtifact(path, meta)
+
+    def store(self, model_type: str, input_dim: int, architecture: str, model: Any,
+              engine: Optional[DenseInferenceEngine] = None, variant: str = '') -> ModelArtifact:
+        """
+        Save a model's weights (and optional NumPy engine), replacing any previous artifact atomically.
+        :param variant: Identifies a configuration of the model type (e.g. its hyperparameters); only
+                        artifacts of the same variant are superseded by this one.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.key(model_type, input_dim, architecture))
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        model.save_weights(os.path.join(tmp_path, WEIGHTS_FILE))
+        if engine is not None:
+            engine.save(os.path.join(tmp_path, ENGINE_FILE))
+        meta = {
+            'format': FORMAT_VERSION,
+            'model_type': model_type,
+            'input_dim': input_dim,
+            'architecture': architecture,
+            'variant': variant,
+            'engine': engine is not None,
+            'created': time.time(),
+            'last_used': time.time_ns(),
+        }
+        self._write_meta(tmp_path, meta)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        logger.info(f"Cached '{model_type}' model at {path}.")
+        self.evict(keep=path)
+        return ModelArtifact(path, meta)
+
+    def entries(self) -> List[ModelArtifact]:
+        """Cached artifacts, least recently used first."""
+        if not os.path.isdir(self.directory):
+            return []
+        artifacts = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            meta = self._read_meta(path)
+            if meta is not None:
+                artifacts.append(ModelArtifact(path, meta))
+        return sorted(artifacts, key=lambda artifact: artifact.meta.get('last_used', 0))
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Remove artifacts superseded by `keep` (same model_type, input_dim and variant, other architecture),
+        then the least recently used ones beyond max_entries.
+        :return: Paths of the removed artifacts.
+        """
+        entries = self.entries()
+        removed = []
+        if keep is not None:
+            kept = next((artifact for artifact in entries if artifact.path == keep), None)
+            if kept is not None:
+                for artifact in entries:
+                    if (artifact is not kept and artifact.meta['model_type'] == kept.meta['model_type']
+                            and artifact.meta['input_dim'] == kept.meta['input_dim']
+                            and artifact.meta.get('variant', '') == kept.meta.get('variant', '')):
+                        removed.append(artifact.path)
+        remaining = [artifact for artifact in entries if artifact.path not in removed]
+        excess = len(remaining) - self.max_entries
+        for artifact in remaining:
+            if excess <= 0:
+                break
+            if artifact.path != keep:
+                removed.append(artifact.path)
+                excess -= 1
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Evicted cached model {path}.")
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
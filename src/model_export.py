@@ -0,0 +1,154 @@
+"""
+Export the small Dense AITuner models ('default', 'automl', 'reinforcement', 'quantile') as a
+standalone Python module that needs only NumPy: the weights are embedded in the file (float32,
+or int8 with per-channel scales) next to a few lines of forward-pass code. The control process
+can then load a trained model without TensorFlow, Keras or this repository on its path.
+
+Usage: python src/model_export.py ai_tuner_default.py --model-type default --dtype int8
+"""
+from typing import List, Optional, Union
+import argparse
+import base64
+import importlib.util
+import logging
+import os
+import types
+
+import numpy as np
+
+try:
+    from .ai_tuner import AITuner
+    from .inference_engine import DenseInferenceEngine, QuantizedDenseInferenceEngine
+    from .model_cache import ModelCache
+except ImportError:  # Executed as a script from within src/.
+    from ai_tuner import AITuner
+    from inference_engine import DenseInferenceEngine, QuantizedDenseInferenceEngine
+    from model_cache import ModelCache
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DTYPES = ('float32', 'int8')
+
+MODULE_TEMPLATE = '''"""
+Standalone {dtype} inference for the AITuner '{model_type}' model ({architecture}).
+Generated by src/model_export.py; needs only NumPy.
+"""
+import base64
+
+import numpy as np
+
+INPUT_DIM = {input_dim}
+OUTPUT_DIM = {output_dim}
+DTYPE = {dtype!r}
+
+
+def _array(data, dtype, shape):
+    return np.frombuffer(base64.b64decode(data), dtype=dtype).reshape(shape).copy()
+
+
+def _softmax(x):
+    shifted = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return shifted / np.sum(shifted, axis=-1, keepdims=True)
+
+
+_ACTIVATIONS = {{
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0, out=x),
+    'tanh': lambda x: np.tanh(x, out=x),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'elu': lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))),
+    'softmax': _softmax,
+}}
+
+# (kernel, per-output-channel kernel scale, bias, activation) per Dense layer.
+LAYERS = [
+{layers}
+]
+
+
+def predict(batch):
+    """
+    :param batch: Array of shape (n, INPUT_DIM).
+    :return: Model outputs of shape (n, OUTPUT_DIM).
+    """
+    x = np.asarray(batch, dtype=np.float32).reshape(-1, INPUT_DIM)
+    for kernel, scale, bias, activation in LAYERS:
+        x = x @ kernel
+        if scale is not None:
+            x *= scale
+        x = _ACTIVATIONS[activation](x + bias)
+    return x
+'''
+
+
+def _array_source(array: Optional[np.ndarray]) -> str:
+    if array is None:
+        return 'None'
+    data = base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+    return f"_array({data!r}, {array.dtype.str!r}, {tuple(array.shape)!r})"
+
+
+def export_source(engine: Union[DenseInferenceEngine, QuantizedDenseInferenceEngine],
+                  model_type: str = 'default') -> str:
+    """Source code of a standalone module evaluating the engine's layers."""
+    if isinstance(engine, QuantizedDenseInferenceEngine):
+        dtype, layers = 'int8', engine.layers
+    else:
+        dtype, layers = 'float32', [(kernel, None, bias, activation) for kernel, bias, activation in engine.layers]
+    architecture = '->'.join([str(engine.input_dim)] + [f"{kernel.shape[1]} {activation}"
+                                                         for kernel, _, _, activation in layers])
+    layer_source = ',\n'.join(
+        f"    ({_array_source(kernel)},\n     {_array_source(scale)},\n     {_array_source(bias)},\n     {activation!r})"
+        for kernel, scale, bias, activation in layers
+    )
+    return MODULE_TEMPLATE.format(dtype=dtype, model_type=model_type, architecture=architecture,
+                                  input_dim=engine.input_dim, output_dim=engine.output_dim, layers=layer_source)
+
+
+def export_tuner(tuner: AITuner, path: str, dtype: str = 'float32') -> str:
+    """
+    Write a standalone NumPy module with the tuner's current weights.
+    :param dtype: 'float32' or 'int8' (per-channel symmetric kernel quantization).
+    :return: The path written.
+    """
+    if dtype not in EXPORT_DTYPES:
+        raise ValueError(f"Unknown export dtype '{dtype}'; expected one of {list(EXPORT_DTYPES)}.")
+    engine = tuner.engine
+    if not isinstance(engine, DenseInferenceEngine):
+        if not DenseInferenceEngine.supports(tuner.model):
+            raise ValueError(f"model_type '{tuner.model_type}' is not a Dense-only network and cannot be exported.")
+        engine = DenseInferenceEngine.from_model(tuner.model)
+    if dtype == 'int8':
+        engine = QuantizedDenseInferenceEngine.from_engine(engine)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(export_source(engine, tuner.model_type))
+    os.replace(tmp_path, path)
+    logger.info(f"Exported {dtype} '{tuner.model_type}' model to {path}.")
+    return path
+
+
+def load_exported(path: str) -> types.ModuleType:
+    """Import an exported module from its file; its `predict(batch)` needs only NumPy."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export a Dense AITuner model as a standalone NumPy module.")
+    parser.add_argument('output', help="Path of the generated .py module.")
+    parser.add_argument('--model-type', default='default', help="AITuner model_type to export.")
+    parser.add_argument('--dtype', default='float32', choices=EXPORT_DTYPES)
+    parser.add_argument('--model-cache', default='model_cache',
+                        help="Export the trained weights from this model cache (empty string exports a fresh model).")
+    args = parser.parse_args(argv)
+    cache = ModelCache(args.model_cache) if args.model_cache else None
+    export_tuner(AITuner(input_dim=5, model_type=args.model_type, cache=cache), args.output, args.dtype)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
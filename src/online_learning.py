@@ -0,0 +1,208 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+
+try:
+    from .inference_engine import DenseInferenceEngine, build_inference_engine
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine, build_inference_engine
+    from instrumentation import Instrumentation, default_instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+def lambda_outcome(error_before: float, error_after: float, epsilon: float = 1e-6) -> float:
+    """
+    Outcome of a tuning decision from the lambda error (|sensor - target|) when the adjustment
+    was made and at the next decision: the relative error reduction, clipped to [-1, 1].
+    Positive values mean the adjustment improved the air-fuel ratio.
+    """
+    return float(np.clip((error_before - error_after) / max(error_before, epsilon), -1.0, 1.0))
+
+
+class ReplayBuffer:
+    """
+    Bounded ring buffer of (sensor vector, adjustment, outcome) tuples. Storage is preallocated;
+    once full the oldest tuples are overwritten. Safe to fill from the control loop while a
+    trainer thread samples from it.
+    """
+
+    def __init__(self, capacity: int, input_dim: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.sensors = np.zeros((capacity, input_dim), dtype=np.float32)
+        self.adjustments = np.zeros(capacity, dtype=np.float32)
+        self.outcomes = np.zeros(capacity, dtype=np.float32)
+        self.added = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.added, self.capacity)
+
+    def add(self, sensor_data: Sequence[float], adjustment: float, outcome: float) -> None:
+        with self._lock:
+            index = self.added % self.capacity
+            self.sensors[index] = sensor_data
+            self.adjustments[index] = adjustment
+            self.outcomes[index] = outcome
+            self.added += 1
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Draw a mini-batch uniformly (with replacement) from the stored tuples.
+        :return: Copies of (sensors, adjustments, outcomes).
+        """
+        with self._lock:
+            size = len(self)
+            if size == 0:
+                raise ValueError("Cannot sample from an empty replay buffer.")
+            index = rng.integers(0, size, size=batch_size)
+            return self.sensors[index], self.adjustments[index], self.outcomes[index]
+
+
+class OnlineTrainer:
+    """
+    Incremental training of an AITuner from live tuning outcomes. The control loop calls
+    `record` with each decision's sensor vector, adjustment and outcome; a background thread
+    runs mini-batch updates on a private copy of the model and, every `publish_every` updates,
+    swaps the new weights into the tuner with single reference assignments, so concurrent
+    predictions see either the old or the new weights, never a mix. Keras and tf.function models
+    alternate between two copies; a prediction still running on the standby copy when the next
+    publish arrives (a full publish period later) is the one case that is not covered.
+
+    The training target is the reward-weighted adjustment, clip(adjustment * outcome, -1, 1):
+    adjustments that improved the outcome are reinforced and the others are pushed the other way.
+    """
+
+    def __init__(self, tuner: Any, capacity: int = 10000, batch_size: int = 32, min_samples: int = 64,
+                 publish_every: int = 10, update_interval: float = 0.01, seed: Optional[int] = None,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param tuner: AITuner with a single-output model.
+        :param capacity: Tuples kept in the replay buffer.
+        :param batch_size: Tuples per mini-batch update.
+        :param min_samples: Tuples collected before the first update.
+        :param publish_every: Updates between weight swaps into the tuner.
+        :param update_interval: Pause between updates in seconds, leaving CPU time to the control loop.
+        :param instrumentation: Receives update and publish latencies; defaults to the process-wide instrumentation.
+        """
+        self.tuner = tuner
+        self.input_dim = tuner.input_dim
+        if getattr(tuner, 'window', None) is not None:
+            raise ValueError("OnlineTrainer records single sensor vectors and cannot train a windowed sequence model.")
+        outputs = np.asarray(tuner.predict_raw(np.zeros((1, self.input_dim), dtype=np.float32)))
+        if outputs.reshape(1, -1).shape[1] != 1:
+            raise ValueError(f"OnlineTrainer needs a single-output model; "
+                             f"model_type '{getattr(tuner, 'model_type', '?')}' has {outputs.size} outputs.")
+        self.buffer = ReplayBuffer(capacity, self.input_dim)
+        self.batch_size = batch_size
+        self.min_samples = max(min_samples, 1)
+        self.publish_every = max(publish_every, 1)
+        self.update_interval = update_interval
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._update_stage = self.instrumentation.stage('online.update')
+        self._publish_stage = self.instrumentation.stage('online.publish')
+        self._rng = np.random.default_rng(seed)
+        # Updates run on a separately compiled copy, so the live model is never half-trained.
+        self._shadow = tuner.build_model(self.input_dim)
+        self._shadow.set_weights(tuner.model.get_weights())
+        if not isinstance(tuner.engine, DenseInferenceEngine):
+            # Double buffer for models whose predictions run on the Keras variables; the
+            # standby engine is traced once here rather than on every publish. The tuner's own
+            # builder makes the copy, since clone_model cannot copy models built with tf_keras.
+            self._standby = tuner.build_model(self.input_dim)
+            self._standby.set_weights(self._shadow.get_weights())
+            self._standby_engine = (build_inference_engine(self._standby, self.input_dim)
+                                    if tuner.engine is not None else None)
+        self.updates = 0
+        self.published = 0
+        self.last_loss = float('nan')
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def targets(adjustments: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        """Training targets of shape (n, 1) for a batch of recorded decisions."""
+        return np.clip(adjustments * outcomes, -1.0, 1.0).reshape(-1, 1)
+
+    def record(self, sensor_data: Sequence[float], adjustment: float, outcome: float) -> None:
+        """Add one decision and its outcome (see `lambda_outcome`). Cheap enough for the control loop."""
+        self.buffer.add(sensor_data, adjustment, outcome)
+
+    def step(self) -> bool:
+        """
+        Run one mini-batch update, publishing every `publish_every` updates.
+        :return: False if the buffer does not hold `min_samples` tuples yet.
+        """
+        if len(self.buffer) < self.min_samples:
+            return False
+        start = self.instrumentation.clock()
+        sensors, adjustments, outcomes = self.buffer.sample(self.batch_size, self._rng)
+        loss = self._shadow.train_on_batch(sensors, self.targets(adjustments, outcomes))
+        self.last_loss = float(np.ravel(loss)[0])
+        self.updates += 1
+        self.instrumentation.record(self._update_stage, start, self.last_loss)
+        if self.updates % self.publish_every == 0:
+            self.publish()
+        return True
+
+    def publish(self) -> None:
+        """Swap the trained weights into the tuner."""
+        start = self.instrumentation.clock()
+        tuner = self.tuner
+        weights = self._shadow.get_weights()
+        if isinstance(tuner.engine, DenseInferenceEngine):
+            # Predictions read the engine's layer list, which sync replaces in one assignment;
+            # the Keras model is not on the prediction path and is updated in place.
+            tuner.model.set_weights(weights)
+            tuner.refresh_inference_engine()
+        else:
+            # Keras predict and tf.function engines read the model's variables directly, so the
+            # weights go into the standby copy, which then takes over; the previous live copy
+            # becomes the standby for the next publish.
+            standby, standby_engine = self._standby, self._standby_engine
+            standby.set_weights(weights)
+            self._standby, self._standby_engine = tuner.model, tuner.engine
+            tuner.model = standby
+            tuner.engine = standby_engine
+        self.published += 1
+        self.instrumentation.record(self._publish_stage, start, float(self.updates))
+
+    def start(self) -> None:
+        """Start the background training thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._train, name='online_trainer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the training thread and publish any unpublished updates."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.updates % self.publish_every:
+            self.publish()
+
+    def _train(self) -> None:
+        while not self._stop.is_set():
+            try:
+                trained = self.step()
+            except Exception:
+                logger.exception("Online training update failed; stopping the trainer.")
+                return
+            self._stop.wait(self.update_interval if trained else max(self.update_interval, 0.05))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'samples': len(self.buffer),
+            'recorded': self.buffer.added,
+            'updates': self.updates,
+            'published': self.published,
+            'last_loss': self.last_loss,
+        }
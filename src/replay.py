@@ -0,0 +1,239 @@
+"""
+Offline replay of recorded telemetry through the tuning pipeline (AITuner -> Tuner, Detuner,
+ActiveLamdaController, plus the stateless aero logic) as fast as the CPU allows.
+
+Usage: python src/replay.py logs/*.csv --processes 8 --out replay_output
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+import argparse
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import yaml
+
+try:
+    from .aero_controller import AeroFleetController
+    from .ai_tuner import (directions_from_intervals, directions_from_policy, directions_from_predictions,
+                           interval_from_quantiles)
+    from .calibration_store import CalibrationStore
+    from .detuner import DEFAULT_RULES_PATH, DegradationRules, Detuner
+    from .inference_engine import DenseInferenceEngine
+    from .instrumentation import Instrumentation, NullInstrumentation
+    from .lamda_controller import ActiveLamdaController
+    from .sensor_stream import DEFAULT_CHANNELS, feature_columns, load_telemetry
+    from .tuning import Tuner
+except ImportError:  # Executed as a script from within src/.
+    from aero_controller import AeroFleetController
+    from ai_tuner import (directions_from_intervals, directions_from_policy, directions_from_predictions,
+                          interval_from_quantiles)
+    from calibration_store import CalibrationStore
+    from detuner import DEFAULT_RULES_PATH, DegradationRules, Detuner
+    from inference_engine import DenseInferenceEngine
+    from instrumentation import Instrumentation, NullInstrumentation
+    from lamda_controller import ActiveLamdaController
+    from sensor_stream import DEFAULT_CHANNELS, feature_columns, load_telemetry
+    from tuning import Tuner
+
+logger = logging.getLogger(__name__)
+
+
+class EnginePredictor:
+    """Picklable AI predictor built from a NumPy inference engine, so shards need no TensorFlow."""
+
+    def __init__(self, engine: DenseInferenceEngine, interval: bool = False, policy: bool = False) -> None:
+        """
+        :param interval: The engine predicts quantiles; adjust only when the whole interval clears the threshold.
+        :param policy: The engine predicts 'reinforcement' action probabilities; take the most probable action.
+        """
+        self.engine = engine
+        self.interval = interval
+        self.policy = policy
+
+    def predict_adjustments(self, batch: np.ndarray) -> np.ndarray:
+        if self.interval:
+            lower, _, upper = interval_from_quantiles(self.engine.predict(batch))
+            return directions_from_intervals(lower, upper)
+        if self.policy:
+            return directions_from_policy(self.engine.predict(batch))
+        return directions_from_predictions(self.engine.predict(batch)[:, 0])
+
+
+class ReplayResult:
+    """Final calibration map and columnar decision trace of one replayed session."""
+
+    def __init__(self, session: str, final_map: Dict[str, Any], trace: Dict[str, np.ndarray]) -> None:
+        self.session = session
+        self.final_map = final_map
+        self.trace = trace
+
+    def save(self, directory: str) -> None:
+        """Write `<session>.trace.npz` and `<session>.map.yaml` into a directory."""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(self.session))[0] or 'session'
+        np.savez(os.path.join(directory, f"{stem}.trace.npz"), **self.trace)
+        with open(os.path.join(directory, f"{stem}.map.yaml"), 'w') as f:
+            yaml.dump(self.final_map, f)
+
+
+class ReplayEngine:
+    """
+    Streams recorded telemetry through the control pipeline without sleeping, logging, instrumenting or
+    writing files per tick. AI decisions are scored for the whole session in one batched call;
+    map and lambda updates then run tick by tick through the real Tuner, Detuner and
+    ActiveLamdaController, and the stateless aero logic is evaluated over all ticks at once.
+    """
+
+    def __init__(self, base_map: Mapping[str, Any], predictor: Optional[Any] = None,
+                 part_status: Optional[Mapping[str, bool]] = None, tune_parameter: str = 'fuel_map',
+                 gradient_step: float = 0.01, detune_step: float = 0.01, target_lambda: float = 1.0,
+                 lambda_step: float = 0.01, tolerance: float = 0.05, lap_time: float = 75.0,
+                 race_mode: bool = True, channels: Mapping[str, int] = DEFAULT_CHANNELS,
+                 rules: Optional[DegradationRules] = None, instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param base_map: Initial calibration values (as loaded from YAML); each session starts from a copy.
+        :param predictor: AITuner (or any object with predict_adjustments(batch)); None disables AI tuning.
+        :param part_status: Part degradation flags or severities applied to every tick (see Detuner.apply_health).
+        :param tune_parameter: Map parameter driven by the AI tuner.
+        :param rules: Part -> parameter detune rules, as loaded by the control loop (--detune-rules);
+                      defaults to DEFAULT_RULES.
+        :param instrumentation: Receives the controllers' per-decision latencies; by default nothing is recorded.
+        """
+        if predictor is not None and isinstance(getattr(predictor, 'engine', None), DenseInferenceEngine):
+            model_type = getattr(predictor, 'model_type', None)
+            predictor = EnginePredictor(predictor.engine, interval=model_type == 'quantile',
+                                        policy=model_type == 'reinforcement')
+        self.base_map = dict(base_map)
+        self.predictor = predictor
+        self.part_status = dict(part_status or {})
+        self.rules = rules
+        self.tune_parameter = tune_parameter
+        self.gradient_step = gradient_step
+        self.detune_step = detune_step
+        self.target_lambda = target_lambda
+        self.lambda_step = lambda_step
+        self.tolerance = tolerance
+        self.lap_time = lap_time
+        self.race_mode = race_mode
+        self.instrumentation = instrumentation if instrumentation is not None else NullInstrumentation()
+        self.row_width = sum(channels.values())
+        self._ai_columns = feature_columns(channels=channels)
+        self._lambda_column, self._speed_column = feature_columns([('lambda', 0), ('vehicle_speed', 0)], channels)
+        self._wheel_columns = feature_columns([('wheel_speeds', i) for i in range(channels['wheel_speeds'])], channels)
+
+    @property
+    def shardable(self) -> bool:
+        """True if the engine can be shipped to worker processes."""
+        return self.predictor is None or isinstance(self.predictor, EnginePredictor)
+
+    def run(self, telemetry: np.ndarray, session: str = 'session') -> ReplayResult:
+        """
+        Replay one session.
+        :param telemetry: Array of shape (n, row_width) in DEFAULT_COLUMNS order.
+        :param session: Session name recorded in the result.
+        """
+        telemetry = np.asarray(telemetry, dtype=np.float64).reshape(-1, self.row_width)
+        n = len(telemetry)
+        store = CalibrationStore.create(self.base_map)
+        tuner = Tuner(store, gradient_step=self.gradient_step, instrumentation=self.instrumentation)
+        detuner = Detuner(store, gradient_step=self.detune_step, instrumentation=self.instrumentation, rules=self.rules)
+        lamda_controller = ActiveLamdaController(target_lambda=self.target_lambda, adjustment_step=self.lambda_step,
+                                                 instrumentation=self.instrumentation)
+
+        if self.predictor is not None and self.tune_parameter in store:
+            directions = np.asarray(self.predictor.predict_adjustments(telemetry[:, self._ai_columns]))
+        else:
+            directions = np.zeros(n, dtype=np.int64)
+        degraded = any(self.part_status.values())
+        scalar_params = [name for name in store if not store.shape(name)]
+
+        trace: Dict[str, np.ndarray] = {
+            'ai_direction': directions.astype(np.int8),
+            'lambda_target': np.empty(n),
+        }
+        param_traces = [(name, np.empty(n)) for name in scalar_params]
+        lambda_trace = trace['lambda_target']
+        direction_list = directions.tolist()
+        lambda_readings = telemetry[:, self._lambda_column].tolist()
+        tolerance = self.tolerance
+        for i in range(n):
+            direction = direction_list[i]
+            if direction:
+                tuner.apply_gradient_increment(self.tune_parameter, direction=direction)
+            if degraded:
+                # The same bulk pass as the control loop's detune task, so rule steps and minimums apply.
+                detuner.apply_health(self.part_status)
+            lambda_trace[i] = lamda_controller.update_lambda(lambda_readings[i], tolerance)
+            for name, column in param_traces:
+                column[i] = store[name]
+        trace.update(param_traces)
+
+        # The aero logic keeps no state between ticks, so every tick is evaluated in one call.
+        aero = AeroFleetController(n)
+        trace['drs_active'] = aero.update_drs(telemetry[:, self._speed_column], np.full(n, self.lap_time),
+                                              self.race_mode)
+        trace['brake_adjustments'] = aero.update_braking_stability(telemetry[:, self._wheel_columns])
+        trace['brake_stability_active'] = aero.brake_stability_active
+        return ReplayResult(session, store.to_dict(), trace)
+
+    def run_file(self, path: str) -> ReplayResult:
+        """Load and replay one telemetry log (CSV, Parquet or .npy)."""
+        return self.run(load_telemetry(path), session=path)
+
+
+def replay_sessions(engine: ReplayEngine, paths: Sequence[str], processes: Optional[int] = None) -> List[ReplayResult]:
+    """
+    Replay many sessions, sharded across a process pool when the engine allows it.
+    :param processes: Worker processes (None uses all cores, 1 replays in-process).
+    :return: Results in the order of `paths`.
+    """
+    if processes == 1 or len(paths) <= 1:
+        return [engine.run_file(path) for path in paths]
+    if not engine.shardable:
+        logger.warning("The AI model has no NumPy inference engine; replaying sessions in-process.")
+        return [engine.run_file(path) for path in paths]
+    # Spawned workers avoid inheriting TensorFlow's threads from the parent process.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        return list(pool.map(engine.run_file, paths))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay telemetry logs through the tuning pipeline.")
+    parser.add_argument('logs', nargs='+', help="Telemetry logs (.csv, .parquet or .npy).")
+    parser.add_argument('--base-map', default='configs/base_map.yaml', help="YAML calibration map to start from.")
+    parser.add_argument('--model-type', default='default', help="AITuner model_type to use.")
+    parser.add_argument('--no-ai', action='store_true', help="Replay without AI tuning.")
+    parser.add_argument('--model-cache', default='model_cache',
+                        help="Directory of cached AI Tuner models (empty string disables the cache).")
+    parser.add_argument('--degraded', nargs='*', default=[], help="Parts flagged as degraded, e.g. turbocharger.")
+    parser.add_argument('--detune-rules', default=DEFAULT_RULES_PATH,
+                        help="YAML rules mapping degraded parts to the parameters they detune.")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument('--out', default='replay_output', help="Directory for traces and final maps.")
+    args = parser.parse_args(argv)
+
+    with open(args.base_map, 'r') as f:
+        base_map = yaml.safe_load(f)
+    predictor = None
+    if not args.no_ai:
+        try:
+            from .ai_tuner import AITuner
+            from .model_cache import ModelCache
+        except ImportError:  # Executed as a script from within src/.
+            from ai_tuner import AITuner
+            from model_cache import ModelCache
+        cache = ModelCache(args.model_cache) if args.model_cache else None
+        predictor = AITuner(input_dim=5, model_type=args.model_type, cache=cache)
+    engine = ReplayEngine(base_map, predictor, part_status={part: True for part in args.degraded},
+                          rules=DegradationRules.load(args.detune_rules))
+    for result in replay_sessions(engine, args.logs, args.processes):
+        result.save(args.out)
+        logger.info(f"Replayed {result.session}: {len(result.trace['ai_direction'])} ticks, final map {result.final_map}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,380 @@
+"""
+Reinforcement learning for the 'reinforcement' AITuner policy (increase, decrease or maintain
+the fuel map). TuningEnvs simulates many cars at once: each step applies the policy's action
+with Tuner semantics, detunes degraded parts with Detuner semantics and moves the lambda target
+with ActiveLamdaController semantics, all as array operations over every environment. Episodes
+are rolled out in batches with a NumPy copy of the policy, optionally sharded across worker
+processes, and the Keras policy is updated with REINFORCE (policy gradient with a baseline).
+
+Usage: python src/rl_tuning.py --iterations 200 --envs 1024 --workers 8
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+try:
+    from .inference_engine import DenseInferenceEngine
+    from .instrumentation import Instrumentation, default_instrumentation
+    from .lamda_controller import LambdaFleetController
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine
+    from instrumentation import Instrumentation, default_instrumentation
+    from lamda_controller import LambdaFleetController
+
+logger = logging.getLogger(__name__)
+
+# Map change of each policy action (same order as ai_tuner.POLICY_DIRECTIONS): increase, decrease, maintain.
+ACTION_DIRECTIONS = np.array([1.0, -1.0, 0.0])
+
+
+class TuningEnvs:
+    """
+    Vectorized engine and lambda simulator for `num_envs` independent cars.
+
+    Each car has a scalar fuel_map and boost_map. The measured lambda follows the air-fuel ratio:
+    it rises with boost (more air) and falls with fuel_map and injector flow (more fuel), with a
+    per-episode calibration bias, transient leaning on throttle tip-in and sensor noise. Injector
+    flow drifts during an episode. Cars flagged with a degraded turbocharger or fuel injectors
+    lose boost_map or fuel_map every step, as the Detuner would apply, which the policy has to
+    compensate. Observations are the AI tuner inputs (steering, throttle, brake, accel_x, lambda).
+
+    The lambda controller updates its target from every reading as in the control loop
+    (`lambda_target`). Outside its tolerance that target steps away from the reading as fast as the
+    tuner can correct it, so it is not a reachable goal; the lambda error is measured against the
+    desired `target_lambda` instead. The reward of a step is the reduction of the lambda error it
+    achieved, which credits each action with its own effect rather than with the calibration bias
+    the car started the episode with.
+    """
+
+    def __init__(self, num_envs: int, gradient_step: float = 0.01, detune_step: float = 0.002,
+                 target_lambda: float = 1.0, lambda_step: float = 0.01, tolerance: float = 0.05,
+                 degradation_rate: float = 0.2, seed: Optional[int] = None) -> None:
+        """
+        :param gradient_step: Tuner step applied to fuel_map per increase/decrease action.
+        :param detune_step: Detuner step applied per step to the maps of degraded parts.
+        :param target_lambda: Desired lambda, and the initial target of each car's lambda controller.
+        :param lambda_step: ActiveLamdaController target step.
+        :param tolerance: Lambda error tolerated by the lambda controller.
+        :param degradation_rate: Probability that a car starts an episode with each part degraded.
+        """
+        self.num_envs = num_envs
+        self.gradient_step = gradient_step
+        self.detune_step = detune_step
+        self.target_lambda = target_lambda
+        self.lambda_step = lambda_step
+        self.tolerance = tolerance
+        self.degradation_rate = degradation_rate
+        self.rng = np.random.default_rng(seed)
+        self.observations = np.zeros((num_envs, 5), dtype=np.float32)
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """Start a new episode in every environment. :return: Observations of shape (num_envs, 5)."""
+        n, rng = self.num_envs, self.rng
+        self.fuel_map = np.ones(n)
+        self.boost_map = np.ones(n)
+        self.bias = rng.uniform(0.9, 1.1, size=n)
+        self.flow = np.ones(n)
+        self.turbo_degraded = rng.random(n) < self.degradation_rate
+        self.injectors_degraded = rng.random(n) < self.degradation_rate
+        self.controller = LambdaFleetController(n, self.target_lambda, self.lambda_step)
+        self.throttle = rng.uniform(0.0, 1.0, size=n)
+        self.steering = np.zeros(n)
+        self._sense(np.zeros(n))
+        self.lambda_error = np.abs(self.sensor_lambda - self.target_lambda)
+        self.lambda_target = self.controller.get_current_target()
+        return self.observations
+
+    def _sense(self, tip_in: np.ndarray) -> None:
+        n, rng = self.num_envs, self.rng
+        self.brake = np.clip(0.3 - self.throttle + rng.normal(0.0, 0.05, size=n), 0.0, 1.0)
+        accel_x = 0.8 * self.throttle - self.brake + rng.normal(0.0, 0.05, size=n)
+        self.sensor_lambda = (self.bias * (0.8 + 0.2 * self.boost_map) / (self.fuel_map * self.flow)
+                              + 0.05 * tip_in + rng.normal(0.0, 0.005, size=n))
+        obs = self.observations
+        obs[:, 0], obs[:, 1], obs[:, 2], obs[:, 3], obs[:, 4] = (self.steering, self.throttle, self.brake,
+                                                                 accel_x, self.sensor_lambda)
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance every environment by one control tick.
+        :param actions: Action index (0 increase, 1 decrease, 2 maintain) per environment, shape (num_envs,).
+        :return: (observations of shape (num_envs, 5), rewards of shape (num_envs,)); the observation
+                 array is reused between steps.
+        """
+        n, rng = self.num_envs, self.rng
+        # Tuner: one gradient step on fuel_map in the chosen direction.
+        self.fuel_map += ACTION_DIRECTIONS[actions] * self.gradient_step
+        # Detuner: degraded parts lose a detune step of their map every tick.
+        self.boost_map -= self.detune_step * self.turbo_degraded
+        self.fuel_map -= self.detune_step * self.injectors_degraded
+        self.flow *= 1.0 + rng.normal(0.0, 0.002, size=n)
+        throttle = np.clip(self.throttle + rng.normal(0.0, 0.1, size=n), 0.0, 1.0)
+        tip_in = np.maximum(throttle - self.throttle, 0.0)
+        self.throttle = throttle
+        self.steering = np.clip(0.9 * self.steering + rng.normal(0.0, 0.1, size=n), -1.0, 1.0)
+        self._sense(tip_in)
+        # ActiveLamdaController: the target follows the new reading.
+        self.lambda_target = self.controller.update_lambda(self.sensor_lambda, self.tolerance)
+        error = np.abs(self.sensor_lambda - self.target_lambda)
+        rewards = self.lambda_error - error
+        self.lambda_error = error
+        return self.observations, rewards
+
+
+def sample_actions(probabilities: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Draw one action per row of a (n, actions) probability matrix with a single uniform draw per row."""
+    cumulative = np.cumsum(probabilities, axis=1)
+    draws = rng.random(len(probabilities))[:, None] * cumulative[:, -1:]
+    return np.minimum((draws > cumulative).sum(axis=1), probabilities.shape[1] - 1)
+
+
+def rollout(policy: DenseInferenceEngine, num_envs: int, horizon: int, env_kwargs: Optional[Dict[str, Any]] = None,
+            seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Roll out one episode of `horizon` steps in `num_envs` environments, sampling every action of a
+    step from one batched policy evaluation. Needs only NumPy, so it can run in worker processes.
+    :return: (observations (horizon, num_envs, 5), actions (horizon, num_envs), rewards (horizon, num_envs)).
+    """
+    rng = np.random.default_rng(seed)
+    envs = TuningEnvs(num_envs, seed=int(rng.integers(2 ** 63)), **(env_kwargs or {}))
+    observations = np.empty((horizon, num_envs, 5), dtype=np.float32)
+    actions = np.empty((horizon, num_envs), dtype=np.int64)
+    rewards = np.empty((horizon, num_envs))
+    obs = envs.observations
+    for t in range(horizon):
+        observations[t] = obs
+        actions[t] = sample_actions(policy.predict(obs), rng)
+        obs, rewards[t] = envs.step(actions[t])
+    return observations, actions, rewards
+
+
+def _rollout_shard(args: Tuple[Any, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return rollout(*args)
+
+
+def discounted_returns(rewards: np.ndarray, gamma: float) -> np.ndarray:
+    """Reward-to-go of every step of (horizon, num_envs) rewards, all environments at once."""
+    returns = np.empty_like(rewards)
+    running = np.zeros(rewards.shape[1:])
+    for t in range(len(rewards) - 1, -1, -1):
+        running = rewards[t] + gamma * running
+        returns[t] = running
+    return returns
+
+
+def linear_baseline(observations: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """
+    State-dependent baseline: least-squares fit of the returns on the observations, their squares
+    and the time step. Subtracting it removes most of the return variance that the actions did not cause.
+    """
+    horizon, num_envs, _ = observations.shape
+    time_step = np.broadcast_to(np.linspace(0.0, 1.0, horizon)[:, None, None], (horizon, num_envs, 1))
+    features = np.concatenate([observations, observations ** 2, time_step, np.ones_like(time_step)], axis=-1)
+    features = features.reshape(-1, features.shape[-1])
+    coefficients = np.linalg.lstsq(features, returns.reshape(-1), rcond=None)[0]
+    return (features @ coefficients).reshape(returns.shape)
+
+
+class PolicyGradientTrainer:
+    """
+    Batched REINFORCE training of an AITuner 'reinforcement' policy in TuningEnvs.
+
+    Every iteration rolls out one episode in each of `num_envs` environments with a NumPy copy of
+    the policy (split across `workers` processes), computes discounted returns minus a linear
+    state baseline, and makes one pass of mini-batch Adam updates over the episodes, minimising
+    -advantage * log pi(action | observation) minus an entropy bonus that keeps the policy from
+    collapsing onto one action early.
+
+    The policy sees raw sensor values, where the lambda deviations that matter are a few hundredths.
+    Updates therefore run on a copy of the policy that takes standardized observations (statistics
+    from the first batch); the standardization is folded into the first Dense layer when the
+    weights are copied back, so the tuner's policy keeps its raw-input, Dense-only form.
+    """
+
+    def __init__(self, tuner: Any, num_envs: int = 256, horizon: int = 64, gamma: float = 0.5,
+                 batch_size: int = 1024, learning_rate: float = 0.003, entropy: float = 0.01, workers: int = 1,
+                 env_kwargs: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param tuner: AITuner with model_type 'reinforcement'.
+        :param num_envs: Environments (episodes) per iteration.
+        :param horizon: Steps per episode.
+        :param gamma: Discount factor. The reward already credits an action with its whole effect on
+                      the lambda error, so a short horizon only adds the follow-up it enables.
+        :param batch_size: Samples per gradient step; each iteration makes one pass over its episodes.
+        :param learning_rate: Adam learning rate.
+        :param entropy: Weight of the entropy bonus.
+        :param workers: Processes sharing the rollouts (1 rolls out in-process).
+        :param env_kwargs: TuningEnvs parameters.
+        :param instrumentation: Receives rollout and update latencies; defaults to the process-wide instrumentation.
+        """
+        if getattr(tuner, 'model_type', None) != 'reinforcement':
+            raise ValueError(f"PolicyGradientTrainer needs the 'reinforcement' model, "
+                             f"not '{getattr(tuner, 'model_type', '?')}'.")
+        self.tuner = tuner
+        self.policy = DenseInferenceEngine.from_model(tuner.model)
+        self.num_envs = num_envs
+        self.horizon = horizon
+        self.gamma = gamma
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.entropy = entropy
+        self._shadow = None
+        self._train_step = None
+        self.offset = self.scale = None
+        self.workers = max(1, min(workers, num_envs))
+        self.env_kwargs = dict(env_kwargs or {})
+        self.rng = np.random.default_rng(seed)
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._rollout_stage = self.instrumentation.stage('rl.rollout')
+        self._update_stage = self.instrumentation.stage('rl.update')
+        self.iterations = 0
+        self.env_steps = 0
+
+    def collect(self, pool: Optional[ProcessPoolExecutor] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Roll out one batch of episodes, sharding environments across the pool if one is given."""
+        start = self.instrumentation.clock()
+        seeds = self.rng.integers(2 ** 63, size=self.workers)
+        if pool is None:
+            batch = rollout(self.policy, self.num_envs, self.horizon, self.env_kwargs, int(seeds[0]))
+        else:
+            sizes = [len(shard) for shard in np.array_split(np.arange(self.num_envs), self.workers)]
+            shards = list(pool.map(_rollout_shard, [(self.policy, size, self.horizon, self.env_kwargs, int(seed))
+                                                    for size, seed in zip(sizes, seeds)]))
+            batch = tuple(np.concatenate(parts, axis=1) for parts in zip(*shards))
+        self.env_steps += self.num_envs * self.horizon
+        self.instrumentation.record(self._rollout_stage, start, float(batch[2].mean()))
+        return batch
+
+    def update(self, observations: np.ndarray, actions: np.ndarray, rewards: np.ndarray) -> float:
+        """One policy-gradient step on a batch of episodes. :return: The training loss."""
+        start = self.instrumentation.clock()
+        returns = discounted_returns(rewards, self.gamma)
+        advantages = returns - linear_baseline(observations, returns)
+        advantages /= advantages.std() + 1e-8
+        x = observations.reshape(-1, observations.shape[-1])
+        if self._shadow is None:
+            self._build_shadow(x)
+        x = ((x - self.offset) / self.scale).astype(np.float32)
+        a = actions.reshape(-1)
+        advantages = advantages.reshape(-1).astype(np.float32)
+        losses = []
+        for batch in np.array_split(self.rng.permutation(len(x)), max(1, len(x) // self.batch_size)):
+            losses.append(float(self._train_step(x[batch], a[batch], advantages[batch])))
+        loss = float(np.mean(losses))
+        self.publish()
+        self.iterations += 1
+        self.instrumentation.record(self._update_stage, start, loss)
+        return loss
+
+    def _build_shadow(self, observations: np.ndarray) -> None:
+        tf = importlib.import_module('tensorflow')
+        self.offset = observations.mean(axis=0)
+        self.scale = np.maximum(observations.std(axis=0), 1e-6)
+        weights = self.tuner.model.get_weights()
+        kernel, bias = weights[0], weights[1]
+        self._shadow = tf.keras.models.clone_model(self.tuner.model)
+        # Same function of the standardized input: x @ K + b == z @ (K * scale) + (b + offset @ K).
+        self._shadow.set_weights([kernel * self.scale[:, None], bias + self.offset @ kernel] + weights[2:])
+        self._train_step = self._build_train_step(self._shadow)
+
+    def publish(self) -> None:
+        """Copy the trained weights into the tuner's policy and the rollout engine."""
+        weights = self._shadow.get_weights()
+        kernel, bias = weights[0] / self.scale[:, None], weights[1] - (self.offset / self.scale) @ weights[0]
+        self.tuner.model.set_weights([kernel.astype(np.float32), bias.astype(np.float32)] + weights[2:])
+        self.policy.sync(self.tuner.model)
+
+    def _build_train_step(self, model: Any) -> Any:
+        tf = importlib.import_module('tensorflow')
+        optimizer = tf.keras.optimizers.Adam(learning_rate=self.learning_rate)
+        optimizer.build(model.trainable_variables)
+        entropy = self.entropy
+
+        @tf.function
+        def train_step(x, actions, advantages):
+            with tf.GradientTape() as tape:
+                probabilities = tf.clip_by_value(model(x, training=True), 1e-8, 1.0)
+                log_probabilities = tf.math.log(probabilities)
+                chosen = tf.gather(log_probabilities, actions, axis=1, batch_dims=1)
+                bonus = -tf.reduce_sum(probabilities * log_probabilities, axis=1)
+                loss = -tf.reduce_mean(advantages * chosen + entropy * bonus)
+            gradients = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            return loss
+        return train_step
+
+    def train(self, iterations: int) -> List[Dict[str, float]]:
+        """
+        Run `iterations` rollout/update cycles and publish the trained policy to the tuner.
+        :return: Per iteration: mean reward per step, loss and env-steps/s (rollout and update included).
+        """
+        history = []
+        pool = None
+        if self.workers > 1:
+            # Spawned workers avoid inheriting TensorFlow's threads; rollouts only need NumPy.
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                batch = self.collect(pool)
+                loss = self.update(*batch)
+                elapsed = time.perf_counter() - start
+                history.append({'reward': float(batch[2].mean()), 'loss': loss,
+                                'env_steps_per_s': self.num_envs * self.horizon / elapsed})
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        self.tuner.refresh_inference_engine()
+        return history
+
+    def evaluate(self, num_envs: int = 1024, seed: Optional[int] = None) -> float:
+        """Mean lambda error over an episode of the greedy policy (the action AITuner.predict_adjustment takes)."""
+        envs = TuningEnvs(num_envs, seed=seed, **self.env_kwargs)
+        obs, total = envs.observations, 0.0
+        for _ in range(self.horizon):
+            obs, _ = envs.step(np.argmax(self.policy.predict(obs), axis=1))
+            total += float(envs.lambda_error.mean())
+        return total / self.horizon
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    try:
+        from .ai_tuner import AITuner
+        from .model_cache import ModelCache
+    except ImportError:  # Executed as a script from within src/.
+        from ai_tuner import AITuner
+        from model_cache import ModelCache
+    parser = argparse.ArgumentParser(description="Policy-gradient training of the 'reinforcement' AITuner policy.")
+    parser.add_argument('--iterations', type=int, default=200, help="Rollout/update cycles.")
+    parser.add_argument('--envs', type=int, default=1024, help="Environments (episodes) per iteration.")
+    parser.add_argument('--horizon', type=int, default=64, help="Steps per episode.")
+    parser.add_argument('--workers', type=int, default=None, help="Rollout processes (default: all cores).")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--model-cache', default='model_cache',
+                        help="Start from and store the policy in this AI Tuner model cache (empty string disables).")
+    args = parser.parse_args(argv)
+
+    cache = ModelCache(args.model_cache) if args.model_cache else None
+    tuner = AITuner(input_dim=5, model_type='reinforcement', cache=cache)
+    trainer = PolicyGradientTrainer(tuner, num_envs=args.envs, horizon=args.horizon,
+                                    workers=args.workers or os.cpu_count() or 1, seed=args.seed)
+    logger.info(f"Greedy policy lambda error before training: {trainer.evaluate(seed=0):.4f}")
+    history = trainer.train(args.iterations)
+    logger.info(f"Greedy policy lambda error after training: {trainer.evaluate(seed=0):.4f} "
+                f"({np.mean([h['env_steps_per_s'] for h in history]):.0f} env-steps/s)")
+    if cache is not None:
+        tuner.save_to_cache()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,270 @@
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import heapq
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MonotonicClock:
+    """Wall-clock pacing based on time.monotonic."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Deterministic clock for tests and offline runs: sleeping advances simulated time instantly.
+    Callbacks can call `advance` to simulate work that takes time.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self._now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self._now += seconds
+
+
+class InlineExecutor(Executor):
+    """Executor that runs work immediately in the calling thread (deterministic offloading)."""
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+class ControlTask:
+    """A periodic controller callback and its timing statistics."""
+
+    def __init__(self, name: str, callback: Callable[[], Any], period: float, deadline: float,
+                 offload: bool = False, on_complete: Optional[Callable[[Any], None]] = None) -> None:
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.deadline = deadline
+        self.offload = offload
+        self.on_complete = on_complete
+        self.next_release = 0.0
+        self.pending: Optional[Future] = None
+        self.pending_release = 0.0
+        self.stage = -1  # Instrumentation stage id, if the scheduler is instrumented.
+        self.error_stage = -1
+        self.runs = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.errors = 0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'period': self.period,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'max_latency': self.max_latency,
+            'mean_latency': self.total_latency / self.runs if self.runs else 0.0,
+        }
+
+
+class ControlScheduler:
+    """
+    Multi-rate scheduler for the control loop. Each task is released at fixed multiples of its
+    period (no drift), must finish within its deadline, and missed releases are skipped rather
+    than run back to back. Offloaded tasks (e.g. model inference) run in an executor; their
+    results are handed to `on_complete` in the scheduler thread so map writes stay single-threaded.
+    """
+
+    def __init__(self, clock: Optional[Any] = None, executor: Optional[Executor] = None,
+                 instrumentation: Optional[Any] = None) -> None:
+        """
+        :param clock: Object with now() and sleep(seconds); defaults to MonotonicClock.
+        :param executor: Executor for offloaded tasks; a single worker thread is created on demand.
+        :param instrumentation: Optional Instrumentation that also receives every task latency
+                                (as stage 'task.<name>') for its histograms, and every failure
+                                (as an event of stage 'task.<name>.errors').
+        """
+        self.clock = clock or MonotonicClock()
+        self.instrumentation = instrumentation
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.tasks: Dict[str, ControlTask] = {}
+        self._queue: List[Any] = []
+        self._end = math.inf
+        self._stop = threading.Event()
+
+    def add_task(self, name: str, callback: Callable[[], Any], rate_hz: float,
+                 deadline: Optional[float] = None, offload: bool = False,
+                 on_complete: Optional[Callable[[Any], None]] = None) -> ControlTask:
+        """
+        Register a periodic task.
+        :param name: Unique task name.
+        :param callback: Called once per period with no arguments.
+        :param rate_hz: Release rate in Hz.
+        :param deadline: Seconds after release by which the task must finish (defaults to its period).
+        :param offload: Run the callback in the executor instead of the scheduler thread.
+        :param on_complete: Receives the callback's return value (in the scheduler thread).
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' is already registered.")
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive.")
+        period = 1.0 / rate_hz
+        task = ControlTask(name, callback, period, deadline if deadline is not None else period, offload, on_complete)
+        if self.instrumentation is not None:
+            task.stage = self.instrumentation.stage(f'task.{name}')
+            task.error_stage = self.instrumentation.stage(f'task.{name}.errors')
+        self.tasks[name] = task
+        return task
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='control-offload')
+        return self._executor
+
+    def stop(self) -> None:
+        """Ask a running scheduler to return after the current task (safe from any thread)."""
+        self._stop.set()
+
+    def run(self, duration: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Run the registered tasks until `duration` seconds of clock time have elapsed or `stop` is called.
+        :return: Per-task statistics (see `report`).
+        """
+        self._stop.clear()
+        start = self.clock.now()
+        end = start + duration if duration is not None else math.inf
+        self._end = end
+        self._queue = []
+        for order, task in enumerate(self.tasks.values()):
+            task.next_release = start
+            # Ties are broken by registration order, so faster tasks should be registered first.
+            heapq.heappush(self._queue, (task.next_release, order, task))
+        try:
+            while not self._stop.is_set():
+                release, order, task = self._queue[0]
+                if release >= end:
+                    break
+                wait = release - self.clock.now()
+                if wait > 0:
+                    self.clock.sleep(wait)
+                self._collect_offloaded()
+                self._release(task, release)
+                heapq.heapreplace(self._queue, (task.next_release, order, task))
+        finally:
+            self._drain_offloaded()
+        return self.report()
+
+    def _release(self, task: ControlTask, release: float) -> None:
+        if task.offload:
+            if task.pending is not None:
+                # The previous run is still in flight; do not queue work behind it.
+                task.skipped += 1
+            else:
+                task.pending = self.executor.submit(task.callback)
+                task.pending_release = release
+                self._collect_offloaded()
+        else:
+            try:
+                result = task.callback()
+            except Exception:
+                self._fail(task, f"Control task '{task.name}' failed.")
+            else:
+                self._complete(task, result)
+            self._record(task, release, self.clock.now())
+        self._advance(task)
+
+    def _advance(self, task: ControlTask) -> None:
+        task.next_release += task.period
+        now = self.clock.now()
+        if task.next_release <= now:
+            # Skip releases that were missed entirely instead of running them back to back.
+            missed = math.floor((now - task.next_release) / task.period) + 1
+            if self._end < math.inf:
+                # Only releases inside the run window count as skipped.
+                missed_in_window = max(0, math.ceil((self._end - task.next_release) / task.period - 1e-9))
+                task.skipped += min(missed, missed_in_window)
+            else:
+                task.skipped += missed
+            task.next_release += missed * task.period
+
+    def _record(self, task: ControlTask, release: float, finished: float) -> None:
+        latency = finished - release
+        task.runs += 1
+        task.total_latency += latency
+        task.max_latency = max(task.max_latency, latency)
+        if self.instrumentation is not None:
+            self.instrumentation.observe(task.stage, latency)
+        if latency > task.deadline:
+            task.overruns += 1
+            if task.overruns == 1:
+                logger.warning(f"Control task '{task.name}' overran its {task.deadline * 1000:.1f} ms deadline "
+                               f"({latency * 1000:.1f} ms); further overruns are counted in the report.")
+
+    def _collect_offloaded(self) -> None:
+        for task in self.tasks.values():
+            future = task.pending
+            if future is None or not future.done():
+                continue
+            task.pending = None
+            self._record(task, task.pending_release, self.clock.now())
+            exc = future.exception()
+            if exc is not None:
+                self._fail(task, f"Offloaded control task '{task.name}' failed: {exc!r}", traceback=False)
+            else:
+                self._complete(task, future.result())
+
+    def _complete(self, task: ControlTask, result: Any) -> None:
+        if task.on_complete is None:
+            return
+        try:
+            task.on_complete(result)
+        except Exception:
+            # A failing completion handler must not stop the other tasks.
+            self._fail(task, f"Completion handler of control task '{task.name}' failed.")
+
+    def _fail(self, task: ControlTask, message: str, traceback: bool = True) -> None:
+        task.errors += 1
+        if traceback:
+            logger.exception(message)
+        else:
+            logger.error(message)
+        if self.instrumentation is not None:
+            self.instrumentation.record(task.error_stage, self.instrumentation.clock())
+
+    def _drain_offloaded(self) -> None:
+        for task in self.tasks.values():
+            if task.pending is not None:
+                task.pending.exception()  # Wait for in-flight work before returning.
+        self._collect_offloaded()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-task runs, overruns, skipped releases, errors and latency (seconds)."""
+        return {name: task.stats() for name, task in self.tasks.items()}
+
+    def shutdown(self) -> None:
+        """Release the executor created by the scheduler."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,340 @@
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+import csv
+import importlib
+import logging
+import os
+import socket
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Channel name -> number of columns.
+DEFAULT_CHANNELS: Dict[str, int] = {
+    'steering': 1,
+    'throttle': 1,
+    'brake': 1,
+    'accelerometer': 3,
+    'wheel_speeds': 4,
+    'lambda': 1,
+    'vehicle_speed': 1,
+}
+
+# Column names used by CSV logs and socket streams, in channel order.
+DEFAULT_COLUMNS: List[str] = [
+    'steering', 'throttle', 'brake',
+    'accel_x', 'accel_y', 'accel_z',
+    'wheel_fl', 'wheel_fr', 'wheel_rl', 'wheel_rr',
+    'lambda', 'vehicle_speed',
+]
+
+# (channel, column within channel) feeding each AITuner input, in model input order.
+AI_FEATURES: List[Tuple[str, int]] = [
+    ('steering', 0), ('throttle', 0), ('brake', 0), ('accelerometer', 0), ('lambda', 0),
+]
+
+
+class RingBuffer:
+    """Preallocated circular buffer of fixed-width float samples."""
+
+    def __init__(self, capacity: int, width: int = 1, dtype: Any = np.float64) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.width = width
+        self.data = np.zeros((capacity, width), dtype=dtype)
+        self.index = 0  # Next write position.
+        self.total = 0  # Samples written since creation.
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def push(self, sample: Any) -> None:
+        self.data[self.index] = sample
+        self.index = (self.index + 1) % self.capacity
+        self.total += 1
+
+    def extend(self, samples: np.ndarray) -> None:
+        """Append a block of shape (n, width) with at most two slice copies."""
+        samples = np.asarray(samples).reshape(-1, self.width)
+        if len(samples) > self.capacity:
+            # Older samples would be overwritten within this block anyway.
+            self.total += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        n = len(samples)
+        first = min(n, self.capacity - self.index)
+        self.data[self.index:self.index + first] = samples[:first]
+        self.data[:n - first] = samples[first:]
+        self.index = (self.index + n) % self.capacity
+        self.total += n
+
+    def last(self) -> np.ndarray:
+        """View of the most recent sample (no copy)."""
+        return self.data[self.index - 1]
+
+    def at(self, sequence: int) -> np.ndarray:
+        """View of the sample with the given sequence number (must still be in the buffer)."""
+        return self.data[sequence % self.capacity]
+
+    def window(self, n: int) -> np.ndarray:
+        """Copy of the last n samples in chronological order."""
+        n = min(n, len(self))
+        start = (self.index - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.data[start:start + n].copy()
+        return np.concatenate((self.data[start:], self.data[:self.index]))
+
+
+class SensorChannel:
+    """
+    One sensor channel: a ring buffer plus rolling mean/variance/min/max over the last `window`
+    samples. Sums are updated in O(1) per sample (and re-derived once per window to bound
+    floating-point drift); min/max use monotonic deques, amortized O(1) per sample.
+    """
+
+    def __init__(self, name: str, width: int = 1, capacity: int = 1024, window: int = 50) -> None:
+        if not 1 <= window <= capacity:
+            raise ValueError("window must be between 1 and capacity.")
+        self.name = name
+        self.width = width
+        self.window = window
+        self.buffer = RingBuffer(capacity, width)
+        self._sum = np.zeros(width)
+        self._sumsq = np.zeros(width)
+        self._min_seq: List[deque] = [deque() for _ in range(width)]
+        self._max_seq: List[deque] = [deque() for _ in range(width)]
+
+    def push(self, sample: Any) -> None:
+        buffer = self.buffer
+        seq = buffer.total
+        if seq >= self.window:
+            outgoing = buffer.at(seq - self.window)
+            self._sum -= outgoing
+            self._sumsq -= outgoing * outgoing
+        buffer.push(sample)
+        row = buffer.last()
+        self._sum += row
+        self._sumsq += row * row
+        if (seq + 1) % self.window == 0:
+            window = buffer.data[(np.arange(seq + 1 - self.window, seq + 1)) % buffer.capacity]
+            self._sum = window.sum(axis=0)
+            self._sumsq = (window * window).sum(axis=0)
+        oldest = seq + 1 - self.window
+        data = buffer.data
+        capacity = buffer.capacity
+        for column in range(self.width):
+            value = row[column]
+            mins, maxs = self._min_seq[column], self._max_seq[column]
+            while mins and data[mins[-1] % capacity, column] >= value:
+                mins.pop()
+            mins.append(seq)
+            while mins[0] < oldest:
+                mins.popleft()
+            while maxs and data[maxs[-1] % capacity, column] <= value:
+                maxs.pop()
+            maxs.append(seq)
+            while maxs[0] < oldest:
+                maxs.popleft()
+
+    def extend(self, samples: np.ndarray) -> None:
+        for sample in np.asarray(samples).reshape(-1, self.width):
+            self.push(sample)
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def last(self) -> np.ndarray:
+        return self.buffer.last()
+
+    def last_value(self, column: int = 0) -> float:
+        return float(self.buffer.data[self.buffer.index - 1, column])
+
+    def count(self) -> int:
+        return min(self.buffer.total, self.window)
+
+    def mean(self) -> np.ndarray:
+        return self._sum / max(self.count(), 1)
+
+    def var(self) -> np.ndarray:
+        n = max(self.count(), 1)
+        mean = self._sum / n
+        return np.maximum(self._sumsq / n - mean * mean, 0.0)
+
+    def min(self) -> np.ndarray:
+        capacity = self.buffer.capacity
+        return np.array([self.buffer.data[q[0] % capacity, c] for c, q in enumerate(self._min_seq)])
+
+    def max(self) -> np.ndarray:
+        capacity = self.buffer.capacity
+        return np.array([self.buffer.data[q[0] % capacity, c] for c, q in enumerate(self._max_seq)])
+
+
+class SensorHub:
+    """
+    Ingests telemetry rows into per-channel ring buffers and exposes the latest values and
+    windowed features to the controllers. A row is a flat float array holding every channel's
+    columns in channel order (see DEFAULT_COLUMNS).
+    """
+
+    def __init__(self, channels: Optional[Mapping[str, int]] = None, capacity: int = 1024,
+                 window: int = 50) -> None:
+        """
+        :param channels: Channel name -> width; defaults to DEFAULT_CHANNELS.
+        :param capacity: Samples kept per channel.
+        :param window: Samples covered by the rolling features.
+        """
+        channels = dict(channels or DEFAULT_CHANNELS)
+        self.channels: Dict[str, SensorChannel] = {
+            name: SensorChannel(name, width, capacity, window) for name, width in channels.items()
+        }
+        self._slices: List[Tuple[SensorChannel, slice]] = []
+        offset = 0
+        for channel in self.channels.values():
+            self._slices.append((channel, slice(offset, offset + channel.width)))
+            offset += channel.width
+        self.row_width = offset
+        self._ai_input = np.zeros((1, len(AI_FEATURES)), dtype=np.float32)
+        self._ai_sources = [(self.channels[name], column) for name, column in AI_FEATURES if name in self.channels]
+
+    def __getitem__(self, name: str) -> SensorChannel:
+        return self.channels[name]
+
+    def push_row(self, row: Sequence[float]) -> None:
+        """Append one telemetry row (all channels, flat, in channel order)."""
+        row = np.asarray(row, dtype=np.float64)
+        for channel, columns in self._slices:
+            channel.push(row[columns])
+
+    def push_rows(self, rows: np.ndarray) -> None:
+        """Append a block of telemetry rows of shape (n, row_width)."""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, self.row_width)
+        for channel, columns in self._slices:
+            channel.extend(rows[:, columns])
+
+    def push_frame(self, frame: Mapping[str, Any]) -> None:
+        """Append a sample for each channel present in a dict-style frame."""
+        for name, value in frame.items():
+            channel = self.channels.get(name)
+            if channel is not None:
+                channel.push(value)
+
+    def ingest(self, rows: Iterable[Sequence[float]], limit: Optional[int] = None) -> int:
+        """
+        Pull rows from a reader generator into the buffers.
+        :param limit: Maximum number of rows to consume (None drains the reader).
+        :return: Number of rows ingested.
+        """
+        count = 0
+        for row in rows:
+            self.push_row(row)
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
+
+    def ai_input(self) -> np.ndarray:
+        """Latest AITuner input as a preallocated (1, n_features) float32 array (overwritten on each call)."""
+        out = self._ai_input[0]
+        for i, (channel, column) in enumerate(self._ai_sources):
+            out[i] = channel.buffer.data[channel.buffer.index - 1, column]
+        return self._ai_input
+
+    def ai_window(self, n: int) -> np.ndarray:
+        """Copy of the last n AITuner inputs, oldest first, as an (n, n_features) float32 array."""
+        columns = [channel.buffer.window(n)[:, column] for channel, column in self._ai_sources]
+        return np.stack(columns, axis=1).astype(np.float32)
+
+
+def feature_columns(features: Sequence[Tuple[str, int]] = AI_FEATURES,
+                    channels: Mapping[str, int] = DEFAULT_CHANNELS) -> List[int]:
+    """Column index within a flat telemetry row for each (channel, column) feature."""
+    offsets, offset = {}, 0
+    for name, width in channels.items():
+        offsets[name] = offset
+        offset += width
+    return [offsets[name] + column for name, column in features]
+
+
+def load_telemetry(path: str, columns: Sequence[str] = DEFAULT_COLUMNS) -> np.ndarray:
+    """
+    Load a whole telemetry log as a float64 array of shape (n, len(columns)).
+    Supported formats: CSV with a header row, Parquet (requires pyarrow), and NumPy .npy files
+    holding either a structured array with named fields or a plain 2-D array already in column order.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='') as f:
+            header = next(csv.reader(f))
+        try:
+            order = [header.index(column) for column in columns]
+        except ValueError as exc:
+            raise ValueError(f"Telemetry log {path} is missing a column: {exc}")
+        return np.loadtxt(path, delimiter=',', skiprows=1, usecols=order, ndmin=2, dtype=np.float64)
+    if extension == '.parquet':
+        try:
+            parquet = importlib.import_module('pyarrow.parquet')
+        except ImportError:
+            raise ImportError("pyarrow must be installed to read Parquet telemetry logs.")
+        table = parquet.read_table(path, columns=list(columns))
+        return np.column_stack([table.column(column).to_numpy() for column in columns]).astype(np.float64)
+    if extension == '.npy':
+        data = np.load(path)
+        if data.dtype.names:
+            return np.column_stack([data[column] for column in columns]).astype(np.float64)
+        return np.asarray(data, dtype=np.float64).reshape(-1, len(columns))
+    raise ValueError(f"Unsupported telemetry format '{extension}' for {path}.")
+
+
+def read_csv(path: str, columns: Sequence[str] = DEFAULT_COLUMNS) -> Iterator[np.ndarray]:
+    """
+    Yield telemetry rows from a CSV log with a header row. Columns are reordered to `columns`;
+    extra columns (e.g. a timestamp) are ignored.
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        try:
+            order = [header.index(column) for column in columns]
+        except ValueError as exc:
+            raise ValueError(f"Telemetry log {path} is missing a column: {exc}")
+        for record in reader:
+            if record:
+                yield np.array([float(record[i]) for i in order])
+
+
+def read_socket(sock: socket.socket, width: int = len(DEFAULT_COLUMNS)) -> Iterator[np.ndarray]:
+    """Yield telemetry rows from a stream of newline-terminated, comma-separated values."""
+    pending = b''
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            if line.strip():
+                row = np.array(line.split(b','), dtype=np.float64)
+                if len(row) != width:
+                    logger.warning(f"Dropping malformed telemetry line with {len(row)} values.")
+                    continue
+                yield row
+
+
+def replay(rows: Iterable[Sequence[float]], rate_hz: Optional[float] = None) -> Iterator[Sequence[float]]:
+    """
+    Replay recorded rows, optionally paced at `rate_hz` against the monotonic clock.
+    Without a rate, rows are yielded as fast as they are consumed.
+    """
+    if rate_hz is None:
+        yield from rows
+        return
+    period = 1.0 / rate_hz
+    next_time = time.monotonic()
+    for row in rows:
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        yield row
+        next_time += period
@@ -0,0 +1,280 @@
+"""
+Per-tick inference for the windowed sequence models ('lstm', 'hybrid_cnn_lstm' and 'transformer'
+with hyperparameters={'window': T}). A windowed model scores the last T sensor frames; rerunning it
+on the whole window every tick costs O(T). The step engines here keep the state that carries over
+from one tick to the next and only process the newest frame:
+
+- RecurrentStepEngine holds the LSTM hidden and cell state (and the last few frames for the
+  Conv1D front end of the CNN-LSTM), so a tick costs the same whatever the window length.
+- TransformerStepEngine caches the keys and values of the last T frames, so each tick projects
+  one frame and runs a single attention read over the cache.
+
+All engines handle several independent streams at once: `step` takes one frame per stream.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List, Optional
+import logging
+
+import numpy as np
+
+try:
+    from .inference_engine import DenseInferenceEngine, ACTIVATIONS, activation_name
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine, ACTIVATIONS, activation_name
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _layers(model: Any) -> List[Any]:
+    return [layer for layer in getattr(model, 'layers', None) or [] if type(layer).__name__ != 'InputLayer']
+
+
+def _head(layers: List[Any]) -> DenseInferenceEngine:
+    return DenseInferenceEngine([(*layer.get_weights(), activation_name(layer)) for layer in layers])
+
+
+class FrameWindow:
+    """
+    The last `window` frames of each stream in chronological order, zero-filled until the window
+    is full. Every frame is written twice into a buffer of 2 * window rows, so the current window
+    is always one contiguous slice and pushing a frame never shifts the buffer.
+    """
+
+    def __init__(self, window: int, frame_dim: int, streams: int = 1) -> None:
+        self.window = window
+        self.frame_dim = frame_dim
+        self._frames = np.zeros((streams, 2 * window, frame_dim), dtype=np.float32)
+        self._pos = 0
+
+    @property
+    def streams(self) -> int:
+        return len(self._frames)
+
+    def push(self, frames: np.ndarray) -> np.ndarray:
+        """
+        :param frames: Newest frame of each stream, shape (streams, frame_dim).
+        :return: Flattened windows of shape (streams, window * frame_dim), oldest frame first.
+        """
+        self._frames[:, self._pos] = frames
+        self._frames[:, self._pos + self.window] = frames
+        self._pos = (self._pos + 1) % self.window
+        return self._frames[:, self._pos:self._pos + self.window].reshape(self.streams, -1)
+
+
+class _StepEngine(ABC):
+    """Shared stream bookkeeping of the step engines."""
+
+    frame_dim = 0
+
+    @abstractmethod
+    def reset(self, streams: int = 1) -> None:
+        """Forget all history, e.g. at the start of a session, for `streams` independent streams."""
+
+    @abstractmethod
+    def step(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Advance every stream by one frame.
+        :param frames: Newest frame of each stream, shape (streams, frame_dim).
+        :return: Model outputs for the window ending at this frame, shape (streams, outputs).
+        """
+
+    def _frames(self, frames: np.ndarray, streams: Optional[int]) -> np.ndarray:
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, self.frame_dim)
+        if streams is None:
+            self.reset(len(frames))
+        elif len(frames) != streams:
+            raise ValueError(f"Expected one frame for each of the {streams} streams, got {len(frames)}; "
+                             f"call reset() to change the number of streams.")
+        return frames
+
+
+class RewindowStepEngine(_StepEngine):
+    """
+    Reference step engine for any windowed model: each tick appends the frame to a FrameWindow and
+    reruns `predict` on the whole window, so its cost grows with the window length.
+    """
+
+    def __init__(self, predict: Callable[[np.ndarray], np.ndarray], window: int, frame_dim: int) -> None:
+        self.predict = predict
+        self.window = window
+        self.frame_dim = frame_dim
+        self._window: Optional[FrameWindow] = None
+
+    def sync(self, model: Any) -> None:
+        """`predict` always sees the current weights."""
+
+    def reset(self, streams: int = 1) -> None:
+        self._window = FrameWindow(self.window, self.frame_dim, streams)
+
+    def step(self, frames: np.ndarray) -> np.ndarray:
+        frames = self._frames(frames, self._window.streams if self._window is not None else None)
+        return np.asarray(self.predict(self._window.push(frames))).reshape(len(frames), -1)
+
+
+class RecurrentStepEngine(_StepEngine):
+    """
+    Stateful NumPy evaluation of Reshape -> [Conv1D] -> LSTM -> Dense models, one frame per tick.
+    The hidden and cell state carry over between ticks, so after a reset the first T ticks give
+    exactly the model's prediction for those T frames; from then on the state summarises the whole
+    history since the reset instead of a sliding window, as with a stateful Keras LSTM.
+    """
+
+    def __init__(self, model: Any) -> None:
+        self.sync(model)
+        self._h: Optional[np.ndarray] = None
+
+    @staticmethod
+    def supports(model: Any) -> bool:
+        names = [type(layer).__name__ for layer in _layers(model)]
+        conv = names[1:2] == ['Conv1D']
+        pattern = ['Reshape'] + ['Conv1D'] * conv + ['LSTM']
+        if names[:len(pattern)] != pattern or len(names) == len(pattern) or \
+                any(name != 'Dense' for name in names[len(pattern):]):
+            return False
+        layers = _layers(model)
+        config = layers[len(pattern) - 1].get_config()
+        if config.get('return_sequences') or config.get('go_backwards') or not config.get('use_bias', True) or \
+                activation_name(layers[len(pattern) - 1]) != 'tanh' or \
+                config.get('recurrent_activation') != 'sigmoid':
+            return False
+        if conv:
+            config = layers[1].get_config()
+            if config.get('padding') != 'valid' or tuple(config.get('strides')) != (1,) or \
+                    tuple(config.get('dilation_rate')) != (1,) or activation_name(layers[1]) not in ACTIVATIONS:
+                return False
+        return all(activation_name(layer) in ACTIVATIONS for layer in layers[len(pattern):])
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'RecurrentStepEngine':
+        return cls(model)
+
+    def sync(self, model: Any) -> None:
+        """Reload the weights after training; the recurrent state is kept."""
+        layers = _layers(model)
+        self.window, self.frame_dim = layers[0].get_config()['target_shape']
+        conv = type(layers[1]).__name__ == 'Conv1D'
+        self.conv = (*layers[1].get_weights(), ACTIVATIONS[activation_name(layers[1])]) if conv else None
+        self.kernel, self.recurrent_kernel, self.bias = layers[1 + conv].get_weights()
+        self.units = self.recurrent_kernel.shape[0]
+        self.head = _head(layers[2 + conv:])
+
+    def reset(self, streams: int = 1) -> None:
+        self._h = np.zeros((streams, self.units), dtype=np.float32)
+        self._c = np.zeros((streams, self.units), dtype=np.float32)
+        if self.conv is not None:
+            self._recent = np.zeros((streams, self.conv[0].shape[0], self.frame_dim), dtype=np.float32)
+            self._seen = 0
+
+    def step(self, frames: np.ndarray) -> np.ndarray:
+        """
+        :param frames: Newest sensor frame of each stream, shape (streams, frame_dim).
+        :return: Model outputs of shape (streams, outputs).
+        """
+        x = self._frames(frames, len(self._h) if self._h is not None else None)
+        if self.conv is not None:
+            kernel, bias, activation = self.conv
+            self._recent[:, :-1] = self._recent[:, 1:]
+            self._recent[:, -1] = x
+            self._seen += 1
+            if self._seen < len(kernel):
+                return self.head.predict(self._h)  # Not enough frames for a convolution output yet.
+            x = activation(np.einsum('skd,kdf->sf', self._recent, kernel) + bias)
+        z = x @ self.kernel + self._h @ self.recurrent_kernel + self.bias
+        i, f, g, o = np.split(z, 4, axis=1)  # Keras gate order: input, forget, cell, output.
+        self._c = _sigmoid(f) * self._c + _sigmoid(i) * np.tanh(g)
+        self._h = _sigmoid(o) * np.tanh(self._c)
+        return self.head.predict(self._h)
+
+
+class TransformerStepEngine(_StepEngine):
+    """
+    NumPy evaluation of the windowed transformer (Reshape -> Dense embedding -> attention of the
+    newest frame over the window -> residual LayerNormalization -> Dense head) with a key/value
+    cache. Each tick embeds and projects only the new frame and overwrites the oldest cache slot;
+    the model has no positional encoding, so the order of the slots does not matter. Once T frames
+    have been seen, every tick gives exactly the model's prediction for the last T frames.
+    """
+
+    LAYER_TYPES = {'Reshape', 'Dense', 'Cropping1D', 'MultiHeadAttention', 'Add', 'LayerNormalization', 'Flatten'}
+
+    def __init__(self, model: Any) -> None:
+        self.sync(model)
+        self._keys: Optional[np.ndarray] = None
+
+    @staticmethod
+    def supports(model: Any) -> bool:
+        layers = _layers(model)
+        names = [type(layer).__name__ for layer in layers]
+        if set(names) != TransformerStepEngine.LAYER_TYPES or names.count('Dense') < 2 or \
+                any(names.count(name) != 1 for name in TransformerStepEngine.LAYER_TYPES - {'Dense'}):
+            return False
+        window = layers[names.index('Reshape')].get_config()['target_shape'][0]
+        cropping = tuple(layers[names.index('Cropping1D')].get_config()['cropping'])
+        return cropping == (window - 1, 0) and all(activation_name(layer) in ACTIVATIONS
+                                                   for layer in layers if type(layer).__name__ == 'Dense')
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'TransformerStepEngine':
+        return cls(model)
+
+    def sync(self, model: Any) -> None:
+        """Reload the weights after training. Cached keys and values were projected with the old
+        weights, so the engine is reset."""
+        layers = _layers(model)
+        by_type = {type(layer).__name__: layer for layer in layers}
+        dense = [layer for layer in layers if type(layer).__name__ == 'Dense']
+        self.window, self.frame_dim = by_type['Reshape'].get_config()['target_shape']
+        self.embed_kernel, self.embed_bias = dense[0].get_weights()
+        self.embed_activation = ACTIVATIONS[activation_name(dense[0])]
+        (self.query_kernel, self.query_bias, self.key_kernel, self.key_bias,
+         self.value_kernel, self.value_bias, self.output_kernel, self.output_bias) = \
+            by_type['MultiHeadAttention'].get_weights()
+        self.heads, self.key_dim = self.query_bias.shape
+        norm = by_type['LayerNormalization']
+        self.gamma, self.beta = norm.get_weights()
+        self.epsilon = norm.get_config()['epsilon']
+        self.head = _head(dense[1:])
+        self._keys = None
+
+    def reset(self, streams: int = 1) -> None:
+        shape = (streams, self.window, self.heads, self.key_dim)
+        self._keys = np.zeros(shape, dtype=np.float32)
+        self._values = np.zeros(shape, dtype=np.float32)
+        self._pos = 0
+        self._filled = 0
+
+    def step(self, frames: np.ndarray) -> np.ndarray:
+        """
+        :param frames: Newest sensor frame of each stream, shape (streams, frame_dim).
+        :return: Model outputs of shape (streams, outputs).
+        """
+        x = self._frames(frames, len(self._keys) if self._keys is not None else None)
+        e = self.embed_activation(x @ self.embed_kernel + self.embed_bias)
+        query = np.einsum('sd,dhk->shk', e, self.query_kernel) + self.query_bias
+        self._keys[:, self._pos] = np.einsum('sd,dhk->shk', e, self.key_kernel) + self.key_bias
+        self._values[:, self._pos] = np.einsum('sd,dhk->shk', e, self.value_kernel) + self.value_bias
+        self._pos = (self._pos + 1) % self.window
+        self._filled = min(self._filled + 1, self.window)
+        keys, values = self._keys[:, :self._filled], self._values[:, :self._filled]
+        scores = np.einsum('shk,sthk->sht', query, keys) / np.sqrt(self.key_dim)
+        weights = np.exp(scores - scores.max(axis=-1, keepdims=True))
+        weights /= weights.sum(axis=-1, keepdims=True)
+        attended = np.einsum('sht,sthk->shk', weights, values)
+        y = e + np.einsum('shk,hkd->sd', attended, self.output_kernel) + self.output_bias
+        mean = y.mean(axis=-1, keepdims=True)
+        variance = ((y - mean) ** 2).mean(axis=-1, keepdims=True)
+        y = (y - mean) / np.sqrt(variance + self.epsilon) * self.gamma + self.beta
+        return self.head.predict(y.astype(np.float32))
+
+
+def build_step_engine(model: Any) -> Optional[_StepEngine]:
+    """Incremental step engine for a windowed sequence model, or None if its layers are not supported."""
+    for engine in (RecurrentStepEngine, TransformerStepEngine):
+        if engine.supports(model):
+            logger.info(f"Using {engine.__name__} for per-tick sequence inference.")
+            return engine.from_model(model)
+    return None
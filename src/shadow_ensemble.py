@@ -0,0 +1,267 @@
+"""
+Shadow-mode evaluation of several AITuner model types on the production sensor stream. The primary
+model decides; shadow models score the same rows in the background and only their agreement with
+the primary, decision distribution and inference latency are recorded.
+
+Usage: python src/shadow_ensemble.py --primary default --shadows lstm quantile reinforcement
+"""
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .inference_engine import DenseInferenceEngine
+    from .instrumentation import Instrumentation, default_instrumentation
+    from .replay import EnginePredictor
+except ImportError:  # Executed as a script from within src/.
+    from inference_engine import DenseInferenceEngine
+    from instrumentation import Instrumentation, default_instrumentation
+    from replay import EnginePredictor
+
+logger = logging.getLogger(__name__)
+
+# Decision values, in the column order of the recorded distributions.
+DIRECTIONS = (-1, 0, 1)
+
+# Shadow predictors of a process pool worker, installed once by _init_worker.
+_WORKER_PREDICTORS: Dict[str, Any] = {}
+
+
+def _init_worker(predictors: Dict[str, Any]) -> None:
+    _WORKER_PREDICTORS.clear()
+    _WORKER_PREDICTORS.update(predictors)
+
+
+def _score(predictors: Mapping[str, Any], batch: np.ndarray) -> List[Tuple[str, np.ndarray, float]]:
+    """Each predictor's directions for a batch and the seconds its call took."""
+    results = []
+    for name, predictor in predictors.items():
+        start = time.perf_counter()
+        directions = np.asarray(predictor.predict_adjustments(batch), dtype=np.int64).reshape(len(batch))
+        results.append((name, directions, time.perf_counter() - start))
+    return results
+
+
+def _score_in_worker(name: str, batch: np.ndarray) -> List[Tuple[str, np.ndarray, float]]:
+    return _score({name: _WORKER_PREDICTORS[name]}, batch)
+
+
+class ShadowEnsemble:
+    """
+    Primary model plus shadow models scoring the same sensor rows. The primary is called inline and
+    its decision returned at once. Rows are buffered together with the primary's decisions and
+    handed to a background pool in batches of `batch_size`, where every shadow scores the whole
+    batch in one call. If the pool falls behind by `max_pending` batches, new batches are dropped
+    (and counted) rather than queued, so shadows never back up into the primary path.
+
+    `vote` is the optional ensemble mode: every model scores a batch once and the decisions are
+    combined by a weighted sum of directions.
+    """
+
+    def __init__(self, primary: Any, shadows: Mapping[str, Any], batch_size: int = 64, max_pending: int = 4,
+                 executor: str = 'thread', weights: Optional[Mapping[str, float]] = None,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        :param primary: AITuner (or any object with input_dim and predict_adjustments) that drives the Tuner.
+        :param shadows: Name -> AITuner scored in the background.
+        :param batch_size: Rows per shadow batch.
+        :param max_pending: Shadow batches in flight before new ones are dropped.
+        :param executor: 'thread' (one background thread scores every shadow) or 'process' (one worker
+                         process per shadow, each scoring its own model in parallel; every shadow
+                         needs a NumPy inference engine).
+        :param weights: Name -> vote weight, 'primary' included; models default to 1.
+        :param instrumentation: Receives the primary's and each shadow's inference latency, as the stages
+                                'shadow.primary' and 'shadow.<name>'; defaults to the process-wide
+                                instrumentation.
+        """
+        for name, tuner in [('primary', primary), *shadows.items()]:
+            if getattr(tuner, 'window', None) is not None:
+                raise ValueError(f"Shadow evaluation scores single snapshots; '{name}' is a windowed sequence model.")
+        self.primary = primary
+        self.shadows = dict(shadows)
+        # Warm up every model once (graph tracing, engine buffers) so it does not count as latency.
+        probe = np.zeros((batch_size, primary.input_dim), dtype=np.float32)
+        _score({'primary': primary, **self.shadows}, probe)
+        self.names = ['primary', *self.shadows]
+        self.input_dim = primary.input_dim
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        weights = dict(weights or {})
+        self.weights = np.array([float(weights.get(name, 1.0)) for name in self.names])
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stages = {name: self.instrumentation.stage(f'shadow.{name}') for name in self.names}
+        # Re-entrant: a future that is already done runs its callback inside _submit_locked.
+        self._lock = threading.RLock()
+        self._rows = np.zeros((batch_size, self.input_dim), dtype=np.float32)
+        self._decisions = np.zeros(batch_size, dtype=np.int64)
+        self._buffered = 0
+        self._pending = 0
+        self.rows = {name: 0 for name in self.shadows}
+        self.agreements = {name: 0 for name in self.shadows}
+        self.decisions = {name: np.zeros(len(DIRECTIONS), dtype=np.int64) for name in self.names}
+        self.errors = {name: 0 for name in self.shadows}
+        self.dropped_rows = 0
+        self._executor = self._create_executor(executor)
+
+    def _create_executor(self, kind: str) -> Executor:
+        if kind == 'thread':
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        if kind != 'process':
+            raise ValueError(f"Unknown shadow executor '{kind}'; use 'thread' or 'process'.")
+        predictors = {}
+        for name, tuner in self.shadows.items():
+            if not isinstance(getattr(tuner, 'engine', None), DenseInferenceEngine):
+                raise ValueError(f"Shadow '{name}' has no NumPy inference engine and cannot run in a process pool.")
+            predictors[name] = EnginePredictor(tuner.engine, interval=tuner.model_type == 'quantile',
+                                               policy=tuner.model_type == 'reinforcement')
+        # Spawned workers avoid inheriting TensorFlow's threads from the parent process.
+        pool = ProcessPoolExecutor(max_workers=max(1, len(predictors)), mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker, initargs=(predictors,))
+        # Start the workers now rather than dropping the first batches while they import.
+        probe = np.zeros((1, self.input_dim), dtype=np.float32)
+        for future in [pool.submit(_score_in_worker, name, probe) for name in predictors]:
+            future.result()
+        return pool
+
+    def predict_adjustments(self, batch: np.ndarray) -> np.ndarray:
+        """Primary tuning directions for a batch; the batch is also queued for the shadows."""
+        batch = np.asarray(batch, dtype=np.float32).reshape(-1, self.input_dim)
+        start = self.instrumentation.clock()
+        directions = np.asarray(self.primary.predict_adjustments(batch), dtype=np.int64).reshape(len(batch))
+        self.instrumentation.observe(self._stages['primary'], self.instrumentation.clock() - start)
+        self._buffer(batch, directions)
+        return directions
+
+    def predict_adjustment(self, sensor_data: Sequence[float]) -> int:
+        """Drop-in for AITuner.predict_adjustment: the primary's direction for one sensor vector."""
+        return int(self.predict_adjustments(sensor_data)[0])
+
+    def _buffer(self, batch: np.ndarray, directions: np.ndarray) -> None:
+        with self._lock:
+            self.decisions['primary'] += np.bincount(directions + 1, minlength=len(DIRECTIONS))
+            offset = 0
+            while offset < len(batch):
+                take = min(self.batch_size - self._buffered, len(batch) - offset)
+                self._rows[self._buffered:self._buffered + take] = batch[offset:offset + take]
+                self._decisions[self._buffered:self._buffered + take] = directions[offset:offset + take]
+                self._buffered += take
+                offset += take
+                if self._buffered == self.batch_size:
+                    self._submit_locked()
+
+    def flush(self) -> None:
+        """Hand the rows buffered so far to the shadows."""
+        with self._lock:
+            if self._buffered:
+                self._submit_locked()
+
+    def _submit_locked(self) -> None:
+        rows = self._rows[:self._buffered].copy()
+        decisions = self._decisions[:self._buffered].copy()
+        self._buffered = 0
+        if self._pending >= self.max_pending:
+            self.dropped_rows += len(rows)
+            return
+        self._pending += 1
+        if isinstance(self._executor, ProcessPoolExecutor):
+            futures = {name: self._executor.submit(_score_in_worker, name, rows) for name in self.shadows}
+        else:
+            futures = {None: self._executor.submit(_score, self.shadows, rows)}
+        remaining = [len(futures)]
+        for name, future in futures.items():
+            future.add_done_callback(lambda done, name=name: self._collect(done, name, decisions, remaining))
+
+    def _collect(self, future: Future, name: Optional[str], primary: np.ndarray, remaining: List[int]) -> None:
+        """Record a finished scoring future; `name` is its shadow, or None if it scored every shadow."""
+        try:
+            results = future.result()
+        except Exception:
+            logger.exception("Shadow scoring failed.")
+            results = None
+        with self._lock:
+            # A batch stays pending until every future scoring it is done.
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self._pending -= 1
+            if results is None:
+                for failed in (self.shadows if name is None else [name]):
+                    self.errors[failed] += 1
+                return
+            for name, directions, latency in results:
+                self.rows[name] += len(directions)
+                self.agreements[name] += int(np.count_nonzero(directions == primary))
+                self.decisions[name] += np.bincount(directions + 1, minlength=len(DIRECTIONS))
+                self.instrumentation.observe(self._stages[name], latency)
+
+    def vote(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Weighted ensemble decision: every model scores the batch once, and each row moves in the
+        direction whose weighted support outweighs the opposite one by more than half the total weight.
+        """
+        batch = np.asarray(batch, dtype=np.float32).reshape(-1, self.input_dim)
+        results = _score({'primary': self.primary, **self.shadows}, batch)
+        directions = np.stack([directions for _, directions, _ in results], axis=1)  # (n, models)
+        score = directions @ self.weights
+        margin = 0.5 * self.weights.sum()
+        return np.where(score > margin, 1, np.where(score < -margin, -1, 0)).astype(np.int64)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per model: rows scored, agreement with the primary, decision shares and latency percentiles (seconds)."""
+        with self._lock:
+            report = {}
+            for name in self.names:
+                decisions = self.decisions[name]
+                total = int(decisions.sum())
+                stage = self._stages[name]
+                entry = {
+                    'rows': total,
+                    'decisions': {direction: (float(count) / total if total else 0.0)
+                                  for direction, count in zip(DIRECTIONS, decisions.tolist())},
+                    'latency_p50': self.instrumentation.percentile(stage, 50),
+                    'latency_p99': self.instrumentation.percentile(stage, 99),
+                }
+                if name != 'primary':
+                    entry['agreement'] = self.agreements[name] / self.rows[name] if self.rows[name] else 0.0
+                    entry['errors'] = self.errors[name]
+                report[name] = entry
+            report['primary']['dropped_rows'] = self.dropped_rows
+            return report
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Score the buffered rows and stop the pool."""
+        self.flush()
+        self._executor.shutdown(wait=wait)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare AITuner model types in shadow mode on simulated telemetry.")
+    parser.add_argument('--primary', default='default', help="model_type that drives the Tuner.")
+    parser.add_argument('--shadows', nargs='+', default=['lstm', 'quantile', 'reinforcement'])
+    parser.add_argument('--rows', type=int, default=20000, help="Sensor rows to stream, one per call.")
+    parser.add_argument('--executor', default='thread', choices=['thread', 'process'])
+    args = parser.parse_args(argv)
+    try:
+        from .ai_tuner import AITuner
+    except ImportError:  # Executed as a script from within src/.
+        from ai_tuner import AITuner
+    instrumentation = Instrumentation()
+    ensemble = ShadowEnsemble(AITuner(input_dim=5, model_type=args.primary),
+                              {name: AITuner(input_dim=5, model_type=name) for name in args.shadows},
+                              executor=args.executor, instrumentation=instrumentation)
+    rows = np.random.default_rng(0).normal(size=(args.rows, 5)).astype(np.float32)
+    for row in rows:
+        ensemble.predict_adjustment(row)
+    ensemble.shutdown()
+    for name, stats in ensemble.stats().items():
+        logger.info(f"[Shadow] {name}: {stats}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,32 +1,79 @@
-from typing import Dict, Any
+from typing import Any, Dict, MutableMapping, Optional
 import logging
 
+try:
+    from .calibration_table import CalibrationTable, OperatingPoint, find_table
+    from .instrumentation import Instrumentation, default_instrumentation
+except ImportError:  # Executed as a script from within src/.
+    from calibration_table import CalibrationTable, OperatingPoint, find_table
+    from instrumentation import Instrumentation, default_instrumentation
+
 logger = logging.getLogger(__name__)
 
 class Tuner:
-    def __init__(self, base_map: Dict[str, Any], gradient_step: float = 0.01) -> None:
+    def __init__(self, base_map: MutableMapping[str, Any], gradient_step: float = 0.01,
+                 instrumentation: Optional[Instrumentation] = None, gate: Optional[Any] = None) -> None:
         """
-        :param base_map: A dictionary representing the calibration values.
+        :param base_map: A dictionary or CalibrationStore holding the calibration values.
         :param gradient_step: The small increment value for adjustments.
+        :param instrumentation: Receives each adjustment's latency and new value; defaults to the
+                                process-wide instrumentation. Per-adjustment log lines are only
+                                formatted when this module's logger is enabled for DEBUG.
         """
         self.map = base_map
         self.gradient_step = gradient_step
+        self._tables: Dict[str, Optional[CalibrationTable]] = {}
+        self.instrumentation = instrumentation if instrumentation is not None else default_instrumentation()
+        self._stage = self.instrumentation.stage('tuner.apply_gradient_increment')
+        self._gated_stage = self.instrumentation.stage('tuner.gated')
+        self.gate = gate
 
-    def apply_gradient_increment(self, parameter: str, direction: int = 1) -> float:
+    def apply_gradient_increment(self, parameter: str, direction: int = 1,
+                                 operating_point: Optional[OperatingPoint] = None) -> float:
         """
         Adjusts a parameter by a small gradient increment.
         :param parameter: The key in the base map to adjust.
         :param direction: +1 for increase, -1 for decrease.
-        :return: Updated parameter value.
+        :param operating_point: For table parameters, the point (e.g. {'rpm': 4500, 'load': 0.6})
+                                whose neighbouring cells are adjusted. Without it the whole table shifts.
+        :return: Updated parameter value (for tables, the value at the operating point, or the table mean);
+                 the current value if the gate is closed.
         """
+        start = self.instrumentation.clock()
         if parameter not in self.map:
             logger.error(f"{parameter} not found in the base map.")
             raise KeyError(f"{parameter} not found in the base map.")
+        if parameter not in self._tables:
+            self._tables[parameter] = find_table(self.map, parameter)
+        table = self._tables[parameter]
+        if self.gate is not None and not self.gate.is_open:
+            if table is None:
+                current_value = self.map[parameter]
+            elif operating_point is None:
+                current_value = float(table.values.mean())
+            else:
+                current_value = table.lookup(operating_point)
+            self.instrumentation.record(self._gated_stage, start, current_value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Adjustment of '{parameter}' suppressed by the anomaly gate.")
+            return current_value
+        if table is not None:
+            if operating_point is None:
+                table.shift(direction * self.gradient_step)
+                new_value = float(table.values.mean())
+            else:
+                new_value = table.apply_increment(operating_point, direction * self.gradient_step)
+            self.instrumentation.record(self._stage, start, new_value)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Table '{parameter}' adjusted by {direction * self.gradient_step} (value now {new_value}).")
+            return new_value
         current_value = self.map[parameter]
         new_value = current_value + direction * self.gradient_step
         self.map[parameter] = new_value
-        logger.info(f"Parameter '{parameter}' adjusted from {current_value} to {new_value}.")
+        self.instrumentation.record(self._stage, start, new_value)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Parameter '{parameter}' adjusted from {current_value} to {new_value}.")
         return new_value
 
-    def get_updated_map(self) -> Dict[str, Any]:
+    def get_updated_map(self) -> MutableMapping[str, Any]:
         return self.map
@@ -1,5 +1,6 @@
 import unittest
-from src.aero_controller import AeroController
+import numpy as np
+from src.aero_controller import AeroController, AeroFleetController
 
 class TestAeroController(unittest.TestCase):
     def setUp(self):
@@ -13,5 +14,25 @@ class TestAeroController(unittest.TestCase):
         adjustments = self.aero.update_braking_stability([90, 92, 88, 91])
         self.assertTrue(isinstance(adjustments, dict))
 
+    def test_update_braking_stability_array_matches_dict(self):
+        expected = list(self.aero.update_braking_stability([90, 92, 70, 91]).values())
+        out = np.zeros(4)
+        self.aero.update_braking_stability_array(np.array([90.0, 92.0, 70.0, 91.0]), out=out)
+        self.assertEqual(out.tolist(), expected)
+        self.assertTrue(self.aero.get_aero_status()['BrakeStability'])
+
+    def test_fleet_matches_scalar_controller(self):
+        rng = np.random.default_rng(0)
+        wheel_speeds = rng.uniform(40, 120, size=(200, 4))
+        speeds = rng.uniform(0, 160, size=200)
+        fleet = AeroFleetController(200)
+        adjustments = fleet.update_braking_stability(wheel_speeds)
+        drs = fleet.update_drs(speeds, np.full(200, 75.0))
+        for i in range(200):
+            expected = self.aero.update_braking_stability(wheel_speeds[i].tolist())
+            self.assertEqual(adjustments[i].tolist(), list(expected.values()))
+            self.assertEqual(drs[i], self.aero.update_drs(speeds[i], 75.0))
+            self.assertEqual(fleet.brake_stability_active[i], self.aero.get_aero_status()['BrakeStability'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from src.ai_tuner import AITuner
+import numpy as np
+import tf_keras
+from src.ai_tuner import AITuner, MIN_CONFIDENCE, directions_from_intervals, directions_from_predictions, pinball_loss
 
 class TestAITuner(unittest.TestCase):
     def setUp(self):
@@ -10,5 +12,70 @@ class TestAITuner(unittest.TestCase):
         adjustment = self.ai_tuner.predict_adjustment([0.5, 0.7, 0.2, 0.3, 0.9])
         self.assertIn(adjustment, [-1, 0, 1])
 
+class TestQuantileTuner(unittest.TestCase):
+    def test_pinball_loss(self):
+        quantiles = [0.1, 0.5, 0.9]
+        y_true = np.array([[0.0], [1.0]], dtype=np.float32)
+        y_pred = np.array([[0.2, 0.0, -0.2], [0.5, 1.0, 2.0]], dtype=np.float32)
+        error = y_true - y_pred
+        expected = np.mean(np.maximum(np.array(quantiles) * error, (np.array(quantiles) - 1) * error), axis=1)
+        np.testing.assert_allclose(np.asarray(pinball_loss(quantiles)(y_true, y_pred)), expected, rtol=1e-6)
+
+    def test_interval_policy_requires_the_whole_interval_to_clear_the_threshold(self):
+        lower = np.array([0.2, 0.05, -0.5, -0.5])
+        upper = np.array([0.6, 0.6, -0.2, 0.5])
+        self.assertEqual(directions_from_intervals(lower, upper).tolist(), [1, 0, -1, 0])
+
+    def test_trained_interval_covers_targets(self):
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-1, 1, size=(4000, 5)).astype(np.float32)
+        y = 0.5 * x[:, 0] + rng.uniform(-0.3, 0.3, size=len(x))
+        ai_tuner = AITuner(input_dim=5, model_type='quantile', hyperparameters={'quantiles': [0.05, 0.5, 0.95]})
+        ai_tuner.model.fit(x[:3000], y[:3000], epochs=30, batch_size=64, verbose=0)
+        ai_tuner.refresh_inference_engine()
+        lower, median, upper = ai_tuner.predict_interval(x[3000:])
+        self.assertEqual(lower.shape, (1000,))
+        self.assertTrue(np.all((lower <= median) & (median <= upper)))
+        coverage = np.mean((y[3000:] >= lower) & (y[3000:] <= upper))
+        self.assertGreater(coverage, 0.8)
+        self.assertLess(coverage, 0.98)
+        directions = ai_tuner.predict_adjustments(x[3000:])
+        np.testing.assert_array_equal(directions, directions_from_intervals(lower, upper))
+        self.assertEqual(ai_tuner.predict_adjustment(x[3000]), directions[0])
+
+    def test_predict_interval_requires_the_quantile_model(self):
+        with self.assertRaises(ValueError):
+            AITuner(input_dim=5).predict_interval(np.zeros((1, 5)))
+
+class TestBayesianTuner(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(-1, 1, size=(1000, 5)).astype(np.float32)
+        self.y = np.tanh(1.5 * self.x[:, 0])
+        # Seeds weight initialization, fit shuffling and the variational sampling during training.
+        tf_keras.utils.set_random_seed(0)
+        self.ai_tuner = AITuner(input_dim=5, model_type='bayesian')
+
+    def test_predict_uncertainty(self):
+        mean, std, confidence = self.ai_tuner.predict_uncertainty(self.x[:16], samples=64)
+        self.assertEqual(mean.shape, (16,))
+        self.assertTrue(np.all(std > 0))
+        self.assertTrue(np.all((confidence >= 0) & (confidence <= 1)))
+        _, std, confidence = self.ai_tuner.predict_uncertainty(self.x[:16], samples=1)
+        np.testing.assert_array_equal(std, 0.0)
+        np.testing.assert_array_equal(confidence, 1.0)
+
+    def test_trained_model_adjusts_when_confident(self):
+        self.ai_tuner.model.fit(self.x, self.y, epochs=20, batch_size=32, verbose=0)
+        self.ai_tuner.refresh_inference_engine()
+        self.ai_tuner.engine.rng = np.random.default_rng(0)
+        mean, _, confidence = self.ai_tuner.predict_uncertainty(self.x[:200], samples=256)
+        # Seeded runs land at 0.03-0.05.
+        self.assertLess(np.mean(np.abs(mean - self.y[:200])), 0.2)
+        expected = np.where(confidence >= MIN_CONFIDENCE, directions_from_predictions(mean), 0)
+        agreement = np.mean(self.ai_tuner.predict_adjustments(self.x[:200]) == expected)
+        self.assertGreater(agreement, 0.9)  # predict_adjustments draws its own samples.
+        self.assertIn(self.ai_tuner.predict_adjustment(self.x[0]), (-1, 0, 1))
+
 if __name__ == '__main__':
     unittest.main()
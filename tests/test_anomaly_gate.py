@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.anomaly_gate import AnomalyGate, EwmaThreshold, QuantileThreshold
+from src.instrumentation import Instrumentation
+
+def _telemetry(rng, n):
+    # Five correlated features, like the AI tuner inputs (steering, throttle, brake, accel_x, lambda).
+    throttle = rng.uniform(0, 1, size=n)
+    return np.column_stack([
+        rng.normal(0, 0.2, size=n), throttle, 1 - throttle + rng.normal(0, 0.02, size=n),
+        0.8 * throttle + rng.normal(0, 0.05, size=n), 1.0 + rng.normal(0, 0.02, size=n),
+    ]).astype(np.float32)
+
+class TestThresholds(unittest.TestCase):
+    def test_batched_ewma_matches_sequential_updates(self):
+        errors = np.random.default_rng(0).exponential(size=500)
+        batched, sequential = EwmaThreshold(alpha=0.05), EwmaThreshold(alpha=0.05)
+        batched.update(errors[:100])
+        batched.update(errors[100:])
+        for error in errors:
+            sequential.update([error])
+        self.assertAlmostEqual(batched.threshold, sequential.threshold, places=9)
+        self.assertTrue(batched.ready)
+
+    def test_quantile_sketch(self):
+        errors = np.random.default_rng(0).lognormal(size=100000)
+        threshold = QuantileThreshold(quantile=0.99, margin=1.0, half_life=10 ** 9)
+        threshold.update(errors)
+        self.assertAlmostEqual(threshold.threshold / np.quantile(errors, 0.99), 1.0, delta=0.16)
+
+class TestAnomalyGate(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.normal = _telemetry(rng, 4000)
+        self.gate = AnomalyGate(AITuner(input_dim=5, model_type='autoencoder').autoencoder, hold=50,
+                                instrumentation=Instrumentation())
+        self.gate.fit(self.normal[:3000], epochs=20)
+
+    def test_flags_corrupt_rows_and_closes_the_gate(self):
+        self.assertTrue(self.gate.is_open)
+        normal = self.gate.check(self.normal[3000:])
+        self.assertGreater(normal.mean(), 0.98)
+        corrupt = self.normal[3000:3010].copy()
+        corrupt[:, 4] = 5.0      # Lambda sensor stuck high.
+        corrupt[0, 1] = np.nan   # Dropped throttle sample.
+        self.assertFalse(self.gate.check(corrupt).any())
+        self.assertFalse(self.gate.is_open)
+        self.gate.check(self.normal[3100:3150])
+        self.assertTrue(self.gate.is_open)
+        self.assertTrue(np.isfinite(self.gate.threshold.threshold))
+
+    def test_gate_is_closed_until_the_threshold_warms_up(self):
+        gate = AnomalyGate(AITuner(input_dim=5, model_type='autoencoder').autoencoder,
+                           threshold=EwmaThreshold(warmup=100), instrumentation=Instrumentation())
+        gate.check(self.normal[:50])
+        self.assertFalse(gate.is_open)
+        gate.check(self.normal[50:100])
+        self.assertTrue(gate.is_open)
+
+if __name__ == '__main__':
+    unittest.main()
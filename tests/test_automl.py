@@ -0,0 +1,45 @@
+import importlib.util
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+
+@unittest.skipIf(importlib.util.find_spec('keras_tuner') is None, "keras_tuner is not installed.")
+class TestAutoMLSearch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(-1, 1, size=(256, 5)).astype(np.float32)
+        self.y = np.tanh(self.x[:, 0] - 0.5 * self.x[:, 4])
+
+    def _search(self, max_trials, workers=1):
+        from src.automl import AutoMLSearch
+        return AutoMLSearch(input_dim=5, directory=self.directory, max_trials=max_trials, epochs=3, patience=1,
+                            workers=workers, algorithm='random', seed=1)
+
+    def test_search_resumes_and_hands_best_model_to_ai_tuner(self):
+        first = self._search(max_trials=2)
+        first.run(self.x, self.y)
+        self.assertEqual(len(first.tuner.oracle.trials), 2)
+        resumed = self._search(max_trials=3)
+        best = resumed.run(self.x, self.y)
+        self.assertEqual(len(resumed.tuner.oracle.trials), 3)
+        self.assertEqual(set(best), {'depth', 'units', 'activation', 'learning_rate'})
+        tuner = resumed.best_tuner()
+        self.assertIsInstance(tuner, AITuner)
+        self.assertEqual(len(tuner.model.layers), best['depth'] + 1)
+        np.testing.assert_allclose(tuner.predict_raw(self.x[:8]), tuner.model.predict(self.x[:8], verbose=0),
+                                   rtol=1e-4, atol=1e-5)
+
+    def test_parallel_trials(self):
+        search = self._search(max_trials=2, workers=2)
+        search.run(self.x, self.y)
+        statuses = [trial.status for trial in search.tuner.oracle.trials.values()]
+        self.assertEqual(statuses, ['COMPLETED', 'COMPLETED'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,20 +2,50 @@ import os
 import yaml
 import unittest
 from src.base_map import BaseMap
+from src.tuning import Tuner
 
 class TestBaseMap(unittest.TestCase):
     def setUp(self):
         # Create a temporary base map file.
         self.test_file = 'configs/test_base_map.yaml'
+        self.store_file = 'configs/test_base_map.cal'
         with open(self.test_file, 'w') as f:
             yaml.dump({'fuel_map': 1.0, 'boost_map': 1.0}, f)
     
     def test_load_map(self):
         bm = BaseMap(config_path=self.test_file)
         self.assertEqual(bm.get_map()['fuel_map'], 1.0)
+
+    def test_commit_persists_store(self):
+        bm = BaseMap(config_path=self.test_file, store_path=self.store_file)
+        Tuner(bm.get_map(), gradient_step=0.01).apply_gradient_increment('fuel_map', direction=1)
+        bm.commit()
+        reloaded = BaseMap(config_path=self.test_file, store_path=self.store_file)
+        self.assertAlmostEqual(reloaded.get_map()['fuel_map'], 1.01)
     
+    def test_export_keeps_store_current(self):
+        bm = BaseMap(config_path=self.test_file, store_path=self.store_file)
+        bm.get_map()['fuel_map'] = 1.2
+        bm.commit()
+        past = os.path.getmtime(self.store_file) - 10
+        os.utime(self.store_file, (past, past))
+        bm.export_yaml()
+        self.assertFalse(bm._yaml_is_newer())
+
+    def test_update_map_keeps_the_shared_store(self):
+        bm = BaseMap(config_path=self.test_file, store_path=self.store_file)
+        store = bm.get_map()
+        bm.update_map({'fuel_map': 1.1, 'boost_map': 0.9})
+        self.assertIs(bm.get_map(), store)
+        self.assertEqual(store['fuel_map'], 1.1)
+        with self.assertRaises(ValueError):
+            bm.update_map({'fuel_map': 1.1, 'boost_map': 0.9, 'ignition_map': 1.0})
+        self.assertIs(bm.get_map(), store)
+
     def tearDown(self):
         os.remove(self.test_file)
+        if os.path.exists(self.store_file):
+            os.remove(self.store_file)
 
 if __name__ == '__main__':
     unittest.main()
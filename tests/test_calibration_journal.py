@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from src.calibration_journal import SOURCES, CalibrationJournal
+from src.calibration_store import CalibrationStore
+from src.detuner import Detuner
+from src.instrumentation import Instrumentation
+from src.tuning import Tuner
+
+class TestCalibrationJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal')
+        self.store = CalibrationStore.create({
+            'fuel_map': 1.0, 'boost_map': 1.0,
+            'spark_map': {'axes': {'rpm': [1000, 5000], 'load': [0.2, 1.0]}, 'values': [[10, 12], [14, 16]]},
+        })
+        self.journal = CalibrationJournal(self.path, self.store, snapshot_interval=20)
+        self.start = time.time() + 1.0
+        tuner = Tuner(self.store, instrumentation=Instrumentation())
+        detuner = Detuner(self.store, instrumentation=Instrumentation())
+        self.states = {}
+        for tick in range(100):
+            tuner.apply_gradient_increment('fuel_map', direction=1 if tick % 4 else -1)
+            self.journal.capture('ai_tune', self.start + tick)
+            if tick % 10 == 0:
+                detuner.apply_detune('spark_map')
+                self.journal.capture('detune', self.start + tick)
+            self.store.commit()
+            self.states[tick] = self.store.to_dict()
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def test_time_travel_queries(self):
+        self.assertGreater(self.journal.stats()['snapshots'], 5)
+        for tick in [0, 19, 20, 55, 99]:
+            self.assertEqual(self.journal.map_as_of(self.start + tick + 0.5), self.states[tick])
+        with self.assertRaises(ValueError):
+            self.journal.as_of(0.0)
+
+    def test_history_records_source_and_delta(self):
+        history = self.journal.history('spark_map')
+        self.assertEqual(len(history), 10 * 4)
+        self.assertTrue((history['source'] == SOURCES['detune']).all())
+        self.assertAlmostEqual(float(history['delta'][0]), -0.01)
+
+    def test_rollback_and_revert(self):
+        self.journal.revert('detune', self.start + 49.5)
+        self.assertEqual(self.store.to_dict()['spark_map'], self.states[49]['spark_map'])
+        self.assertEqual(self.store['fuel_map'], self.states[99]['fuel_map'])
+        self.journal.rollback(self.start + 30.5)
+        self.assertEqual(self.store.to_dict(), self.states[30])
+
+    def test_compaction_and_reopen(self):
+        dropped = self.journal.compact(keep_snapshots=2)
+        self.assertGreater(dropped, 0)
+        self.assertEqual(self.journal.map_as_of(self.start + 99.5), self.states[99])
+        self.journal.close()
+        self.store['boost_map'] = 0.5  # Changed outside the journal.
+        self.journal = CalibrationJournal(self.path, self.store)
+        self.assertEqual(self.journal.history('boost_map')['source'].tolist(), [SOURCES['manual']])
+        self.assertEqual(self.journal.map_as_of(float('inf')), self.store.to_dict())
+
+if __name__ == '__main__':
+    unittest.main()
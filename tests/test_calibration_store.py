@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.calibration_store import CalibrationStore
+
+class TestCalibrationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'base_map.cal')
+        self.params = {'fuel_map': 1.0, 'boost_map': [[1.0, 1.1], [1.2, 1.3]]}
+
+    def test_round_trip(self):
+        store = CalibrationStore.create(self.params, self.path)
+        store['fuel_map'] = 1.01
+        store.set_cells('boost_map', (np.array([1]), np.array([0])), 0.9)
+        store.commit()
+        store.close()
+        reopened = CalibrationStore.open(self.path)
+        self.assertAlmostEqual(reopened['fuel_map'], 1.01)
+        self.assertEqual(reopened.to_dict()['boost_map'], [[1.0, 1.1], [0.9, 1.3]])
+
+    def test_uncommitted_writes_are_not_visible(self):
+        store = CalibrationStore.create(self.params, self.path)
+        store['fuel_map'] = 2.0
+        self.assertAlmostEqual(CalibrationStore.open(self.path, readonly=True)['fuel_map'], 1.0)
+        store.commit()
+        self.assertAlmostEqual(CalibrationStore.open(self.path, readonly=True)['fuel_map'], 2.0)
+
+    def test_tables_are_read_only_views(self):
+        store = CalibrationStore.create(self.params)
+        with self.assertRaises(ValueError):
+            store['boost_map'][0, 0] = 5.0
+
+    def tearDown(self):
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from src.calibration_store import CalibrationStore
+from src.calibration_table import CalibrationTable
+from src.tuning import Tuner
+
+class TestCalibrationTable(unittest.TestCase):
+    def setUp(self):
+        rpm = [1000.0, 3000.0, 5000.0, 7000.0]
+        load = [0.2, 0.6, 1.0]
+        values = np.add.outer(np.array(rpm) / 10000.0, load)
+        self.store = CalibrationStore.create({
+            'fuel_map': {'axes': {'rpm': rpm, 'load': load}, 'values': values.tolist()},
+            'boost_map': 1.0,
+        })
+        self.table = CalibrationTable(self.store, 'fuel_map')
+
+    def test_bilinear_lookup_is_exact_for_linear_table(self):
+        self.assertAlmostEqual(self.table.lookup({'rpm': 4000, 'load': 0.5}), 0.4 + 0.5)
+        # Points outside the axes are clamped to the table edge.
+        self.assertAlmostEqual(self.table.lookup([9000, 0.0]), 0.7 + 0.2)
+
+    def test_batch_lookup_matches_scalar(self):
+        points = np.random.default_rng(0).uniform([500, 0.0], [8000, 1.2], size=(100, 2))
+        expected = [self.table.lookup(p) for p in points]
+        np.testing.assert_allclose(self.table.lookup_batch(points), expected)
+
+    def test_increment_is_localized(self):
+        before = np.array(self.table.values)
+        new_value = self.table.apply_increment({'rpm': 2000, 'load': 0.4}, 0.05)
+        self.assertAlmostEqual(new_value, 0.2 + 0.4 + 0.05)
+        changed = np.argwhere(self.table.values != before)
+        self.assertEqual(sorted(map(tuple, changed)), [(0, 0), (0, 1), (1, 0), (1, 1)])
+
+    def test_neighbours_are_the_surrounding_cells(self):
+        index, weights = self.table.neighbours({'rpm': 2000, 'load': 0.4})
+        self.assertEqual(sorted(zip(index[0][0], index[1][0])), [(0, 0), (0, 1), (1, 0), (1, 1)])
+        np.testing.assert_allclose(weights, [[0.25, 0.25, 0.25, 0.25]])
+        points = np.random.default_rng(0).uniform([500, 0.0], [8000, 1.2], size=(50, 2))
+        index, weights = self.table.neighbours(points)
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+        np.testing.assert_allclose(np.einsum('ij,ij->i', self.table.values[index], weights),
+                                   [self.table.lookup(p) for p in points])
+
+    def test_tuner_adjusts_table_at_operating_point(self):
+        tuner = Tuner(self.store, gradient_step=0.01)
+        new_value = tuner.apply_gradient_increment('fuel_map', direction=-1, operating_point=[6000, 0.8])
+        self.assertAlmostEqual(new_value, 0.6 + 0.8 - 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
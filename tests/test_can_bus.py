@@ -0,0 +1,101 @@
+import importlib.util
+import unittest
+import numpy as np
+from src.can_bus import FRAME_DTYPE, CanReader, SignalDatabase, frames_from_messages, hold_last
+from src.sensor_stream import DEFAULT_COLUMNS
+
+ROW = [0.5, 0.7, 0.2, 0.3, 0.4, 0.5, 90, 92, 88, 91, 1.05, 100]
+
+def _frames(database, rows, rng):
+    ids = rng.choice(sorted(database.plans), size=len(rows))
+    frames = np.zeros(len(rows), dtype=FRAME_DTYPE)
+    frames['arbitration_id'] = ids
+    frames['dlc'] = 8
+    for i, (message_id, row) in enumerate(zip(ids, rows)):
+        frames['data'][i] = np.frombuffer(database.encode(int(message_id), dict(zip(database.columns, row))), np.uint8)
+    return frames
+
+class TestSignalDatabase(unittest.TestCase):
+    def setUp(self):
+        self.database = SignalDatabase.load('configs/telemetry.dbc')
+
+    def test_round_trip_intel_motorola_and_signed_signals(self):
+        values = dict(zip(DEFAULT_COLUMNS, ROW))
+        values['steering'] = -0.25
+        values['accel_x'] = -1.5
+        for message_id in self.database.plans:
+            decoded = self.database.decode_frame(message_id, self.database.encode(message_id, values))
+            for name, value in decoded.items():
+                self.assertAlmostEqual(value, values[name], places=3)
+        # Motorola lambda: start bit 7 is the MSB of byte 0, so 1.05 / 0.0001 = 0x2904 is stored big-endian.
+        self.assertEqual(self.database.encode(259, values)[:2], bytes([0x29, 0x04]))
+
+    def test_batch_decode_matches_per_frame_decoder(self):
+        rng = np.random.default_rng(0)
+        rows = rng.uniform(0, 1, size=(500, len(DEFAULT_COLUMNS))) * [2, 1, 1, 20, 20, 20, 300, 300, 300, 300, 2, 300]
+        rows[:, [0, 3, 4, 5]] -= [1, 10, 10, 10]
+        frames = _frames(self.database, rows, rng)
+        frames['arbitration_id'][::50] = 0x7FF  # Unknown message.
+        decoded = self.database.decode(frames)
+        for i, frame in enumerate(frames):
+            expected = self.database.decode_frame(int(frame['arbitration_id']), frame['data'].tobytes())
+            present = {DEFAULT_COLUMNS[j]: value for j, value in enumerate(decoded[i]) if not np.isnan(value)}
+            self.assertEqual(present.keys(), expected.keys())
+            for name, value in expected.items():
+                self.assertAlmostEqual(present[name], value, places=9)
+
+    def test_hold_last_forward_fills_columns(self):
+        decoded = np.array([[1.0, np.nan], [np.nan, 2.0], [3.0, np.nan]])
+        state = np.array([0.0, np.nan])
+        rows = hold_last(decoded, state)
+        np.testing.assert_array_equal(rows, [[1.0, np.nan], [1.0, 2.0], [3.0, 2.0]])
+        np.testing.assert_array_equal(state, [3.0, 2.0])
+        np.testing.assert_array_equal(hold_last(np.full((1, 2), np.nan), state), [[3.0, 2.0]])
+
+    def test_frames_from_messages_pads_short_payloads(self):
+        class Message:
+            timestamp, arbitration_id, dlc, data = 1.5, 259, 5, bytes([0x29, 0x04, 0x27, 0x10, 0x82])
+        frames = frames_from_messages([Message()])
+        self.assertEqual(frames['data'][0].tolist(), [0x29, 0x04, 0x27, 0x10, 0x82, 0, 0, 0])
+        decoded = self.database.decode(frames)[0]
+        self.assertAlmostEqual(decoded[DEFAULT_COLUMNS.index('lambda')], 1.05)
+        self.assertAlmostEqual(decoded[DEFAULT_COLUMNS.index('vehicle_speed')], 100.0)
+
+    def test_rejects_columns_without_a_signal(self):
+        with self.assertRaises(ValueError):
+            SignalDatabase.load('configs/telemetry.dbc', columns=DEFAULT_COLUMNS + ['oil_temp'])
+
+class TestCanReaderStartup(unittest.TestCase):
+    def test_times_out_when_signals_never_arrive(self):
+        class SilentBus:
+            def recv(self, timeout=None):
+                return None
+
+            def shutdown(self):
+                pass
+
+        reader = CanReader(SignalDatabase.load('configs/telemetry.dbc'), bus=SilentBus())
+        with self.assertRaises(TimeoutError):
+            next(reader.rows(timeout=0.05))
+        reader.close()
+
+@unittest.skipIf(importlib.util.find_spec('can') is None, "python-can is not installed.")
+class TestCanReader(unittest.TestCase):
+    def test_reads_rows_from_a_virtual_bus(self):
+        import can
+        database = SignalDatabase.load('configs/telemetry.dbc')
+        sender = can.Bus(channel='test_can_bus', interface='virtual')
+        reader = CanReader(database, channel='test_can_bus', interface='virtual')
+        try:
+            values = dict(zip(DEFAULT_COLUMNS, ROW))
+            for message_id in database.plans:
+                sender.send(can.Message(arbitration_id=message_id, data=database.encode(message_id, values),
+                                        is_extended_id=False))
+            row = next(reader.rows())
+            np.testing.assert_allclose(row, ROW, atol=1e-3)
+        finally:
+            reader.close()
+            sender.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
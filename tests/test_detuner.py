@@ -1,5 +1,7 @@
 import unittest
-from src.detuner import Detuner
+import numpy as np
+from src.calibration_store import CalibrationStore
+from src.detuner import DegradationRules, Detuner
 
 class TestDetuner(unittest.TestCase):
     def setUp(self):
@@ -10,5 +12,47 @@ class TestDetuner(unittest.TestCase):
         new_val = self.detuner.apply_detune("fuel_map")
         self.assertAlmostEqual(new_val, 0.99, places=2)
 
+    def test_default_rules_map_parts_to_parameters(self):
+        status = {'turbocharger': True, 'fuel_injectors': True, 'brakes': True}
+        self.assertEqual(self.detuner.check_part_degradation(status), ['boost_map', 'fuel_map'])
+
+class TestDegradationRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = DegradationRules(
+            {'turbocharger': {'boost_map': 1.0}, 'intercooler': {'boost_map': 0.5},
+             'fuel_pump': {'fuel_map': 0.5, 'boost_map': 0.25}},
+            {'boost_map': {'minimum': 0.95, 'max_step': 0.012}, 'fuel_map': {'minimum': 0.87}})
+
+    def test_severity_weighted_detune_with_rate_cap(self):
+        steps = self.rules.evaluate({'turbocharger': 0.5, 'intercooler': True, 'fuel_pump': 1.0}, 0.01)
+        # boost_map: 0.01 * (0.5 + 0.5 + 0.25) capped at 0.012; fuel_map: 0.01 * 0.5.
+        np.testing.assert_allclose(steps, [0.012, 0.005])
+
+    def test_bulk_detune_on_tables_and_scalars_respects_minimum(self):
+        store = CalibrationStore.create({
+            'boost_map': 1.0,
+            'fuel_map': {'axes': {'rpm': [1000, 5000], 'load': [0.2, 1.0]}, 'values': [[1.0, 0.9], [1.1, 0.6]]},
+        })
+        detuner = Detuner(store, gradient_step=0.01, rules=self.rules)
+        for _ in range(10):
+            detuner.apply_health({'turbocharger': True, 'fuel_pump': 1.0})
+        self.assertAlmostEqual(store['boost_map'], 0.95)
+        # Cells stop at the minimum; a cell already below it is left alone.
+        np.testing.assert_allclose(store.table('fuel_map'), [[0.95, 0.87], [1.05, 0.6]])
+        dict_map = {'boost_map': 1.0, 'fuel_map': 1.0}
+        Detuner(dict_map, gradient_step=0.01, rules=self.rules).apply_health(np.array([1.0, 0.0, 0.0]))
+        self.assertEqual(dict_map, {'boost_map': 0.99, 'fuel_map': 1.0})
+
+    def test_part_without_rules_detunes_nothing(self):
+        # A YAML part with no parameters listed loads as None.
+        rules = DegradationRules({'turbocharger': {'boost_map': 1.0}, 'wastegate': None})
+        self.assertEqual(rules.parameters_for('wastegate'), [])
+        np.testing.assert_allclose(rules.evaluate({'turbocharger': 1.0, 'wastegate': 1.0}, 0.01), [0.01])
+
+    def test_load_rules_file(self):
+        rules = DegradationRules.load('configs/degradation_rules.yaml')
+        self.assertIn('turbocharger', rules.parts)
+        self.assertEqual(rules.parameters_for('fuel_injectors'), ['fuel_map'])
+
 if __name__ == '__main__':
     unittest.main()
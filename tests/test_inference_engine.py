@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.inference_engine import BayesianInferenceEngine, DenseInferenceEngine
+
+class TestInferenceEngine(unittest.TestCase):
+    def setUp(self):
+        self.ai_tuner = AITuner(input_dim=5)
+        self.batch = np.random.default_rng(0).uniform(-1, 1, size=(64, 5)).astype(np.float32)
+
+    def test_default_model_uses_numpy_engine(self):
+        self.assertIsInstance(self.ai_tuner.engine, DenseInferenceEngine)
+
+    def test_matches_keras_predict(self):
+        expected = self.ai_tuner.model.predict(self.batch, verbose=0)
+        np.testing.assert_allclose(self.ai_tuner.engine.predict(self.batch), expected, rtol=1e-5, atol=1e-6)
+
+    def test_batched_directions_match_single_row(self):
+        directions = self.ai_tuner.predict_adjustments(self.batch)
+        self.assertEqual(directions.shape, (64,))
+        for row, direction in zip(self.batch[:8], directions[:8]):
+            self.assertEqual(self.ai_tuner.predict_adjustment(row.tolist()), direction)
+
+class TestBayesianInferenceEngine(unittest.TestCase):
+    def test_samples_match_stochastic_keras_passes(self):
+        ai_tuner = AITuner(input_dim=5, model_type='bayesian')
+        self.assertIsInstance(ai_tuner.engine, BayesianInferenceEngine)
+        batch = np.random.default_rng(0).uniform(-1, 1, size=(4, 5)).astype(np.float32)
+        keras_draws = np.stack([np.asarray(ai_tuner.model(batch))[:, 0] for _ in range(50)])
+        engine_draws = ai_tuner.engine.sample(batch, 4000)[:, :, 0]
+        self.assertEqual(engine_draws.shape, (4000, 4))
+        np.testing.assert_allclose(engine_draws.mean(axis=0), keras_draws.mean(axis=0), atol=0.01)
+        np.testing.assert_allclose(engine_draws.std(axis=0), keras_draws.std(axis=0), rtol=0.3)
+
+if __name__ == '__main__':
+    unittest.main()
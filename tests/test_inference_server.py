@@ -0,0 +1,89 @@
+import threading
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.inference_server import InferenceServer
+from src.instrumentation import Instrumentation
+
+class GatedTuner:
+    """Raw output always above the threshold, but a decision policy that holds every row."""
+    input_dim = 5
+
+    def predict_raw(self, batch):
+        return np.ones((len(batch), 1), dtype=np.float32)
+
+    def predict_adjustments(self, batch):
+        return np.zeros(len(batch), dtype=np.int64)
+
+class TestInferenceServer(unittest.TestCase):
+    def setUp(self):
+        self.ai_tuner = AITuner(input_dim=5)
+        self.batch = np.random.default_rng(0).uniform(-1, 1, size=(32, 5)).astype(np.float32)
+
+    def test_coalesces_requests_and_matches_direct_predictions(self):
+        expected = self.ai_tuner.predict_adjustments(self.batch).tolist()
+        with InferenceServer(self.ai_tuner, max_batch_size=16, max_latency=0.05,
+                             instrumentation=Instrumentation()) as server:
+            futures = [server.submit(row) for row in self.batch]
+            results = [future.result(timeout=5) for future in futures]
+            stats = server.stats()
+        self.assertEqual(results, expected)
+        self.assertEqual(stats['requests'], 32)
+        self.assertLess(stats['batches'], 32)
+        self.assertLessEqual(stats['max_batch_size'], 16)
+        self.assertGreater(stats['request_latency_max'], 0.0)
+
+    def test_concurrent_callers(self):
+        results = {}
+        with InferenceServer(self.ai_tuner, instrumentation=Instrumentation()) as server:
+            def worker(i):
+                results[i] = server.predict_adjustment(self.batch[i])
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual([results[i] for i in range(8)], self.ai_tuner.predict_adjustments(self.batch[:8]).tolist())
+
+    def test_submits_racing_shutdown_are_answered_or_rejected(self):
+        server = InferenceServer(self.ai_tuner, instrumentation=Instrumentation())
+        futures, rejected = [], []
+
+        def worker():
+            for row in self.batch:
+                try:
+                    futures.append(server.submit(row))
+                except RuntimeError:
+                    rejected.append(row)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        server.shutdown()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            self.assertIn(future.result(timeout=5), (-1, 0, 1))
+        self.assertEqual(len(futures) + len(rejected), 4 * len(self.batch))
+
+    def test_cancelled_requests_are_skipped(self):
+        # The first batch waits for its latency budget, which leaves time to cancel a queued request.
+        with InferenceServer(self.ai_tuner, max_batch_size=4, max_latency=0.5,
+                             instrumentation=Instrumentation()) as server:
+            futures = [server.submit(row) for row in self.batch[:3]]
+            self.assertTrue(futures[1].cancel())
+            self.assertIn(futures[0].result(timeout=5), (-1, 0, 1))
+            self.assertIn(futures[2].result(timeout=5), (-1, 0, 1))
+            self.assertIn(server.predict_adjustment(self.batch[3]), (-1, 0, 1))
+            self.assertEqual(server.stats()['requests'], 3)
+
+    def test_batches_use_the_tuner_decision_policy(self):
+        with InferenceServer(GatedTuner(), instrumentation=Instrumentation()) as server:
+            self.assertEqual([server.predict_adjustment(row) for row in self.batch[:4]], [0, 0, 0, 0])
+
+    def test_rejects_multi_output_models(self):
+        with self.assertRaises(ValueError):
+            InferenceServer(AITuner(input_dim=5, model_type='reinforcement'))
+
+if __name__ == '__main__':
+    unittest.main()
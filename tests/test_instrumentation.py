@@ -0,0 +1,105 @@
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import unittest
+import numpy as np
+from src.instrumentation import Instrumentation, NullInstrumentation
+from src.lamda_controller import ActiveLamdaController
+from src.scheduler import ControlScheduler, SimulatedClock
+from src.tuning import Tuner
+
+class TestInstrumentation(unittest.TestCase):
+    def test_histogram_statistics(self):
+        inst = Instrumentation()
+        stage = inst.stage('stage')
+        self.assertEqual(inst.stage('stage'), stage)
+        for _ in range(99):
+            inst.observe(stage, 1e-6)
+        inst.observe(stage, 1e-2)
+        stats = inst.summary()['stage']
+        self.assertEqual(stats['count'], 100)
+        self.assertAlmostEqual(stats['max'], 1e-2)
+        self.assertGreaterEqual(stats['p50'], 1e-6)
+        self.assertLess(stats['p50'], 1.5e-6)
+        self.assertLess(stats['p99'], 1e-2)
+
+    def test_event_ring_buffer_wraps_in_order(self):
+        inst = Instrumentation(event_capacity=4)
+        stage = inst.stage('decision')
+        for value in range(10):
+            inst.record(stage, inst.clock(), value)
+        events = inst.events()
+        self.assertEqual(events['value'].tolist(), [6, 7, 8, 9])
+        self.assertEqual(list(events['stage']), ['decision'] * 4)
+        self.assertEqual(inst.events(last=2)['value'].tolist(), [8, 9])
+        self.assertTrue(np.all(np.diff(events['time']) >= 0))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.npz')
+            inst.dump(path)
+            with np.load(path) as dump:
+                self.assertEqual(dump['counts'].tolist(), [10])
+                self.assertEqual(dump['event_value'].tolist(), [6, 7, 8, 9])
+
+    def test_controllers_record_without_info_logging(self):
+        inst = Instrumentation()
+        tuner = Tuner({'fuel_map': 1.0}, gradient_step=0.01, instrumentation=inst)
+        lamda = ActiveLamdaController(instrumentation=inst)
+        with self.assertNoLogs('src.tuning', level='INFO'), self.assertNoLogs('src.lamda_controller', level='INFO'):
+            tuner.apply_gradient_increment('fuel_map', direction=1)
+            lamda.update_lambda(1.2)
+        summary = inst.summary()
+        self.assertEqual(summary['tuner.apply_gradient_increment']['count'], 1)
+        self.assertEqual(summary['lambda.update_lambda']['count'], 1)
+        self.assertAlmostEqual(inst.events()['value'][0], 1.01)
+        with self.assertLogs('src.tuning', level='DEBUG'):
+            tuner.apply_gradient_increment('fuel_map', direction=1)
+
+    def test_scheduler_task_latencies(self):
+        inst = Instrumentation()
+        clock = SimulatedClock()
+        scheduler = ControlScheduler(clock=clock, instrumentation=inst)
+        scheduler.add_task('fast', lambda: clock.advance(0.001), 100.0)
+        scheduler.run(duration=1.0)
+        stats = inst.summary()['task.fast']
+        self.assertEqual(stats['count'], 100)
+        self.assertAlmostEqual(stats['max'], 0.001)
+
+    def test_concurrent_writers_lose_no_counts(self):
+        inst = Instrumentation(event_capacity=64)
+        stage = inst.stage('shared')
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads as often as possible to expose lost updates.
+        try:
+            def writer():
+                for _ in range(20000):
+                    inst.record(stage, inst.clock(), 1.0)
+            threads = [threading.Thread(target=writer) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(inst.summary()['shared']['count'], 80000)
+        self.assertEqual(inst.events_recorded, 80000)
+        self.assertEqual(sum(inst.histogram[stage]), 80000)
+
+    def test_pickled_copy_keeps_counts_and_records(self):
+        inst = Instrumentation()
+        stage = inst.stage('sent')
+        inst.record(stage, inst.clock())
+        copy = pickle.loads(pickle.dumps(inst))
+        copy.record(stage, copy.clock())
+        self.assertEqual(copy.summary()['sent']['count'], 2)
+        self.assertEqual(inst.summary()['sent']['count'], 1)
+
+    def test_null_instrumentation_records_nothing(self):
+        inst = NullInstrumentation()
+        tuner = Tuner({'fuel_map': 1.0}, instrumentation=inst)
+        tuner.apply_gradient_increment('fuel_map')
+        self.assertEqual(inst.events_recorded, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from src.calibration_store import CalibrationStore
+from src.instrumentation import Instrumentation
+from src.lambda_trim import AdaptiveLambdaController, LongTermTrimTable, ShortTermTrim, required_correction
+
+class TestLongTermTrimTable(unittest.TestCase):
+    def test_batch_update_matches_sequential_learning(self):
+        rng = np.random.default_rng(0)
+        points = np.column_stack([rng.uniform(500, 9000, 2000), rng.uniform(0, 1.2, 2000)])
+        corrections = rng.normal(0, 0.1, 2000)
+        batched, sequential = LongTermTrimTable(), LongTermTrimTable()
+        batched.update(points[:700], corrections[:700])
+        batched.update(points[700:], corrections[700:])
+        for point, correction in zip(points, corrections):
+            sequential.learn(point, correction)
+        np.testing.assert_allclose(batched.values, sequential.values, atol=1e-12)
+        self.assertEqual(batched.samples, 2000)
+
+    def test_learns_per_cell_from_a_log(self):
+        rng = np.random.default_rng(0)
+        points = np.column_stack([rng.uniform(1000, 8000, 50000), rng.uniform(0.2, 1.0, 50000)])
+        error = np.where(points[:, 0] > 5000, 0.1, -0.05)  # Lean above 5000 rpm, rich below.
+        table = LongTermTrimTable()
+        table.update(points, required_correction(1.0 + error))
+        self.assertAlmostEqual(table.lookup((7000, 0.6)), 0.1, delta=0.01)
+        self.assertAlmostEqual(table.lookup((2000, 0.6)), -0.05, delta=0.01)
+
+    def test_write_back_into_fuel_map(self):
+        store = CalibrationStore.create({'fuel_map': {'axes': {'rpm': [1000, 8000], 'load': [0.2, 1.0]},
+                                                      'values': [[1.0, 1.0], [1.0, 1.0]]}, 'boost_map': 1.0})
+        table = LongTermTrimTable(rpm_axis=[1000, 8000], load_axis=[0.2, 1.0])
+        for _ in range(200):
+            table.learn((8000, 1.0), 0.1)
+        table.write_back(store, 'fuel_map')
+        self.assertAlmostEqual(store.table('fuel_map')[1, 1], 1.1, places=4)
+        self.assertEqual(store.table('fuel_map')[0, 0], 1.0)
+        self.assertFalse(table.values.any())
+
+class TestAdaptiveLambdaController(unittest.TestCase):
+    def test_converges_on_an_operating_point_dependent_error(self):
+        controller = AdaptiveLambdaController(instrumentation=Instrumentation())
+        errors = []
+        for t in range(6000):
+            rpm, load = 4000 + 3000 * np.sin(t / 310.0), 0.6 + 0.35 * np.sin(t / 170.0)
+            sensor_lambda = (1.0 + 0.08 * np.sin(rpm / 1500.0)) / (1.0 + controller.correction)
+            controller.update(sensor_lambda, rpm, load)
+            errors.append(abs(sensor_lambda - 1.0))
+        self.assertLess(np.mean(errors[-1000:]), 0.005)
+        self.assertLess(abs(controller.short_term.trim), 0.02)  # The table holds the learned correction.
+
+    def test_short_term_trim_is_clamped(self):
+        trim = ShortTermTrim(limit=0.2)
+        for _ in range(1000):
+            trim.update(1.5, 6000)
+        self.assertAlmostEqual(trim.trim, 0.2)
+        self.assertAlmostEqual(trim.integral, 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
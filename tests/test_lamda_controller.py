@@ -1,5 +1,6 @@
 import unittest
-from src.lamda_controller import ActiveLamdaController
+import numpy as np
+from src.lamda_controller import ActiveLamdaController, LambdaFleetController
 
 class TestLamdaController(unittest.TestCase):
     def setUp(self):
@@ -14,5 +15,14 @@ class TestLamdaController(unittest.TestCase):
         new_target = self.lamda_controller.update_lambda(1.02)
         self.assertAlmostEqual(new_target, 1.0, places=2)
 
+    def test_fleet_matches_scalar_controllers(self):
+        readings = np.random.default_rng(0).uniform(0.85, 1.15, size=(50, 100))
+        fleet = LambdaFleetController(100, target_lambda=1.0, adjustment_step=0.01)
+        scalars = [ActiveLamdaController(target_lambda=1.0, adjustment_step=0.01) for _ in range(100)]
+        for step in readings:
+            targets = fleet.update_lambda(step)
+            expected = [controller.update_lambda(value) for controller, value in zip(scalars, step.tolist())]
+            self.assertEqual(targets.tolist(), expected)
+
 if __name__ == '__main__':
     unittest.main()
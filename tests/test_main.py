@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        # main() rewrites configs/base_map.yaml relative to the working directory.
+        self.workdir = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(REPO_ROOT, 'configs'), os.path.join(self.workdir, 'configs'))
+
+    def _run(self, code):
+        return subprocess.run(
+            [sys.executable, '-c', code], cwd=self.workdir, capture_output=True, text=True, timeout=120
+        )
+
+    def test_no_ai_mode_never_imports_tensorflow(self):
+        code = (
+            "import sys; sys.path.insert(0, %r); import main; "
+            "main.main(['--no-ai', '--duration', '0.1']); "
+            "assert 'tensorflow' not in sys.modules" % os.path.join(REPO_ROOT, 'src')
+        )
+        result = self._run(code)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_ai_tuner_import_is_lazy(self):
+        code = (
+            "import sys; sys.path.insert(0, %r); import src.ai_tuner; "
+            "assert 'tensorflow' not in sys.modules" % REPO_ROOT
+        )
+        result = self._run(code)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_warm_model_cache_skips_tensorflow(self):
+        run = (
+            "import sys; sys.path.insert(0, %r); import main; "
+            "main.main(['--duration', '0.1', '--model-cache', 'cache']); " % os.path.join(REPO_ROOT, 'src')
+        )
+        cold = self._run(run)
+        self.assertEqual(cold.returncode, 0, cold.stderr)
+        warm = self._run(run + "assert 'tensorflow' not in sys.modules")
+        self.assertEqual(warm.returncode, 0, warm.stderr)
+
+    def test_unavailable_shadow_models_are_skipped(self):
+        code = (
+            "import sys; sys.path.insert(0, %r); import main; build = main.create_ai_tuner; "
+            "main.create_ai_tuner = lambda model_type, *args: None if model_type == 'quantile' else build(model_type, *args); "
+            "main.main(['--duration', '0.1', '--model-cache', '', '--shadow-models', 'quantile', 'automl'])"
+            % os.path.join(REPO_ROOT, 'src')
+        )
+        result = self._run(code)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("Shadow model 'quantile' could not be built", result.stderr)
+        self.assertIn("[Shadow] automl", result.stderr)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+if __name__ == '__main__':
+    unittest.main()
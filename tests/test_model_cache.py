@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.ai_tuner import AITuner
+from src.model_cache import ModelCache
+
+class TestModelCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ModelCache(self.directory, max_entries=2)
+        self.batch = np.random.default_rng(0).uniform(-1, 1, size=(16, 5)).astype(np.float32)
+
+    def test_warm_start_restores_weights_without_rebuilding(self):
+        cold = AITuner(input_dim=5, cache=self.cache)
+        warm = AITuner(input_dim=5, cache=self.cache)
+        self.assertIsNone(warm._model)
+        np.testing.assert_array_equal(warm.predict_raw(self.batch), cold.predict_raw(self.batch))
+        # The Keras model is rebuilt on demand with the cached weights.
+        np.testing.assert_allclose(warm.model.predict(self.batch, verbose=0), cold.predict_raw(self.batch),
+                                   rtol=1e-5, atol=1e-6)
+
+    def test_trained_weights_are_persisted(self):
+        tuner = AITuner(input_dim=5, model_type='hybrid_cnn_lstm', cache=self.cache)
+        tuner.model.set_weights([w + 0.1 for w in tuner.model.get_weights()])
+        tuner.save_to_cache()
+        restored = AITuner(input_dim=5, model_type='hybrid_cnn_lstm', cache=self.cache)
+        np.testing.assert_allclose(restored.predict_raw(self.batch), tuner.predict_raw(self.batch), rtol=1e-5)
+
+    def test_lru_and_stale_eviction(self):
+        AITuner(input_dim=5, model_type='default', cache=self.cache)
+        AITuner(input_dim=5, model_type='automl', cache=self.cache)
+        AITuner(input_dim=5, model_type='default', cache=self.cache)  # Hit: default becomes most recent.
+        AITuner(input_dim=5, model_type='reinforcement', cache=self.cache)
+        self.assertEqual(sorted(a.meta['model_type'] for a in self.cache.entries()), ['default', 'reinforcement'])
+        tuner = AITuner(input_dim=5, model_type='default')
+        self.cache.store('default', 5, 'f' * 64, tuner.model)
+        entries = self.cache.entries()
+        self.assertEqual(len([a for a in entries if a.meta['model_type'] == 'default']), 1)
+        self.assertIsNone(self.cache.load('default', 5, tuner.architecture_hash()))
+
+    def test_hyperparameter_variants_do_not_evict_each_other(self):
+        cache = ModelCache(self.directory, max_entries=4)
+        AITuner(input_dim=5, model_type='quantile', cache=cache)
+        AITuner(input_dim=5, model_type='quantile', cache=cache, hyperparameters={'quantiles': [0.2, 0.5, 0.8]})
+        self.assertEqual(len(cache.entries()), 2)
+        self.assertIsNotNone(AITuner(input_dim=5, model_type='quantile', cache=cache)._artifact)
+
+    def test_helper_sources_are_part_of_the_architecture_hash(self):
+        tuner = AITuner(input_dim=5, model_type='lstm')
+        before = tuner.architecture_hash()
+        with mock.patch.object(AITuner, '_sequence_input', lambda self, input_dim: []):
+            self.assertNotEqual(tuner.architecture_hash(), before)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
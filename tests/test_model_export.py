@@ -0,0 +1,50 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.inference_engine import QuantizedDenseInferenceEngine
+from src.model_export import export_tuner, load_exported
+
+class TestModelExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.batch = np.random.default_rng(0).uniform(-3, 3, size=(512, 5)).astype(np.float32)
+
+    def test_exported_modules_match_keras(self):
+        for model_type in ['default', 'automl', 'reinforcement', 'quantile']:
+            tuner = AITuner(input_dim=5, model_type=model_type)
+            expected = tuner.model.predict(self.batch, verbose=0)
+            for dtype, atol in [('float32', 1e-5), ('int8', 0.05)]:
+                with self.subTest(model_type=model_type, dtype=dtype):
+                    module = load_exported(export_tuner(tuner, os.path.join(self.directory, f'{model_type}_{dtype}.py'),
+                                                       dtype))
+                    self.assertEqual(module.DTYPE, dtype)
+                    np.testing.assert_allclose(module.predict(self.batch), expected, atol=atol)
+
+    def test_quantized_engine_matches_exported_int8_module(self):
+        tuner = AITuner(input_dim=5)
+        engine = QuantizedDenseInferenceEngine.from_engine(tuner.engine)
+        self.assertLess(engine.nbytes, tuner.engine.nbytes / 2)
+        module = load_exported(export_tuner(tuner, os.path.join(self.directory, 'default_int8.py'), 'int8'))
+        np.testing.assert_array_equal(module.predict(self.batch), engine.predict(self.batch))
+
+    def test_exported_module_needs_only_numpy(self):
+        path = export_tuner(AITuner(input_dim=5), os.path.join(self.directory, 'ai_tuner_default.py'), 'int8')
+        code = ("import sys; import ai_tuner_default; ai_tuner_default.predict([[0.5, 0.3, 0.2, 0.1, 0.0]]); "
+                "assert 'tensorflow' not in sys.modules and 'keras' not in sys.modules")
+        result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(path), capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_rejects_non_dense_models(self):
+        with self.assertRaises(ValueError):
+            export_tuner(AITuner(input_dim=5, model_type='lstm'), os.path.join(self.directory, 'lstm.py'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
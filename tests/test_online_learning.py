@@ -0,0 +1,75 @@
+import time
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.inference_engine import DenseInferenceEngine
+from src.instrumentation import Instrumentation
+from src.online_learning import OnlineTrainer, ReplayBuffer, lambda_outcome
+
+class TestReplayBuffer(unittest.TestCase):
+    def test_is_bounded_and_overwrites_oldest(self):
+        buffer = ReplayBuffer(capacity=4, input_dim=2)
+        for i in range(6):
+            buffer.add([i, i], 1.0, float(i))
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(sorted(buffer.outcomes.tolist()), [2.0, 3.0, 4.0, 5.0])
+        sensors, adjustments, outcomes = buffer.sample(8, np.random.default_rng(0))
+        self.assertEqual(sensors.shape, (8, 2))
+        self.assertTrue(np.all(outcomes >= 2.0))
+
+    def test_lambda_outcome(self):
+        self.assertAlmostEqual(lambda_outcome(0.1, 0.05), 0.5)
+        self.assertEqual(lambda_outcome(0.1, 0.5), -1.0)
+        self.assertEqual(lambda_outcome(0.0, 0.0), 0.0)
+
+class TestOnlineTrainer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rows = rng.uniform(-1, 1, size=(256, 5)).astype(np.float32)
+        # Increasing helped whenever the first sensor was positive, decreasing otherwise.
+        self.directions = np.where(self.rows[:, 0] > 0, 1.0, -1.0)
+
+    def _trainer(self, model_type, **kwargs):
+        tuner = AITuner(input_dim=5, model_type=model_type)
+        trainer = OnlineTrainer(tuner, min_samples=32, publish_every=5, seed=0,
+                                instrumentation=Instrumentation(), **kwargs)
+        for row, direction in zip(self.rows, self.directions):
+            trainer.record(row, direction, 1.0)
+        return tuner, trainer
+
+    def test_updates_are_published_into_the_engine(self):
+        tuner, trainer = self._trainer('default')
+        engine = tuner.engine
+        for _ in range(150):
+            trainer.step()
+        self.assertEqual(trainer.published, 30)
+        self.assertIs(tuner.engine, engine)
+        self.assertIsInstance(engine, DenseInferenceEngine)
+        predictions = tuner.predict_raw(self.rows)[:, 0]
+        np.testing.assert_allclose(predictions, tuner.model.predict(self.rows, verbose=0)[:, 0], atol=1e-5)
+        self.assertGreater(np.mean(np.sign(predictions) == self.directions), 0.8)
+
+    def test_background_training_with_concurrent_predictions(self):
+        tuner, trainer = self._trainer('lstm', update_interval=0.0)
+        trainer.start()
+        deadline = time.monotonic() + 60
+        while trainer.published < 3 and time.monotonic() < deadline:
+            self.assertIn(tuner.predict_adjustment(self.rows[0]), (-1, 0, 1))
+        trainer.stop()
+        self.assertGreaterEqual(trainer.published, 3)
+        np.testing.assert_allclose(tuner.predict_raw(self.rows[:8]), trainer._shadow.predict(self.rows[:8], verbose=0),
+                                   atol=1e-5)
+
+    def test_keras2_models_get_a_standby_copy(self):
+        tuner, trainer = self._trainer('bayesian')
+        for _ in range(10):
+            trainer.step()
+        self.assertEqual(trainer.published, 2)
+        self.assertEqual(tuner.predict_raw(self.rows[:8]).shape, (8, 1))
+
+    def test_rejects_multi_output_models(self):
+        with self.assertRaises(ValueError):
+            OnlineTrainer(AITuner(input_dim=5, model_type='reinforcement'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.detuner import DegradationRules
+from src.lamda_controller import ActiveLamdaController
+from src.replay import ReplayEngine, replay_sessions
+from src.sensor_stream import DEFAULT_COLUMNS
+
+class FixedPredictor:
+    """Alternates increase/decrease/no-change regardless of the input."""
+    def predict_adjustments(self, batch):
+        return np.resize([1, 1, -1, 0], len(batch))
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.telemetry = np.tile([0.5, 0.7, 0.2, 0.3, 0.4, 0.5, 90, 92, 88, 91, 1.0, 100.0], (400, 1))
+        self.telemetry[:, 10] = rng.uniform(0.9, 1.1, size=400)
+        self.telemetry[:, 11] = rng.uniform(50, 120, size=400)
+        self.engine = ReplayEngine({'fuel_map': 1.0, 'boost_map': 1.0}, FixedPredictor(),
+                                   part_status={'turbocharger': True})
+
+    def test_replay_matches_step_by_step_controllers(self):
+        result = self.engine.run(self.telemetry)
+        fuel, boost = 1.0, 1.0
+        controller = ActiveLamdaController()
+        for i, direction in enumerate(FixedPredictor().predict_adjustments(self.telemetry)):
+            fuel = fuel + direction * 0.01
+            boost = boost - 0.01
+            self.assertEqual(result.trace['fuel_map'][i], fuel)
+            self.assertEqual(result.trace['boost_map'][i], boost)
+            self.assertEqual(result.trace['lambda_target'][i], controller.update_lambda(self.telemetry[i, 10]))
+        self.assertEqual(result.final_map, {'fuel_map': fuel, 'boost_map': boost})
+        np.testing.assert_array_equal(result.trace['drs_active'], self.telemetry[:, 11] > 80)
+
+    def test_detune_rules_apply_as_in_the_control_loop(self):
+        rules = DegradationRules({'turbocharger': {'boost_map': 2.0}, 'fuel_pump': {'boost_map': 1.0}},
+                                 {'boost_map': {'minimum': 0.9, 'max_step': 0.025}})
+        engine = ReplayEngine({'fuel_map': 1.0, 'boost_map': 1.0}, None, rules=rules,
+                              part_status={'turbocharger': True, 'fuel_pump': 0.5})
+        boost = engine.run(self.telemetry[:10]).trace['boost_map']
+        np.testing.assert_allclose(boost[:4], [0.975, 0.95, 0.925, 0.9])
+        self.assertEqual(boost[-1], 0.9)
+
+    def test_sharded_replay_matches_in_process(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for i in range(2):
+                path = os.path.join(tmpdir, f'session_{i}.csv')
+                np.savetxt(path, self.telemetry[i * 100:], delimiter=',', header=','.join(DEFAULT_COLUMNS), comments='')
+                paths.append(path)
+            engine = ReplayEngine({'fuel_map': 1.0}, None, part_status={'fuel_injectors': True})
+            sharded = replay_sessions(engine, paths, processes=2)
+            sequential = replay_sessions(engine, paths, processes=1)
+        for a, b in zip(sharded, sequential):
+            self.assertEqual(a.final_map, b.final_map)
+            np.testing.assert_array_equal(a.trace['lambda_target'], b.trace['lambda_target'])
+
+if __name__ == '__main__':
+    unittest.main()
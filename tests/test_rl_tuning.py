@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.detuner import Detuner
+from src.instrumentation import Instrumentation
+from src.lamda_controller import ActiveLamdaController
+from src.rl_tuning import PolicyGradientTrainer, TuningEnvs, discounted_returns, sample_actions
+from src.tuning import Tuner
+
+class TestTuningEnvs(unittest.TestCase):
+    def test_maps_follow_tuner_and_detuner(self):
+        envs = TuningEnvs(3, degradation_rate=0.5, seed=0)
+        maps = [{'fuel_map': 1.0, 'boost_map': 1.0} for _ in range(3)]
+        tuners = [Tuner(m, gradient_step=0.01, instrumentation=Instrumentation()) for m in maps]
+        detuners = [Detuner(m, gradient_step=0.002, instrumentation=Instrumentation()) for m in maps]
+        controllers = [ActiveLamdaController(instrumentation=Instrumentation()) for _ in maps]
+        actions = np.random.default_rng(1).integers(0, 3, size=(50, 3))
+        for step_actions in actions:
+            envs.step(step_actions)
+            for i, action in enumerate(step_actions):
+                if action < 2:
+                    tuners[i].apply_gradient_increment('fuel_map', direction=1 if action == 0 else -1)
+                status = {'turbocharger': bool(envs.turbo_degraded[i]), 'fuel_injectors': bool(envs.injectors_degraded[i])}
+                for param in detuners[i].check_part_degradation(status):
+                    detuners[i].apply_detune(param)
+                controllers[i].update_lambda(envs.sensor_lambda[i])
+        np.testing.assert_allclose(envs.fuel_map, [m['fuel_map'] for m in maps])
+        np.testing.assert_allclose(envs.boost_map, [m['boost_map'] for m in maps])
+        np.testing.assert_allclose(envs.lambda_target, [c.target_lambda for c in controllers])
+
+    def test_more_fuel_richens(self):
+        envs = TuningEnvs(1000, seed=0)
+        before = envs.sensor_lambda.copy()
+        envs.step(np.zeros(1000, dtype=np.int64))
+        self.assertLess(np.mean(envs.sensor_lambda), np.mean(before))
+
+    def test_sample_actions(self):
+        probabilities = np.tile([0.2, 0.5, 0.3], (100000, 1))
+        counts = np.bincount(sample_actions(probabilities, np.random.default_rng(0)), minlength=3)
+        np.testing.assert_allclose(counts / 100000, [0.2, 0.5, 0.3], atol=0.01)
+
+    def test_discounted_returns(self):
+        rewards = np.array([[1.0], [0.0], [2.0]])
+        np.testing.assert_allclose(discounted_returns(rewards, 0.5)[:, 0], [1.5, 1.0, 2.0])
+
+class TestPolicyGradientTrainer(unittest.TestCase):
+    def test_training_reduces_lambda_error(self):
+        tuner = AITuner(input_dim=5, model_type='reinforcement')
+        trainer = PolicyGradientTrainer(tuner, num_envs=128, horizon=32, seed=0, instrumentation=Instrumentation())
+        history = trainer.train(40)
+        self.assertEqual(trainer.env_steps, 40 * 128 * 32)
+        self.assertGreater(history[-1]['env_steps_per_s'], 0)
+        # Better than never touching the map, which leaves each car's calibration bias in place.
+        envs = TuningEnvs(1024, seed=1)
+        untuned = []
+        for _ in range(32):
+            envs.step(np.full(1024, 2))
+            untuned.append(envs.lambda_error.mean())
+        untuned = np.mean(untuned)
+        self.assertLess(trainer.evaluate(seed=1), 0.5 * untuned)
+        # The tuner acts greedily on the trained policy: enrich when lean, lean out when rich.
+        rows = np.array([[0.0, 0.5, 0.0, 0.4, 1.08], [0.0, 0.5, 0.0, 0.4, 0.92]], dtype=np.float32)
+        np.testing.assert_array_equal(tuner.predict_adjustments(rows), [1, -1])
+
+    def test_rejects_other_models(self):
+        with self.assertRaises(ValueError):
+            PolicyGradientTrainer(AITuner(input_dim=5, model_type='default'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from src.instrumentation import Instrumentation
+from src.scheduler import ControlScheduler, InlineExecutor, SimulatedClock
+
+class TestControlScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.scheduler = ControlScheduler(clock=self.clock, executor=InlineExecutor())
+
+    def test_tasks_run_at_their_own_rates(self):
+        calls = {'fast': 0, 'slow': 0}
+        self.scheduler.add_task('fast', lambda: calls.__setitem__('fast', calls['fast'] + 1), rate_hz=100)
+        self.scheduler.add_task('slow', lambda: calls.__setitem__('slow', calls['slow'] + 1), rate_hz=5)
+        report = self.scheduler.run(duration=1.0)
+        self.assertEqual(calls, {'fast': 100, 'slow': 5})
+        self.assertEqual(report['fast']['overruns'], 0)
+
+    def test_overruns_are_detected_and_missed_releases_skipped(self):
+        # Every run of this 100 Hz task takes 25 ms.
+        self.scheduler.add_task('slow_lambda', lambda: self.clock.advance(0.025), rate_hz=100)
+        report = self.scheduler.run(duration=1.0)['slow_lambda']
+        self.assertEqual(report['overruns'], report['runs'])
+        self.assertEqual(report['runs'] + report['skipped'], 100)
+
+    def test_offloaded_results_are_delivered(self):
+        results = []
+        self.scheduler.add_task('ai_tuning', lambda: 1, rate_hz=5, offload=True, on_complete=results.append)
+        self.scheduler.run(duration=1.0)
+        self.assertEqual(results, [1] * 5)
+
+    def test_failing_completion_handlers_do_not_stop_other_tasks(self):
+        instrumentation = Instrumentation()
+        scheduler = ControlScheduler(clock=self.clock, executor=InlineExecutor(), instrumentation=instrumentation)
+        calls = []
+
+        def fail(result):
+            raise RuntimeError("handler failed")
+
+        scheduler.add_task('ai_tuning', lambda: 1, rate_hz=5, offload=True, on_complete=fail)
+        scheduler.add_task('detune', lambda: 1, rate_hz=5, on_complete=fail)
+        scheduler.add_task('lambda', lambda: calls.append(1), rate_hz=4)
+        with self.assertLogs('src.scheduler', level='ERROR'):
+            report = scheduler.run(duration=1.0)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(report['ai_tuning']['errors'], 5)
+        self.assertEqual(report['detune']['errors'], 5)
+        self.assertEqual(instrumentation.summary()['task.detune.errors']['count'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.sensor_graph import SensorGraph, random_sensor_graph
+
+class TestSensorGraph(unittest.TestCase):
+    def test_normalized_adjacency(self):
+        graph = SensorGraph(['a', 'b', 'c'], [('a', 'b')])
+        adjacency = np.array([[1, 1, 0], [1, 1, 0], [0, 0, 1]], dtype=np.float64)
+        inv_sqrt = np.diag(1 / np.sqrt(adjacency.sum(axis=1)))
+        np.testing.assert_allclose(graph.dense(), inv_sqrt @ adjacency @ inv_sqrt, rtol=1e-6)
+        self.assertEqual(len(graph.values), 5)  # Two links plus three self-loops.
+
+    def test_rejects_unknown_sensors(self):
+        with self.assertRaises(ValueError):
+            SensorGraph(['a', 'b'], [('a', 'z')])
+
+    def test_default_config_matches_ai_inputs(self):
+        graph = SensorGraph.load()
+        self.assertEqual(graph.nodes, ['steering', 'throttle', 'brake', 'accel_x', 'lambda'])
+
+    def test_save_and_load(self):
+        graph = random_sensor_graph(50, seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.yaml')
+            graph.save(path)
+            self.assertEqual(SensorGraph.load(path).fingerprint(), graph.fingerprint())
+
+class TestGraphModel(unittest.TestCase):
+    def test_predict_adjustment(self):
+        tuner = AITuner(input_dim=5, model_type='graph')
+        self.assertIn(tuner.predict_adjustment([0.1, 0.5, 0.0, 0.3, 1.0]), (-1, 0, 1))
+
+    def test_batched_graphs_match_single_steps(self):
+        tuner = AITuner(input_dim=5, model_type='graph')
+        steps = np.random.default_rng(0).uniform(-1, 1, size=(16, 5)).astype(np.float32)
+        batched = np.asarray(tuner.predict_raw(steps))
+        single = np.concatenate([np.asarray(tuner.predict_raw(step[None])) for step in steps])
+        np.testing.assert_allclose(batched, single, atol=1e-5)
+
+    def test_node_feature_tensors(self):
+        graph = random_sensor_graph(20, seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.yaml')
+            graph.save(path)
+            tuner = AITuner(input_dim=40, model_type='graph', fast_inference=False,
+                            hyperparameters={'sensor_graph': path})
+            features = np.random.default_rng(0).normal(size=(8, 20, 2)).astype(np.float32)
+            self.assertEqual(np.asarray(tuner.predict_raw(features.reshape(8, 40))).shape, (8, 1))
+            with self.assertRaises(ValueError):
+                AITuner(input_dim=30, model_type='graph', hyperparameters={'sensor_graph': path})
+
+if __name__ == '__main__':
+    unittest.main()
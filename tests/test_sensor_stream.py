@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.sensor_stream import DEFAULT_COLUMNS, RingBuffer, SensorChannel, SensorHub, read_csv
+
+class TestSensorStream(unittest.TestCase):
+    def test_ring_buffer_wraps(self):
+        ring = RingBuffer(capacity=4)
+        ring.extend(np.arange(6.0))
+        np.testing.assert_array_equal(ring.window(4).ravel(), [2, 3, 4, 5])
+        ring.push(6.0)
+        self.assertEqual(ring.last()[0], 6.0)
+
+    def test_rolling_features_match_numpy(self):
+        samples = np.random.default_rng(0).normal(size=(500, 2))
+        channel = SensorChannel('accel', width=2, capacity=64, window=20)
+        for i, sample in enumerate(samples):
+            channel.push(sample)
+            window = samples[max(0, i - 19):i + 1]
+            np.testing.assert_allclose(channel.mean(), window.mean(axis=0))
+            np.testing.assert_allclose(channel.var(), window.var(axis=0), atol=1e-12)
+            np.testing.assert_array_equal(channel.min(), window.min(axis=0))
+            np.testing.assert_array_equal(channel.max(), window.max(axis=0))
+
+    def test_csv_replay_feeds_controller_inputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'session.csv')
+            with open(path, 'w') as f:
+                f.write('timestamp,' + ','.join(DEFAULT_COLUMNS) + '\n')
+                f.write('0.00,0.5,0.7,0.2,0.3,0.4,0.5,90,92,88,91,1.05,100\n')
+                f.write('0.01,0.6,0.8,0.1,0.2,0.4,0.5,91,93,89,92,0.98,101\n')
+            hub = SensorHub()
+            self.assertEqual(hub.ingest(read_csv(path)), 2)
+        np.testing.assert_allclose(hub.ai_input(), [[0.6, 0.8, 0.1, 0.2, 0.98]], rtol=1e-6)
+        np.testing.assert_array_equal(hub['wheel_speeds'].last(), [91, 93, 89, 92])
+        self.assertAlmostEqual(hub['vehicle_speed'].mean()[0], 100.5)
+
+if __name__ == '__main__':
+    unittest.main()
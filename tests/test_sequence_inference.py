@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from src.ai_tuner import AITuner
+from src.sequence_inference import (FrameWindow, RecurrentStepEngine, RewindowStepEngine,
+                                    TransformerStepEngine)
+
+WINDOW = 8
+
+def _windows(frames):
+    return np.stack([frames[i - WINDOW + 1:i + 1].ravel() for i in range(WINDOW - 1, len(frames))])
+
+class TestFrameWindow(unittest.TestCase):
+    def test_window_is_chronological(self):
+        window = FrameWindow(3, 2)
+        frames = np.arange(10, dtype=np.float32).reshape(5, 2)
+        for frame in frames:
+            latest = window.push(frame[None])
+        np.testing.assert_array_equal(latest[0], frames[2:].ravel())
+
+class TestStepEngines(unittest.TestCase):
+    def setUp(self):
+        self.frames = np.random.default_rng(0).normal(size=(24, 5)).astype(np.float32)
+
+    def _step(self, tuner):
+        tuner.reset_sequence_state()
+        return np.concatenate([tuner.predict_step(frame) for frame in self.frames])[:, 0]
+
+    def test_recurrent_state_matches_the_first_window(self):
+        for model_type in ('lstm', 'hybrid_cnn_lstm'):
+            with self.subTest(model_type=model_type):
+                tuner = AITuner(input_dim=5, model_type=model_type, hyperparameters={'window': WINDOW})
+                self.assertIsInstance(tuner.sequence_engine(), RecurrentStepEngine)
+                stepped = self._step(tuner)
+                expected = tuner.predict_raw(self.frames[:WINDOW].ravel())[0, 0]
+                self.assertAlmostEqual(stepped[WINDOW - 1], expected, places=5)
+
+    def test_transformer_cache_matches_every_window(self):
+        tuner = AITuner(input_dim=5, model_type='transformer', hyperparameters={'window': WINDOW})
+        self.assertIsInstance(tuner.sequence_engine(), TransformerStepEngine)
+        stepped = self._step(tuner)
+        np.testing.assert_allclose(stepped[WINDOW - 1:], tuner.predict_raw(_windows(self.frames))[:, 0], atol=1e-5)
+
+    def test_rewindow_engine(self):
+        tuner = AITuner(input_dim=5, model_type='lstm', hyperparameters={'window': WINDOW})
+        engine = RewindowStepEngine(tuner.predict_raw, WINDOW, 5)
+        engine.reset()
+        stepped = np.concatenate([engine.step(frame) for frame in self.frames])[:, 0]
+        np.testing.assert_allclose(stepped[WINDOW - 1:], tuner.predict_raw(_windows(self.frames))[:, 0], atol=1e-6)
+
+    def test_streams_are_independent(self):
+        tuner = AITuner(input_dim=5, model_type='transformer', hyperparameters={'window': WINDOW})
+        single = self._step(tuner)
+        tuner.reset_sequence_state(streams=2)
+        for frame in self.frames:
+            both = tuner.predict_step(np.stack([frame, np.zeros(5)]))
+        self.assertAlmostEqual(both[0, 0], single[-1], places=5)
+        with self.assertRaises(ValueError):
+            tuner.predict_step(self.frames[0])
+
+    def test_window_needs_a_sequence_model(self):
+        with self.assertRaises(ValueError):
+            AITuner(input_dim=5, model_type='default', hyperparameters={'window': WINDOW})
+        with self.assertRaises(ValueError):
+            AITuner(input_dim=5, model_type='default').predict_step(self.frames[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import unittest
+import numpy as np
+from src.instrumentation import Instrumentation
+from src.shadow_ensemble import ShadowEnsemble
+
+class SignPredictor:
+    """Direction of one sensor channel, optionally flipped."""
+    window = None
+
+    def __init__(self, column=0, flip=False):
+        self.input_dim = 3
+        self.column = column
+        self.flip = flip
+
+    def predict_adjustments(self, batch):
+        directions = np.sign(np.asarray(batch)[:, self.column]).astype(np.int64)
+        return -directions if self.flip else directions
+
+class BlockingPredictor(SignPredictor):
+    """Holds every shadow batch until released, so the pool falls behind."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.release.set()  # Warm-up call in the constructor.
+
+    def predict_adjustments(self, batch):
+        self.release.wait()
+        return super().predict_adjustments(batch)
+
+class TestShadowEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.rows = np.random.default_rng(0).normal(size=(500, 3)).astype(np.float32)
+
+    def test_primary_decides_and_shadows_record_agreement(self):
+        # Room for every batch in flight, so no batch is dropped however slowly the pool runs.
+        ensemble = ShadowEnsemble(SignPredictor(), {'same': SignPredictor(), 'flipped': SignPredictor(flip=True)},
+                                  batch_size=32, max_pending=16, instrumentation=Instrumentation())
+        decisions = [ensemble.predict_adjustment(row) for row in self.rows]
+        ensemble.shutdown()
+        self.assertEqual(decisions, np.sign(self.rows[:, 0]).astype(int).tolist())
+        stats = ensemble.stats()
+        self.assertEqual(stats['same']['rows'], 500)
+        self.assertEqual(stats['same']['agreement'], 1.0)
+        self.assertEqual(stats['flipped']['agreement'], 0.0)
+        self.assertAlmostEqual(stats['flipped']['decisions'][1], stats['primary']['decisions'][-1])
+        for entry in stats.values():
+            self.assertAlmostEqual(sum(entry['decisions'].values()), 1.0)
+            self.assertGreater(entry['latency_p99'], 0.0)
+        self.assertEqual(stats['primary']['dropped_rows'], 0)
+
+    def test_drops_batches_when_shadows_fall_behind(self):
+        blocking = BlockingPredictor()
+        ensemble = ShadowEnsemble(SignPredictor(), {'slow': blocking}, batch_size=10, max_pending=2,
+                                  instrumentation=Instrumentation())
+        blocking.release.clear()
+        ensemble.predict_adjustments(self.rows[:100])
+        blocking.release.set()
+        ensemble.shutdown()
+        stats = ensemble.stats()
+        self.assertEqual(stats['primary']['dropped_rows'], 80)
+        self.assertEqual(stats['slow']['rows'], 20)
+        self.assertEqual(stats['primary']['rows'], 100)
+
+    def test_weighted_vote(self):
+        ensemble = ShadowEnsemble(SignPredictor(0), {'b': SignPredictor(1), 'c': SignPredictor(2)},
+                                  instrumentation=Instrumentation())
+        batch = np.array([[1, 1, -1], [1, -1, -1], [1, 1, 1], [0, 0, 0]], dtype=np.float32)
+        np.testing.assert_array_equal(ensemble.vote(batch), [0, 0, 1, 0])
+        ensemble.weights = np.array([3.0, 1.0, 1.0])
+        np.testing.assert_array_equal(ensemble.vote(batch), [1, 0, 1, 0])
+        ensemble.shutdown()
+
+    def test_rejects_windowed_models(self):
+        windowed = SignPredictor()
+        windowed.window = 8
+        with self.assertRaises(ValueError):
+            ShadowEnsemble(SignPredictor(), {'lstm': windowed}, instrumentation=Instrumentation())
+
+if __name__ == '__main__':
+    unittest.main()
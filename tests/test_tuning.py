@@ -10,5 +10,14 @@ class TestTuning(unittest.TestCase):
         new_val = self.tuner.apply_gradient_increment("fuel_map", direction=1)
         self.assertAlmostEqual(new_val, 1.01, places=2)
 
+    def test_closed_gate_suppresses_adjustments(self):
+        class Gate:
+            is_open = False
+        gated = Tuner(self.base_map, gradient_step=0.01, gate=Gate())
+        self.assertEqual(gated.apply_gradient_increment("fuel_map", direction=1), 1.0)
+        self.assertEqual(self.base_map['fuel_map'], 1.0)
+        Gate.is_open = True
+        self.assertAlmostEqual(gated.apply_gradient_increment("fuel_map", direction=1), 1.01)
+
 if __name__ == '__main__':
     unittest.main()